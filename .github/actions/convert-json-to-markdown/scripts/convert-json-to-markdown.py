@@ -16,6 +16,39 @@ import json
 import os
 import sys
 
+# Make the modules shared by all actions importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, 'shared'))
+
+from aztier.files import write_file_if_changed
+
+
+# Upstream tier model of each asset type, used to hyperlink built-in assets
+UPSTREAM_TIER_MODEL_URIS = {
+    'azure': 'https://github.com/emiliensocchi/azure-tiering/tree/main/Azure%20roles',
+    'entra': 'https://github.com/emiliensocchi/azure-tiering/tree/main/Entra%20roles',
+    'msgraph': 'https://github.com/emiliensocchi/azure-tiering/tree/main/Microsoft%20Graph%20application%20permissions'
+}
+
+# Columns following the asset name and type in the table of each tier
+MARKDOWN_TIER_COLUMNS = {
+    'azure': [
+        ['shortestPath', 'example'],
+        ['shortestPath', 'example'],
+        ['worstCaseScenario'],
+        ['worstCaseScenario']
+    ],
+    'entra': [
+        ['pathType', 'shortestPath', 'example'],
+        ['providesFullAccessTo'],
+        []
+    ],
+    'msgraph': [
+        ['pathType', 'shortestPath', 'example'],
+        [],
+        []
+    ]
+}
+
 
 def remove_substring_until_char(original_string, substring, char):
     """
@@ -30,17 +63,75 @@ def remove_substring_until_char(original_string, substring, char):
             str: the modified string with the substring removed until the specified character
 
     """
-    reversed_s = original_string[::-1]
-    reversed_substring = substring[::-1]
-    reversed_char = char[::-1]
-    char_pos = reversed_s.find(reversed_char)
+    char_pos = original_string.rfind(char)
     
     if char_pos != -1:
-        modified_s = reversed_s[:char_pos].replace(reversed_substring, '') + reversed_s[char_pos:]
-    else:
-        modified_s = reversed_s.replace(reversed_substring, '')
-    
-    return modified_s[::-1]
+        char_end = char_pos + len(char)
+        return original_string[:char_end] + original_string[char_end:].replace(substring, '')
+
+    return original_string.replace(substring, '')
+
+
+def render_tiered_markdown(markdown_content, tiered_assets, tier_columns, upstream_uri):
+    """
+        Renders the passed tiered assets into the tier tables of the passed Markdown page, in a single pass over the page.
+        Each '##' heading starts a new section, where the first section describes the tiers and the following ones contain the
+        table of each tier. The text preceding and following the asset rows of each tier is preserved.
+
+        Args:
+            markdown_content(str): the current content of the Markdown page
+            tiered_assets(list(dict(str:str))): the tiered assets to render
+            tier_columns(list(list(str))): the columns following the asset name and type in the table of each tier
+            upstream_uri(str): the URI of the upstream tier model, used to hyperlink built-in assets
+
+        Returns:
+            str: the new content of the Markdown page
+
+    """
+    section_splitter = '##'
+    row_splitter = '\n| ['
+    anchor_splitter = "<a id='tier-"
+    assets_by_tier = { str(tier): [] for tier in range(len(tier_columns)) }
+
+    for asset in tiered_assets:
+        if asset['tier'] in assets_by_tier:
+            assets_by_tier[asset['tier']].append(asset)
+
+    sections = markdown_content.split(section_splitter)
+    last_tier = len(tier_columns) - 1
+    page = [sections[0], section_splitter, sections[1]]
+
+    for tier, columns in enumerate(tier_columns):
+        tier_content = section_splitter + sections[tier + 2]
+        first_row_pos = tier_content.find(row_splitter)
+
+        # Locate the header and footer surrounding the asset rows
+        if first_row_pos != -1:
+            tier_header = tier_content[:first_row_pos]
+            tier_footer = tier_content[tier_content.rfind('|') + 1:]
+        else:
+            # No asset has been tiered yet
+            tier_header = tier_content.partition(anchor_splitter)[0]
+            tier_footer = "\n\n\n" + anchor_splitter + tier_content.rpartition(anchor_splitter)[2]
+
+        if tier == last_tier:
+            tier_footer = "\n"
+
+        page.append(remove_substring_until_char(tier_header, '\n', '|'))
+
+        for asset in assets_by_tier[str(tier)]:
+            # Build hyperlink
+            asset_name_anchor = asset['assetName'].lower().replace(' ', '-')
+            upstream_link = f"{upstream_uri}#{asset_name_anchor}"
+            # Build Markdown content
+            name = f"[{asset['assetName']}]({upstream_link})" if asset['assetType'] == 'Built-in' else f"[{asset['assetName']}](#)"
+            cells = [name, asset['assetType']] + [asset[column] for column in columns]
+            # Build line
+            page.append(f"\n| {' | '.join(cells)} |")
+
+        page.append(tier_footer)
+
+    return ''.join(page)
 
 
 def convert_azure_json_to_markdown(azure_json_file, azure_markdown_file):
@@ -57,152 +148,15 @@ def convert_azure_json_to_markdown(azure_json_file, azure_markdown_file):
 
     """
     try:
-        upstream_uri = 'https://github.com/emiliensocchi/azure-tiering/tree/main/Azure%20roles'
-        tier_0_assets = []
-        tier_1_assets = []
-        tier_2_assets = []
-        tier_3_assets = []
-        
         with open(azure_json_file, 'r', encoding = 'utf-8') as file:
-            file_content = json.load(file)
-            tier_0_assets = [asset for asset in file_content if asset['tier'] == '0']
-            tier_1_assets = [asset for asset in file_content if asset['tier'] == '1']
-            tier_2_assets = [asset for asset in file_content if asset['tier'] == '2']
-            tier_3_assets = [asset for asset in file_content if asset['tier'] == '3']
-
-        with open(azure_markdown_file, 'r+', encoding = 'utf-8') as file:
-            file_content = file.read()
-            splitter = '##' 
-            splitted_content = file_content.split(splitter)
-            page_metadata = splitted_content[0] + splitter + splitted_content[1]
-
-            tier_0_content = splitter + splitted_content[2]
-            tier_1_content = splitter + splitted_content[3]
-            tier_2_content = splitter + splitted_content[4]
-            tier_3_content = splitter + splitted_content[5]
-
-            # Tier 0
-            new_tier_0_content = ''
-            splitter = '\n| ['
-            splitted_tier_0_content = tier_0_content.split(splitter)
-            splitter = "<a id='tier-"
-            tier_0_footer = ''
-
-            if len(splitted_tier_0_content) == 1:
-                # No asset has been tiered yet
-                splitted_tier_0_content = tier_0_content.split(splitter)
-                tier_0_footer = "\n\n\n" + splitter + splitted_tier_0_content[-1]
-            else:
-                tier_0_footer = splitted_tier_0_content[-1].split('|')[-1]
-
-            tier_0_header = remove_substring_until_char(splitted_tier_0_content[0], '\n', '|')
-
-            for tier_0_asset in tier_0_assets:
-                # Build hyperlinks
-                asset_name_anchor = tier_0_asset['assetName'].lower().replace(' ', '-')
-                upstream_link = f"{upstream_uri}#{asset_name_anchor}"
-                # Build Markdown content
-                name = f"[{tier_0_asset['assetName']}]({upstream_link})" if tier_0_asset['assetType'] == 'Built-in' else f"[{tier_0_asset['assetName']}](#)"
-                type = tier_0_asset['assetType']
-                shortest_path = tier_0_asset['shortestPath']
-                example = tier_0_asset['example']
-                # Build line
-                line = f"\n| {name} | {type} | {shortest_path} | {example} |"
-                new_tier_0_content += line
-
-            new_tier_0_content = tier_0_header + new_tier_0_content + tier_0_footer
-
-            # Tier 1
-            new_tier_1_content = ''
-            splitter = '\n| ['
-            splitted_tier_1_content = tier_1_content.split(splitter)
-            splitter = "<a id='tier-"
-            tier_1_footer = ''
-
-            if len(splitted_tier_1_content) == 1:
-                # No asset has been tiered yet
-                splitted_tier_1_content = tier_1_content.split(splitter)
-                tier_1_footer = "\n\n\n" + splitter + splitted_tier_1_content[-1]
-            else:
-                tier_1_footer = splitted_tier_1_content[-1].split('|')[-1]
-
-            tier_1_header = remove_substring_until_char(splitted_tier_1_content[0], '\n', '|')
-
-            for tier_1_asset in tier_1_assets:
-                # Build hyperlink
-                asset_name_anchor = tier_1_asset['assetName'].lower().replace(' ', '-')
-                upstream_link = f"{upstream_uri}#{asset_name_anchor}"
-                # Build Markdown content
-                name = f"[{tier_1_asset['assetName']}]({upstream_link})" if tier_1_asset['assetType'] == 'Built-in' else f"[{tier_1_asset['assetName']}](#)"
-                type = tier_1_asset['assetType'] 
-                shortest_path = tier_1_asset['shortestPath']
-                example = tier_1_asset['example']
-                # Build line
-                line = f"\n| {name} | {type} | {shortest_path} | {example} |"
-                new_tier_1_content += line
-
-            new_tier_1_content = tier_1_header + new_tier_1_content + tier_1_footer
-
-            # Tier 2
-            new_tier_2_content = ''
-            splitter = '\n| ['
-            splitted_tier_2_content = tier_2_content.split(splitter)
-            splitter = "<a id='tier-"
-            tier_2_footer = ''
-
-            if len(splitted_tier_2_content) == 1:
-                # No asset has been tiered yet
-                splitted_tier_2_content = tier_2_content.split(splitter)
-                tier_2_footer = "\n\n\n" + splitter + splitted_tier_2_content[-1]
-            else:
-                tier_2_footer = splitted_tier_2_content[-1].split('|')[-1]
-
-            tier_2_header = remove_substring_until_char(splitted_tier_2_content[0], '\n', '|')
-
-            for tier_2_asset in tier_2_assets:
-                # Build hyperlink
-                asset_name_anchor = tier_2_asset['assetName'].lower().replace(' ', '-')
-                upstream_link = f"{upstream_uri}#{asset_name_anchor}"
-                # Build Markdown content
-                name = f"[{tier_2_asset['assetName']}]({upstream_link})" if tier_2_asset['assetType'] == 'Built-in' else f"[{tier_2_asset['assetName']}](#)"
-                type = tier_2_asset['assetType']
-                worst_case_scenario = tier_2_asset['worstCaseScenario']
-                # Build line
-                line = f"\n| {name} | {type} | {worst_case_scenario} |"
-                new_tier_2_content += line
-
-            new_tier_2_content = tier_2_header + new_tier_2_content + tier_2_footer
-
-            # Tier 3
-            new_tier_3_content = ''
-            splitter = '\n| ['
-            splitted_tier_3_content = tier_3_content.split(splitter)
-            splitter = "<a id='tier-"
-
-            if len(splitted_tier_3_content) == 1:
-                # No asset has been tiered yet
-                splitted_tier_3_content = tier_3_content.split(splitter)
-
-            tier_3_header = remove_substring_until_char(splitted_tier_3_content[0], '\n', '|')
-            tier_3_footer = "\n"
-
-            for tier_3_asset in tier_3_assets:
-                # Build hyperlink
-                asset_name_anchor = tier_3_asset['assetName'].lower().replace(' ', '-')
-                upstream_link = f"{upstream_uri}#{asset_name_anchor}"
-                # Build Markdown content
-                name = f"[{tier_3_asset['assetName']}]({upstream_link})" if tier_3_asset['assetType'] == 'Built-in' else f"[{tier_3_asset['assetName']}](#)"
-                type = tier_3_asset['assetType']
-                worst_case_scenario = tier_3_asset['worstCaseScenario']
-                # Build line
-                line = f"\n| {name} | {type} | {worst_case_scenario} |"
-                new_tier_3_content += line
-
-            new_tier_3_content = tier_3_header + new_tier_3_content + tier_3_footer
-
-            new_page_content = page_metadata + new_tier_0_content + new_tier_1_content + new_tier_2_content + new_tier_3_content
-            file.seek(0)
-            file.write(new_page_content)
+            tiered_assets = json.load(file)
+
+        with open(azure_markdown_file, 'r', encoding = 'utf-8') as file:
+            markdown_content = file.read()
+
+        new_page_content = render_tiered_markdown(markdown_content, tiered_assets, MARKDOWN_TIER_COLUMNS['azure'], UPSTREAM_TIER_MODEL_URIS['azure'])
+
+        write_file_if_changed(azure_markdown_file, new_page_content)
 
     except FileNotFoundError:
         print('FATAL ERROR - Converting Azure JSON to markdown has failed.')
@@ -223,118 +177,15 @@ def convert_entra_json_to_markdown(entra_json_file, entra_markdown_file):
 
     """
     try:
-        upstream_uri = 'https://github.com/emiliensocchi/azure-tiering/tree/main/Entra%20roles'
-        tier_0_assets = []
-        tier_1_assets = []
-        tier_2_assets = []
-        
         with open(entra_json_file, 'r', encoding = 'utf-8') as file:
-            file_content = json.load(file)
-            tier_0_assets = [asset for asset in file_content if asset['tier'] == '0']
-            tier_1_assets = [asset for asset in file_content if asset['tier'] == '1']
-            tier_2_assets = [asset for asset in file_content if asset['tier'] == '2']
-
-        with open(entra_markdown_file, 'r+', encoding = 'utf-8') as file:
-            file_content = file.read()
-            splitter = '##' 
-            splitted_content = file_content.split(splitter)
-            page_metadata = splitted_content[0] + splitter + splitted_content[1]
-
-            tier_0_content = splitter + splitted_content[2]
-            tier_1_content = splitter + splitted_content[3]
-            tier_2_content = splitter + splitted_content[4]
-
-            # Tier 0
-            new_tier_0_content = ''
-            splitter = '\n| ['
-            splitted_tier_0_content = tier_0_content.split(splitter)
-            splitter = "<a id='tier-"
-            tier_0_footer = ''
-
-            if len(splitted_tier_0_content) == 1:
-                # No asset has been tiered yet
-                splitted_tier_0_content = tier_0_content.split(splitter)
-                tier_0_footer = "\n\n\n" + splitter + splitted_tier_0_content[-1]
-            else:
-                tier_0_footer = splitted_tier_0_content[-1].split('|')[-1]
-
-            tier_0_header = remove_substring_until_char(splitted_tier_0_content[0], '\n', '|')
-
-            for tier_0_asset in tier_0_assets:
-                # Build hyperlink
-                asset_name_anchor = tier_0_asset['assetName'].lower().replace(' ', '-')
-                upstream_link = f"{upstream_uri}#{asset_name_anchor}"
-                # Build Markdown content
-                name = f"[{tier_0_asset['assetName']}]({upstream_link})" if tier_0_asset['assetType'] == 'Built-in' else f"[{tier_0_asset['assetName']}](#)"
-                type = tier_0_asset['assetType']
-                path_type = tier_0_asset['pathType']
-                shortest_path = tier_0_asset['shortestPath']
-                example = tier_0_asset['example']
-                # Build line
-                line = f"\n| {name} | {type} | {path_type} | {shortest_path} | {example} |"
-                new_tier_0_content += line
-
-            new_tier_0_content = tier_0_header + new_tier_0_content + tier_0_footer
-
-            # Tier 1
-            new_tier_1_content = ''
-            splitter = '\n| ['
-            splitted_tier_1_content = tier_1_content.split(splitter)
-            splitter = "<a id='tier-"
-            tier_1_footer = ''
-
-            if len(splitted_tier_1_content) == 1:
-                # No asset has been tiered yet
-                splitted_tier_1_content = tier_1_content.split(splitter)
-                tier_1_footer = "\n\n\n" + splitter + splitted_tier_1_content[-1]
-            else:
-                tier_1_footer = splitted_tier_1_content[-1].split('|')[-1]
-
-            tier_1_header = remove_substring_until_char(splitted_tier_1_content[0], '\n', '|')
-            
-            for tier_1_asset in tier_1_assets:
-                # Build hyperlink
-                asset_name_anchor = tier_1_asset['assetName'].lower().replace(' ', '-')
-                upstream_link = f"{upstream_uri}#{asset_name_anchor}"
-                # Build Markdown content
-                name = f"[{tier_1_asset['assetName']}]({upstream_link})" if tier_1_asset['assetType'] == 'Built-in' else f"[{tier_1_asset['assetName']}](#)"
-                type = tier_1_asset['assetType']
-                provides_full_access_to = tier_1_asset['providesFullAccessTo']
-                # Build line
-                line = f"\n| {name} | {type} | {provides_full_access_to} |"
-                new_tier_1_content += line
-
-            new_tier_1_content = tier_1_header + new_tier_1_content + tier_1_footer
-
-            # Tier 2
-            new_tier_2_content = ''
-            splitter = '\n| ['
-            splitted_tier_2_content = tier_2_content.split(splitter)
-            splitter = "<a id='tier-"
-
-            if len(splitted_tier_2_content) == 1:
-                # No asset has been tiered yet
-                splitted_tier_2_content = tier_2_content.split(splitter)
-
-            tier_2_header = remove_substring_until_char(splitted_tier_2_content[0], '\n', '|')
-            tier_2_footer = "\n"
-
-            for tier_2_asset in tier_2_assets:
-                # Build hyperlink
-                asset_name_anchor = tier_2_asset['assetName'].lower().replace(' ', '-')
-                upstream_link = f"{upstream_uri}#{asset_name_anchor}"
-                # Build Markdown content
-                name = f"[{tier_2_asset['assetName']}]({upstream_link})"if tier_2_asset['assetType'] == 'Built-in' else f"[{tier_2_asset['assetName']}](#)"
-                type = tier_2_asset['assetType']
-                # Build line
-                line = f"\n| {name} | {type} |"
-                new_tier_2_content += line
-
-            new_tier_2_content = tier_2_header + new_tier_2_content + tier_2_footer
-
-            new_page_content = page_metadata + new_tier_0_content + new_tier_1_content + new_tier_2_content
-            file.seek(0)
-            file.write(new_page_content)
+            tiered_assets = json.load(file)
+
+        with open(entra_markdown_file, 'r', encoding = 'utf-8') as file:
+            markdown_content = file.read()
+
+        new_page_content = render_tiered_markdown(markdown_content, tiered_assets, MARKDOWN_TIER_COLUMNS['entra'], UPSTREAM_TIER_MODEL_URIS['entra'])
+
+        write_file_if_changed(entra_markdown_file, new_page_content)
 
     except FileNotFoundError:
         print('FATAL ERROR - Converting Entra json to markdown has failed.')
@@ -355,117 +206,15 @@ def convert_msgraph_json_to_markdown(msgraph_json_file, msgraph_markdown_file):
 
     """
     try:
-        upstream_uri = 'https://github.com/emiliensocchi/azure-tiering/tree/main/Microsoft%20Graph%20application%20permissions'
-        tier_0_assets = []
-        tier_1_assets = []
-        tier_2_assets = []
-        
         with open(msgraph_json_file, 'r', encoding = 'utf-8') as file:
-            file_content = json.load(file)
-            tier_0_assets = [asset for asset in file_content if asset['tier'] == '0']
-            tier_1_assets = [asset for asset in file_content if asset['tier'] == '1']
-            tier_2_assets = [asset for asset in file_content if asset['tier'] == '2']
-
-        with open(msgraph_markdown_file, 'r+', encoding = 'utf-8') as file:
-            file_content = file.read()
-            splitter = '##' 
-            splitted_content = file_content.split(splitter)
-            page_metadata = splitted_content[0] + splitter + splitted_content[1]
-
-            tier_0_content = splitter + splitted_content[2]
-            tier_1_content = splitter + splitted_content[3]
-            tier_2_content = splitter + splitted_content[4]
-
-            # Tier 0
-            new_tier_0_content = ''
-            splitter = '\n| ['
-            splitted_tier_0_content = tier_0_content.split(splitter)
-            splitter = "<a id='tier-"
-            tier_0_footer = ''
-
-            if len(splitted_tier_0_content) == 1:
-                # No asset has been tiered yet
-                splitted_tier_0_content = tier_0_content.split(splitter)
-                tier_0_footer = "\n\n\n" + splitter + splitted_tier_0_content[-1]
-            else:
-                tier_0_footer = splitted_tier_0_content[-1].split('|')[-1]
-
-            tier_0_header = remove_substring_until_char(splitted_tier_0_content[0], '\n', '|')
-
-            for tier_0_asset in tier_0_assets:
-                # Build hyperlink
-                asset_name_anchor = tier_0_asset['assetName'].lower().replace(' ', '-')
-                upstream_link = f"{upstream_uri}#{asset_name_anchor}"
-                # Build Markdown content
-                name = f"[{tier_0_asset['assetName']}]({upstream_link})" if tier_0_asset['assetType'] == 'Built-in' else f"[{tier_0_asset['assetName']}](#)"
-                type = tier_0_asset['assetType']
-                path_type = tier_0_asset['pathType']
-                shortest_path = tier_0_asset['shortestPath']
-                example = tier_0_asset['example']
-                # Build line
-                line = f"\n| {name} | {type} | {path_type} | {shortest_path} | {example} |"
-                new_tier_0_content += line
-
-            new_tier_0_content = tier_0_header + new_tier_0_content + tier_0_footer
-
-            # Tier 1
-            new_tier_1_content = ''
-            splitter = '\n| ['
-            splitted_tier_1_content = tier_1_content.split(splitter)
-            splitter = "<a id='tier-"
-            tier_1_footer = ''
-
-            if len(splitted_tier_1_content) == 1:
-                # No asset has been tiered yet
-                splitted_tier_1_content = tier_1_content.split(splitter)
-                tier_1_footer = "\n\n\n" + splitter + splitted_tier_1_content[-1]
-            else:
-                tier_1_footer = splitted_tier_1_content[-1].split('|')[-1]
-
-            tier_1_header = remove_substring_until_char(splitted_tier_1_content[0], '\n', '|')
-
-            for tier_1_asset in tier_1_assets:
-                # Build hyperlink
-                asset_name_anchor = tier_1_asset['assetName'].lower().replace(' ', '-')
-                upstream_link = f"{upstream_uri}#{asset_name_anchor}"
-                # Build Markdown content
-                name = f"[{tier_1_asset['assetName']}]({upstream_link})" if tier_1_asset['assetType'] == 'Built-in' else f"[{tier_1_asset['assetName']}](#)"
-                type = tier_1_asset['assetType']
-                # Build line
-                line = f"\n| {name} | {type} |"
-                new_tier_1_content += line
-
-            new_tier_1_content = tier_1_header + new_tier_1_content + tier_1_footer
-
-            # Tier 2
-            new_tier_2_content = ''
-            splitter = '\n| ['
-            splitted_tier_2_content = tier_2_content.split(splitter)
-            splitter = "<a id='tier-"
-
-            if len(splitted_tier_2_content) == 1:
-                # No asset has been tiered yet
-                splitted_tier_2_content = tier_2_content.split(splitter)
-
-            tier_2_header = remove_substring_until_char(splitted_tier_2_content[0], '\n', '|')
-            tier_2_footer = "\n"
-
-            for tier_2_asset in tier_2_assets:
-                # Build hyperlink
-                asset_name_anchor = tier_2_asset['assetName'].lower().replace(' ', '-')
-                upstream_link = f"{upstream_uri}#{asset_name_anchor}"
-                # Build Markdown content
-                name = f"[{tier_2_asset['assetName']}]({upstream_link})" if tier_2_asset['assetType'] == 'Built-in' else f"[{tier_2_asset['assetName']}](#)"
-                type = tier_2_asset['assetType']
-                # Build line
-                line = f"\n| {name} | {type} |"
-                new_tier_2_content += line
-
-            new_tier_2_content = tier_2_header + new_tier_2_content + tier_2_footer
-
-            new_page_content = page_metadata + new_tier_0_content + new_tier_1_content + new_tier_2_content
-            file.seek(0)
-            file.write(new_page_content)
+            tiered_assets = json.load(file)
+
+        with open(msgraph_markdown_file, 'r', encoding = 'utf-8') as file:
+            markdown_content = file.read()
+
+        new_page_content = render_tiered_markdown(markdown_content, tiered_assets, MARKDOWN_TIER_COLUMNS['msgraph'], UPSTREAM_TIER_MODEL_URIS['msgraph'])
+
+        write_file_if_changed(msgraph_markdown_file, new_page_content)
 
     except FileNotFoundError:
         print('FATAL ERROR - Converting MS Graph json to markdown has failed.')
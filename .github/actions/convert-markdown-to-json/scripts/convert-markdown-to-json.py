@@ -23,179 +23,71 @@
         - Valid access tokens for ARM and MS Graph are expected to be available to AzTierWatcher via the following environment variables:
             - 'ARM_ACCESS_TOKEN'
             - 'MSGRAPH_ACCESS_TOKEN'
+        - Optionally, the ARM and MS Graph endpoints can be overridden via the following environment variables (e.g. for a national cloud):
+            - 'ARM_ENDPOINT' (defaults to 'https://management.azure.com')
+            - 'MSGRAPH_ENDPOINT' (defaults to 'https://graph.microsoft.com')
 
     Note:
         During the conversion to JSON, tiered roles and permissions are enriched with their definition Ids, which need to be retrieved
         from the MS Graph and ARM APIs.
 
 """
+import atexit
 import json
 import os
 import re
-import requests
 import sys
-import time
 import uuid
 
-
-def send_batch_request_to_arm(token, batch_requests):
-    """
-        Sends the passed batch requests to ARM, while handling pagination and throttling to return a complete response.
-
-        More info:
-            https://learn.microsoft.com/en-us/azure/azure-resource-manager/management/request-limits-and-throttling#migrating-to-regional-throttling-and-token-bucket-algorithm
-        
-        Args:
-            token(str): a valid access token for ARM
-            batch_requests(list(dict)): list of batch requests to send to ARM
-
-        Returns:
-            list(dict): list of responses from ARM
-    
-    """
-    complete_response = []
-
-    # Divide the passed batch into smaller chunks to stay within API limits
-    batch_request_size_limit = 500  
-    limited_batch_requests = [batch_requests[i:i + batch_request_size_limit] for i in range(0, len(batch_requests), batch_request_size_limit)]
-    
-    for limited_batch_request in limited_batch_requests:
-        remaining_requests = limited_batch_request
-        
-        # Loop until no request is throttled
-        while remaining_requests:
-            # Create the batch request
-            endpoint = 'https://management.azure.com/batch?api-version=2021-04-01'
-            headers = {'Authorization': f"Bearer {token}"}
-            body = { 
-                'requests': remaining_requests
-            }
-
-            http_response = requests.post(endpoint, headers = headers, json = body)
-
-            if http_response.status_code != 200 and http_response.status_code != 202:
-                return None
-
-            # Check if the response is paginated
-            all_responses = []
-            redirect_header = 'Location'
-            retry_header = 'Retry-After'
-
-            if redirect_header in http_response.headers:
-                # The response is paginated - wait for all individual requests in the batch to finish
-                retry_after_x_seconds = int(http_response.headers.get(retry_header))
-                time.sleep(retry_after_x_seconds)
-                page = http_response.headers.get(redirect_header)
-                http_response = requests.get(page, headers = headers)
-                
-                if http_response.status_code != 200 and http_response.status_code != 202:
-                    return None
-
-                paginated_response = http_response.json()['value']
-                all_responses = paginated_response
-                next_page = http_response.json()['nextLink'] if 'nextLink' in http_response.json() else ''
-
-                # Get paginated reponse until no more pages
-                while next_page:
-                    http_response = requests.get(next_page, headers = headers)
-
-                    if http_response.status_code != 200 and http_response.status_code != 202:
-                        return None
-
-                    paginated_response = http_response.json()['value']
-                    next_page = http_response.json()['nextLink'] if 'nextLink' in http_response.json() else ''
-                    all_responses += paginated_response
-            else:
-                # The response is not paginated
-                all_responses = http_response.json()['responses']
-
-            # Identify throttled requests
-            successful_responses = [response for response in all_responses if response['httpStatusCode'] == 200 or response['httpStatusCode'] == 202]
-            complete_response += successful_responses
-            throttled_responses = [response for response in all_responses if response['httpStatusCode'] == 429]
-
-            if not throttled_responses:
-                break
-
-            # Collect throttled requests
-            remaining_requests = []
-            for throttled_response in throttled_responses:
-                throttled_response_name = throttled_response['name']
-                throttled_request = next((r for r in limited_batch_request if r['name'] == throttled_response_name), None)
-                remaining_requests.append(throttled_request)
-
-            # Verify if a Rety-After header has been served and sleep for the specified time
-            last_throttled_response = throttled_responses[-1]
-            last_throttled_headers = last_throttled_response['headers']
-
-            if 'Retry-After' in last_throttled_headers:
-                wait_seconds = int(last_throttled_response['headers']['Retry-After'])
-                time.sleep(wait_seconds)
-        # End of While
-
-    return complete_response
+# Make the modules shared by all actions importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, 'shared'))
+
+from aztier import arm
+from aztier.arm import get_scope_hierarchy_from_arm, send_batch_request_to_arm, send_paginated_request
+from aztier.endpoints import ARM_BASE_URI
+from aztier.files import write_file_if_changed
+from aztier.graph import send_batch_request_to_graph
+from aztier.metrics import RUN_METRICS
+
+
+# Matches the content stripped from Markdown table cells (brackets, links, anchors, emphasis, line breaks and code marks)
+MARKDOWN_CELL_STRIP_PATTERN = re.compile(r"(\[|\]|\(https?:\/\/[^\s)]+\)|\(#[a-z0-9\-]*\)|\\u26a0\\ufe0f |\*|<br>|`|\\ud83d\\udd70\\ufe0f )")
+
+# Columns following the asset name and type in the table of each tier, as (JSON property, cell format) pairs
+MARKDOWN_TIER_SCHEMAS = {
+    'azure': [
+        [('shortestPath', 'ascii'), ('example', 'text')],
+        [('shortestPath', 'ascii'), ('example', 'text')],
+        [('worstCaseScenario', 'text')],
+        [('worstCaseScenario', 'text')]
+    ],
+    'entra': [
+        [('pathType', 'raw'), ('shortestPath', 'ascii'), ('example', 'text')],
+        [('providesFullAccessTo', 'text')],
+        []
+    ],
+    'msgraph': [
+        [('pathType', 'raw'), ('shortestPath', 'ascii'), ('example', 'text')],
+        [],
+        []
+    ]
+}
 
 
-def get_resource_id_of_higher_scopes_from_arm(token):
+def get_resource_id_of_subscriptions_from_arm(token):
     """
-        Retrieves the resource Id of the following "higher" scopes that the passed token has access to:
-            - Management Groups
-            - Subscriptions
-            - Resource groups
+        Retrieves the resource Id of all Subscriptions that the passed token has access to.
 
         Args:
             str: a valid access token for ARM
 
         Returns:
-            list(str): list of resource Ids for all scopes that the token has access to
+            list(str): list of resource Ids for all Subscriptions that the token has access to
 
     """
-    all_scopes = []
-
-    # Get Management groups and Subscriptions
-    batch_requests = [
-        {
-            "httpMethod": "GET",
-            "url": "https://management.azure.com/providers/Microsoft.Management/managementGroups?api-version=2021-04-01"
-        },
-        {
-            "httpMethod": "GET",
-            "url": "https://management.azure.com/subscriptions?api-version=2021-04-01"
-        }
-    ]
-
-    http_responses = send_batch_request_to_arm(token, batch_requests)
-
-    if http_responses is None:
-        print('FATAL ERROR - The Azure scopes could not be retrieved from ARM.')
-        exit()
-
-    mg_responses = http_responses[0]['content']['value']
-    mg_resource_ids = [response['id'] for response in mg_responses]
-    subscription_responses = http_responses[1]['content']['value']
-    subscription_resource_ids = [response['id'] for response in subscription_responses]
-
-    # Get Resource groups
-    batch_requests = []
+    hierarchy = get_scope_hierarchy_from_arm(token)
+    subscription_resource_ids = [scope['id'] for scope in hierarchy.values() if scope['type'] == 'subscription']
 
-    for subscription_resource_id in subscription_resource_ids:
-        batch_requests.append({
-            "name": str(uuid.uuid4()),
-            "httpMethod": "GET",
-            "url": f"https://management.azure.com{subscription_resource_id}/resourceGroups?api-version=2021-04-01"
-        })
-
-    http_responses = send_batch_request_to_arm(token, batch_requests)
-    
-    if http_responses is None:
-        print('FATAL ERROR - The Azure scopes could not be retrieved from ARM.')
-        exit()
-
-    rg_responses = sum([response['content']['value'] for response in http_responses], [])
-    rg_resource_ids = [response['id'] for response in rg_responses]
-
-    # Merge all scopes
-    all_scopes = mg_resource_ids + subscription_resource_ids + rg_resource_ids
     return subscription_resource_ids
 
 
@@ -210,13 +102,13 @@ def get_custom_azure_role_definitions_from_arm(token):
             list(str): list of custom role definitions
     """
     batch_requests = []
-    scope = get_resource_id_of_higher_scopes_from_arm(token)
+    scope = get_resource_id_of_subscriptions_from_arm(token)
 
     for resource_id in scope:
         batch_requests.append({
             "httpMethod": "GET",
             "name": str(uuid.uuid4()),
-            "url": f"https://management.azure.com{resource_id}/providers/Microsoft.Authorization/roleDefinitions?$filter=type eq 'CustomRole'&api-version=2022-04-01"
+            "url": f"{ARM_BASE_URI}{resource_id}/providers/Microsoft.Authorization/roleDefinitions?$filter=type eq 'CustomRole'&api-version=2022-04-01"
         })
 
     http_responses = send_batch_request_to_arm(token, batch_requests)
@@ -243,76 +135,95 @@ def get_built_in_azure_role_definitions_from_arm(token):
             list(str): list of built-in role definitions
 
     """
-    endpoint = "https://management.azure.com/providers/Microsoft.Authorization/roleDefinitions?$filter=type eq 'BuiltInRole'&api-version=2022-04-01"
+    endpoint = f"{ARM_BASE_URI}/providers/Microsoft.Authorization/roleDefinitions?$filter=type eq 'BuiltInRole'&api-version=2022-04-01"
     headers = {'Authorization': f"Bearer {token}"}
-    response = requests.get(endpoint, headers = headers)
+    complete_response = send_paginated_request(endpoint, headers)
 
-    if response.status_code != 200:
+    if complete_response is None:
         print('FATAL ERROR - The Azure roles could not be retrieved from ARM.')
         exit()
 
-    paginated_response = response.json()['value']
-    complete_response = paginated_response
-    next_page = response.json()['nextLink'] if 'nextLink' in response.json() else ''
-
-    while next_page:
-        response = requests.get(next_page, headers = headers)
-
-        if response.status_code != 200:
-            print('FATAL ERROR - The Azure roles could not be retrieved from ARM.')
-            exit()
-        
-        paginated_response = response.json()['value']
-        next_page = response.json()['nextLink'] if 'nextLink' in response.json() else ''
-        complete_response += paginated_response
-
     return complete_response
 
 
-def get_entra_role_definitions_from_graph(token):
+def get_entra_role_definitions_and_application_permission_definitions_from_graph(token):
     """
-        Retrieves all Entra role definitions from MS Graph.
+        Retrieves all Entra role definitions and all MS Graph application permission definitions from MS Graph, using a single batch.
+        Only the properties used by convert-markdown-to-json are retrieved.
 
         Args:
             str: a valid access token for MS Graph
 
         Returns:
-            list(str): list of role definitions
+            tuple(list(dict), list(dict)): list of Entra role definitions, and list of application permission definitions
 
     """
-    endpoint = 'https://graph.microsoft.com/v1.0/roleManagement/directory/roleDefinitions'
-    headers = {'Authorization': f"Bearer {token}"}
-    response = requests.get(endpoint, headers = headers)
+    batch_requests = [
+        {
+            'id': 'entraRoles',
+            'url': '/roleManagement/directory/roleDefinitions?$select=id,displayName'
+        },
+        {
+            'id': 'msgraphAppPermissions',
+            'url': "/servicePrincipals(appId='00000003-0000-0000-c000-000000000000')?$select=appRoles"
+        }
+    ]
+    http_responses = send_batch_request_to_graph(token, batch_requests)
 
-    if response.status_code != 200:
-        print('FATAL ERROR - The Entra roles could not be retrieved from Graph.')
+    if http_responses is None:
+        print('FATAL ERROR - The Entra roles and MS Graph application permissions could not be retrieved from Graph.')
         exit()
 
-    response_content = response.json()['value']
-    return response_content
+    entra_role_definitions = http_responses['entraRoles']['value']
+    application_permission_definitions = http_responses['msgraphAppPermissions']['appRoles']
+    return entra_role_definitions, application_permission_definitions
 
 
-def get_application_permission_definitions_from_graph(token):
+def get_definition_ids_of_all_assets(arm_token, graph_token):
     """
-        Retrieves all application permission definitions from MS Graph.
+        Retrieves the definition Id of all Azure roles, Entra roles and MS Graph application permissions, indexed by normalized name.
 
         Args:
-            str: a valid access token for MS Graph
+            arm_token(str): a valid access token for ARM
+            graph_token(str): a valid access token for MS Graph
 
         Returns:
-            list(str): list of application permission definitions
+            dict(str:dict(str:str)): dictionary mapping each asset type ('azure', 'entra', 'msgraph') to a dictionary 
+            mapping asset names (lowercase, without spaces) to their respective IDs
 
     """
-    endpoint = "https://graph.microsoft.com/v1.0/servicePrincipals(appId='00000003-0000-0000-c000-000000000000')"
-    headers = {'Authorization': f"Bearer {token}"}
-    response = requests.get(endpoint, headers = headers)
+    # Get all Azure roles from ARM
+    azure_roles = {}
+    built_in_azure_role_definitions = get_built_in_azure_role_definitions_from_arm(arm_token)
+    custom_azure_role_definitions = get_custom_azure_role_definitions_from_arm(arm_token)   
+    all_azure_role_definitions = built_in_azure_role_definitions + custom_azure_role_definitions
 
-    if response.status_code != 200:
-        print('FATAL ERROR - The MS Graph application permissions could not be retrieved from Graph.')
-        exit()
+    for azure_role_definition in all_azure_role_definitions:
+        id = azure_role_definition['name']
+        name = azure_role_definition['properties']['roleName'].lower().replace(' ', '')
+        azure_roles[name] = id
 
-    response_content = response.json()['appRoles']
-    return response_content
+    # Get all Entra roles and MS Graph application permissions from MS Graph
+    entra_roles = {}
+    entra_role_definitions, msgraph_app_permission_definitions = get_entra_role_definitions_and_application_permission_definitions_from_graph(graph_token)
+
+    for entra_role_definition in entra_role_definitions:
+        id = entra_role_definition['id']
+        name = entra_role_definition['displayName'].lower().replace(' ', '')
+        entra_roles[name] = id
+
+    msgraph_app_permissions = {}
+
+    for msgraph_app_permission_definition in msgraph_app_permission_definitions:
+        id = msgraph_app_permission_definition['id']
+        name = msgraph_app_permission_definition['value'].lower().replace(' ', '')
+        msgraph_app_permissions[name] = id
+
+    return {
+        'azure': azure_roles,
+        'entra': entra_roles,
+        'msgraph': msgraph_app_permissions
+    }
 
 
 def standardize_markdown_asset_names(markdown_file):
@@ -326,28 +237,92 @@ def standardize_markdown_asset_names(markdown_file):
             str: the updated Markdown content with standardized asset names
     """
     try:
-        with open(markdown_file, 'r+', encoding='utf-8') as file:
-            updated_content = []
+        with open(markdown_file, 'r', encoding='utf-8') as file:
             content = file.readlines()
-            regex = r"^\| (?!Color|Azure role|Entra role|Application permission)([a-zA-Z- ]+) [^a-zA-Z]"
-            asset_pattern = re.compile(regex)
 
-            for line in content:
-                if asset_pattern.match(line):
-                    asset_name = asset_pattern.match(line).group(1).strip()
-                    hyperlinked_asset = f"[{asset_name}](#)"
-                    line = line.replace(asset_name, hyperlinked_asset, 1)
-                                        
-                updated_content.append(line)
+        updated_content = []
+        regex = r"^\| (?!Color|Azure role|Entra role|Application permission)([a-zA-Z- ]+) [^a-zA-Z]"
+        asset_pattern = re.compile(regex)
 
-            file.seek(0)
-            file.write(''.join(updated_content))
+        for line in content:
+            if asset_pattern.match(line):
+                asset_name = asset_pattern.match(line).group(1).strip()
+                hyperlinked_asset = f"[{asset_name}](#)"
+                line = line.replace(asset_name, hyperlinked_asset, 1)
+                                    
+            updated_content.append(line)
+
+        write_file_if_changed(markdown_file, ''.join(updated_content))
 
     except FileNotFoundError:
         print('FATAL ERROR - Standardizing the Markdown file has failed.')
         exit()
 
 
+def parse_markdown_cell(cell, cell_format):
+    """
+        Parses the content of the passed Markdown table cell according to the passed format.
+
+        Args:
+            cell(str): the raw content of the table cell
+            cell_format(str): how the cell is parsed (accepted values: 'raw', 'text', 'ascii')
+
+        Returns:
+            str: the parsed content of the cell
+
+    """
+    if cell_format == 'raw':
+        return cell.strip()
+
+    if cell_format == 'ascii':
+        return MARKDOWN_CELL_STRIP_PATTERN.sub('', cell).encode('ascii', 'ignore').decode().strip()
+
+    return MARKDOWN_CELL_STRIP_PATTERN.sub('', cell.strip())
+
+
+def parse_tiered_markdown(markdown_lines, tier_schemas, asset_ids):
+    """
+        Parses the tier tables located in the passed Markdown lines in a single pass, and yields each tiered asset as it is read.
+        Each '##' heading starts a new section, where the first section describes the tiers and the following ones contain the
+        table of each tier. Asset rows are the table rows starting with a hyperlinked asset name.
+
+        Args:
+            markdown_lines(iterable(str)): the lines of the Markdown page containing the tier tables to parse from, such as an open file
+            tier_schemas(list(list(tuple(str, str)))): the columns following the asset name and type in the table of each tier
+            asset_ids(dict(str:str)): dictionary mapping asset names to their respective IDs
+
+        Yields:
+            dict(str:str): the tiered asset, enriched with its ID
+
+    """
+    section_index = -1
+
+    for line in markdown_lines:
+        if line.startswith('##'):
+            section_index += 1
+            continue
+
+        tier = section_index - 1
+
+        if not line.startswith('| [') or not 0 <= tier < len(tier_schemas):
+            continue
+
+        elements = line[3:].split('|')
+        asset_name = MARKDOWN_CELL_STRIP_PATTERN.sub('', elements[0].split(']', 1)[0])
+        asset_name_key = asset_name.lower().replace(' ', '')
+        asset = {
+            'tier': str(tier),
+            'id': asset_ids.get(asset_name_key, ''),
+            'assetType': MARKDOWN_CELL_STRIP_PATTERN.sub('', elements[1].split(']', 1)[0]).strip(),
+            'assetName': asset_name
+        }
+
+        for column_index, (asset_property, cell_format) in enumerate(tier_schemas[tier], 2):
+            asset[asset_property] = parse_markdown_cell(elements[column_index], cell_format)
+
+        yield asset
+
+
 def convert_azure_markdown_to_json(azure_markdown_file, azure_json_file, azure_role_ids):
     """
         Converts and outputs the Azure roles tiering information located in the passed Markdown file to JSON.
@@ -363,99 +338,10 @@ def convert_azure_markdown_to_json(azure_markdown_file, azure_json_file, azure_r
 
     """
     try:
-        json_roles = []
-        regex = r"(\[|\]|\(https?:\/\/[^\s)]+\)|\(#[a-z0-9\-]*\)|\\u26a0\\ufe0f |\*|<br>|`|\\ud83d\\udd70\\ufe0f )"    # strips unwanted content
-        
         with open(azure_markdown_file, 'r', encoding = 'utf-8') as file:
-            file_content = file.read()
-            tiered_content = file_content.split('##')[2:]
-            tier_0_content = tiered_content[0]
-            tier_1_content = tiered_content[1]
-            tier_2_content = tiered_content[2]
-            tier_3_content = tiered_content[3]
-
-            # Parsing Tier-0 content
-            splitted_tier_0_content = tier_0_content.split('\n| [')[1:]
-
-            for line in splitted_tier_0_content:
-                elements = line.split('|')
-                asset_name = re.sub(regex, '', elements[0].split(']', 1)[0])
-                asset_name_key = asset_name.lower().replace(' ', '')
-                asset_id = azure_role_ids[asset_name_key] if asset_name_key in azure_role_ids.keys() else ''
-                asset_type = re.sub(regex, '', elements[1].split(']', 1)[0]).strip()
-                shortest_path = re.sub(regex, '', elements[2]).encode('ascii', 'ignore').decode().strip()
-                example = re.sub(regex, '', elements[3].strip())
-                json_role = {
-                    'tier': "0", 
-                    'id': asset_id,
-                    'assetType': asset_type,
-                    'assetName': asset_name, 
-                    'shortestPath': shortest_path,
-                    'example': example
-                }
-                json_roles.append(json_role)
-
-            # Parsing Tier-1 content
-            splitted_tier_1_content = tier_1_content.split('\n| [')[1:]
-
-            for line in splitted_tier_1_content:
-                elements = line.split('|')
-                asset_name = re.sub(regex, '', elements[0].split(']', 1)[0])
-                asset_name_key = asset_name.lower().replace(' ', '')
-                asset_id = azure_role_ids[asset_name_key] if asset_name_key in azure_role_ids.keys() else ''
-                asset_type = re.sub(regex, '', elements[1].split(']', 1)[0]).strip()
-                shortest_path = re.sub(regex, '', elements[2]).encode('ascii', 'ignore').decode().strip()
-                example = re.sub(regex, '', elements[3].strip())
-                json_role = {
-                    'tier': "1", 
-                    'id': asset_id,
-                    'assetType': asset_type,
-                    'assetName': asset_name, 
-                    'shortestPath': shortest_path,
-                    'example': example
-                }
-                json_roles.append(json_role)
-
-            # Parsing Tier-2 content
-            splitted_tier_2_content = tier_2_content.split('\n| [')[1:]
-
-            for line in splitted_tier_2_content:
-                elements = line.split('|')
-                asset_name = re.sub(regex, '', elements[0].split(']', 1)[0])
-                asset_name_key = asset_name.lower().replace(' ', '')
-                asset_id = azure_role_ids[asset_name_key] if asset_name_key in azure_role_ids else ''
-                asset_type = re.sub(regex, '', elements[1].split(']', 1)[0]).strip()
-                worst_case_scenario = re.sub(regex, '', elements[2].strip())
-                json_role = {
-                    'tier': '2',
-                    'id': asset_id,
-                    'assetType': asset_type,
-                    'assetName': asset_name,
-                    'worstCaseScenario': worst_case_scenario
-                }
-                json_roles.append(json_role)
-
-            # Parsing Tier-3 content
-            splitted_tier_3_content = tier_3_content.split('\n| [')[1:]
-
-            for line in splitted_tier_3_content:
-                elements = line.split('|')
-                asset_name = re.sub(regex, '', elements[0].split(']', 1)[0])
-                asset_name_key = asset_name.lower().replace(' ', '')
-                asset_id = azure_role_ids[asset_name_key] if asset_name_key in azure_role_ids else ''
-                asset_type = re.sub(regex, '', elements[1].split(']', 1)[0]).strip()
-                worst_case_scenario = re.sub(regex, '', elements[2].strip())
-                json_role = {
-                    'tier': '3',
-                    'id': asset_id,
-                    'assetType': asset_type,
-                    'assetName': asset_name,
-                    'worstCaseScenario': worst_case_scenario
-                }
-                json_roles.append(json_role)
-
-        with open(azure_json_file, "w", encoding = 'utf-8') as file:
-            file.write(json.dumps(json_roles, indent = 4))
+            json_roles = list(parse_tiered_markdown(file, MARKDOWN_TIER_SCHEMAS['azure'], azure_role_ids))
+
+        write_file_if_changed(azure_json_file, json.dumps(json_roles, indent = 4))
 
     except FileNotFoundError:
         print('FATAL ERROR - Converting Azure markdown to json has failed.')
@@ -477,77 +363,10 @@ def convert_entra_markdown_to_json(entra_markdown_file, entra_json_file, entra_r
 
     """
     try:
-        json_roles = []
-        regex = r"(\[|\]|\(https?:\/\/[^\s)]+\)|\(#[a-z0-9\-]*\)|\\u26a0\\ufe0f |\*|<br>|`|\\ud83d\\udd70\\ufe0f )"    # strips unwanted content
-        
         with open(entra_markdown_file, 'r', encoding = 'utf-8') as file:
-            file_content = file.read()
-            tiered_content = file_content.split('##')[2:]
-            tier_0_content = tiered_content[0]
-            tier_1_content = tiered_content[1]
-            tier_2_content = tiered_content[2]
-
-            # Parsing Tier-0 content
-            splitted_tier_0_content = tier_0_content.split('\n| [')[1:]
-
-            for line in splitted_tier_0_content:
-                elements = line.split('|')
-                asset_name = re.sub(regex, '', elements[0].split(']', 1)[0])
-                asset_name_key = asset_name.lower().replace(' ', '')
-                asset_id = entra_role_ids[asset_name_key] if asset_name_key in entra_role_ids.keys() else ''
-                asset_type = re.sub(regex, '', elements[1].split(']', 1)[0]).strip()
-                path_type = elements[2].strip()
-                shortest_path = re.sub(regex, '', elements[3]).encode('ascii', 'ignore').decode().strip()
-                example = re.sub(regex, '', elements[4].strip())
-                json_role = {
-                    'tier': "0", 
-                    'id': asset_id,
-                    'assetType': asset_type,
-                    'assetName': asset_name, 
-                    'pathType': path_type,
-                    'shortestPath': shortest_path,
-                    'example': example
-                }
-                json_roles.append(json_role)
-
-            # Parsing Tier-1 content
-            splitted_tier_1_content = tier_1_content.split('\n| [')[1:]
-
-            for line in splitted_tier_1_content:
-                elements = line.split('|')
-                asset_name = re.sub(regex, '', elements[0].split(']', 1)[0])
-                asset_name_key = asset_name.lower().replace(' ', '')
-                asset_id = entra_role_ids[asset_name_key] if asset_name_key in entra_role_ids else ''
-                asset_type = re.sub(regex, '', elements[1].split(']', 1)[0]).strip()
-                provides_full_access_to = re.sub(regex, '', elements[2].strip())
-                json_role = {
-                    'tier': '1', 
-                    'id': asset_id,
-                    'assetType': asset_type,
-                    'assetName': asset_name,
-                    'providesFullAccessTo': provides_full_access_to
-                }
-                json_roles.append(json_role)
-
-            # Parsing Tier-2 content
-            splitted_tier_2_content = tier_2_content.split('\n| [')[1:]
-
-            for line in splitted_tier_2_content:
-                elements = line.split('|')
-                asset_name = re.sub(regex, '', elements[0].split(']', 1)[0])
-                asset_name_key = asset_name.lower().replace(' ', '')
-                asset_id = entra_role_ids[asset_name_key] if asset_name_key in entra_role_ids else ''
-                asset_type = re.sub(regex, '', elements[1].split(']', 1)[0]).strip()
-                json_role = {
-                    'tier': '2',
-                    'id': asset_id,
-                    'assetType': asset_type,
-                    'assetName': asset_name
-                }
-                json_roles.append(json_role)
-
-        with open(entra_json_file, "w", encoding = 'utf-8') as file:
-            file.write(json.dumps(json_roles, indent = 4))
+            json_roles = list(parse_tiered_markdown(file, MARKDOWN_TIER_SCHEMAS['entra'], entra_role_ids))
+
+        write_file_if_changed(entra_json_file, json.dumps(json_roles, indent = 4))
 
     except FileNotFoundError:
         print('FATAL ERROR - Converting Entra markdown to json has failed.')
@@ -569,76 +388,10 @@ def convert_msgraph_markdown_to_json(msgraph_markdown_file, msgraph_json_file, m
 
     """
     try:
-        json_permissions = []
-        regex = r"(\[|\]|\(https?:\/\/[^\s)]+\)|\(#[a-z0-9\-]*\)|\\u26a0\\ufe0f |\*|<br>|`|\\ud83d\\udd70\\ufe0f )"    # strips unwanted content
-        
         with open(msgraph_markdown_file, 'r', encoding = 'utf-8') as file:
-            file_content = file.read()
-
-            tiered_content = file_content.split('##')[2:]
-            tier_0_content = tiered_content[0]
-            tier_1_content = tiered_content[1]
-            tier_2_content = tiered_content[2]
-
-            # Parsing Tier-0 content
-            splitted_tier_0_content = tier_0_content.split('\n| [')[1:]
-
-            for line in splitted_tier_0_content:
-                elements = line.split('|')
-                asset_name = re.sub(regex, '', elements[0].split(']', 1)[0])
-                asset_name_key = asset_name.lower().replace(' ', '')
-                asset_id = msgraph_permission_ids[asset_name_key] if asset_name_key in msgraph_permission_ids.keys() else ''
-                asset_type = re.sub(regex, '', elements[1].split(']', 1)[0]).strip()
-                path_type = elements[2].strip()
-                shortest_path = re.sub(regex, '', elements[3]).encode('ascii', 'ignore').decode().strip()
-                example = re.sub(regex, '', elements[4].strip())
-                json_permission = {
-                    'tier': "0", 
-                    'id': asset_id,
-                    'assetType': asset_type,
-                    'assetName': asset_name, 
-                    'pathType': path_type,
-                    'shortestPath': shortest_path,
-                    'example': example
-                }
-                json_permissions.append(json_permission)
-
-            # Parsing Tier-1 content
-            splitted_tier_1_content = tier_1_content.split('\n| [')[1:]
-
-            for line in splitted_tier_1_content:
-                elements = line.split('|')
-                asset_name = re.sub(regex, '', elements[0].split(']', 1)[0])
-                asset_name_key = asset_name.lower().replace(' ', '')
-                asset_id = msgraph_permission_ids[asset_name_key] if asset_name_key in msgraph_permission_ids else ''
-                asset_type = re.sub(regex, '', elements[1].split(']', 1)[0]).strip()
-                json_permission = {
-                    'tier': '1', 
-                    'id': asset_id,
-                    'assetType': asset_type,
-                    'assetName': asset_name
-                }
-                json_permissions.append(json_permission)
-
-            # Parsing Tier-2 content
-            splitted_tier_2_content = tier_2_content.split('\n| [')[1:]
-
-            for line in splitted_tier_2_content:
-                elements = line.split('|')
-                asset_name = re.sub(regex, '', elements[0].split(']', 1)[0])
-                asset_name_key = asset_name.lower().replace(' ', '')
-                asset_id = msgraph_permission_ids[asset_name_key] if asset_name_key in msgraph_permission_ids else ''
-                asset_type = re.sub(regex, '', elements[1].split(']', 1)[0]).strip()
-                json_permission = {
-                    'tier': '2',
-                    'id': asset_id,
-                    'assetType': asset_type,
-                    'assetName': asset_name
-                }
-                json_permissions.append(json_permission)
-
-        with open(msgraph_json_file, "w", encoding = 'utf-8') as file:
-            file.write(json.dumps(json_permissions, indent = 4))
+            json_permissions = list(parse_tiered_markdown(file, MARKDOWN_TIER_SCHEMAS['msgraph'], msgraph_permission_ids))
+
+        write_file_if_changed(msgraph_json_file, json.dumps(json_permissions, indent = 4))
 
     except FileNotFoundError:
         print('FATAL ERROR - Converting MS Graph markdown to json has failed.')
@@ -658,10 +411,11 @@ if __name__ == "__main__":
         print('FATAL ERROR - A valid access token for MS Graph is required.')
         exit()
 
-    # Set local directories
+    # Set local directories and config file
     github_action_dir_name = '.github'
     absolute_path_to_script = os.path.abspath(sys.argv[0])
     root_dir = absolute_path_to_script.split(github_action_dir_name)[0]
+    config_file = root_dir + 'config.json'
     azure_dir = root_dir + 'Azure roles'
     entra_dir = root_dir + 'Entra roles'
     app_permissions_dir = root_dir + 'Microsoft Graph application permissions'
@@ -676,34 +430,36 @@ if __name__ == "__main__":
     entra_roles_json_file = f"{entra_dir}/tiered-entra-roles.json"
     app_permissions_json_file = f"{app_permissions_dir}/tiered-msgraph-app-permissions.json"
 
-    # Get all Azure roles from ARM
-    azure_roles = {}
-    built_in_azure_role_definitions = get_built_in_azure_role_definitions_from_arm(arm_access_token)
-    custom_azure_role_definitions = get_custom_azure_role_definitions_from_arm(arm_access_token)   
-    all_azure_role_definitions = built_in_azure_role_definitions + custom_azure_role_definitions
+    # Set local cache files
+    cache_dir = root_dir + '.cache'
+    metrics_file = f"{cache_dir}/metrics/convert-markdown-to-json.json"
 
-    for azure_role_definition in all_azure_role_definitions:
-        id = azure_role_definition['name']
-        name = azure_role_definition['properties']['roleName'].lower().replace(' ', '')
-        azure_roles[name] = id
+    # Write the metrics of the run when it ends, including when it fails
+    atexit.register(RUN_METRICS.write_summary, metrics_file, 'convert-markdown-to-json')
 
-    # Get all Entra roles from MS Graph
-    entra_roles = {}
-    entra_role_definitions = get_entra_role_definitions_from_graph(graph_access_token)
+    # Get project configuration from local config file
+    project_config = {}
+    try:
+        with open(config_file, 'r', encoding = 'utf-8') as file:
+            project_config = json.load(file)
+    except Exception:
+        print('FATAL ERROR - The config JSON file could not be retrieved.')
+        exit()
 
-    for entra_role_definition in entra_role_definitions:
-        id = entra_role_definition['id']
-        name = entra_role_definition['displayName'].lower().replace(' ', '')
-        entra_roles[name] = id
+    # Set the number of batch chunks kept in flight towards ARM
+    max_concurrent_arm_batches_config = str(project_config.get('maxConcurrentArmBatches', arm.MAX_CONCURRENT_ARM_BATCHES))
 
-    # Get all MS Graph application permissions from MS Graph
-    msgraph_app_permissions = {}
-    msgraph_app_permission_definitions = get_application_permission_definitions_from_graph(graph_access_token)
+    if not max_concurrent_arm_batches_config.isdigit() or int(max_concurrent_arm_batches_config) < 1:
+        print("FATAL ERROR - The 'maxConcurrentArmBatches' value set in the project's configuration file is invalid. Accepted values are positive integers")
+        exit()
 
-    for msgraph_app_permission_definition in msgraph_app_permission_definitions:
-        id = msgraph_app_permission_definition['id']
-        name = msgraph_app_permission_definition['value'].lower().replace(' ', '')
-        msgraph_app_permissions[name] = id
+    arm.MAX_CONCURRENT_ARM_BATCHES = int(max_concurrent_arm_batches_config)
+
+    # Get the definition Ids of all roles and permissions from ARM and MS Graph
+    asset_ids = get_definition_ids_of_all_assets(arm_access_token, graph_access_token)
+    azure_roles = asset_ids['azure']
+    entra_roles = asset_ids['entra']
+    msgraph_app_permissions = asset_ids['msgraph']
 
     # Convert Markdown content for Azure roles to JSON
     print (f"Converting: Azure roles")
@@ -9,7 +9,14 @@ echo "Detecting if built-in roles and permissions are untiered"
 
 script_dir='./.github/actions/detect-untiered/scripts'
 pip3 install -r "${script_dir}/requirements.txt" --break-system-packages
-python3 "${script_dir}/azTierWatcher.py"
+
+resume_option=''
+if [[ "$INPUT_RESUME" == "true" ]]
+then
+  resume_option='--resume'
+fi
+
+python3 "${script_dir}/azTierWatcher.py" $resume_option
 
 ## Stage 1 ##############################################################
 
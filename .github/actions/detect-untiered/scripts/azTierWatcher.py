@@ -24,200 +24,141 @@
                 d. Microsoft.Resources/subscriptions/read
                 e. Microsoft.Resources/subscriptions/resourceGroups/read
                 f. Microsoft.Resources/subscriptions/resourceGroups/resources/read
+                g. Microsoft.Resources/subscriptions/resources/read
         - Valid access tokens for ARM and MS Graph are expected to be available to AzTierWatcher via the following environment variables:
             - 'ARM_ACCESS_TOKEN'
             - 'MSGRAPH_ACCESS_TOKEN'
+        - Alternatively, several tenants can be scanned in parallel with '--tenants <manifest file>', where the manifest provides 
+          the access tokens of each tenant (see read_tenant_manifest). The untiered roles of each tenant are then written to 
+          'Tenants/<tenant name>/'.
+        - Optionally, the ARM and MS Graph endpoints can be overridden via the following environment variables (e.g. for a national cloud):
+            - 'ARM_ENDPOINT' (defaults to 'https://management.azure.com')
+            - 'MSGRAPH_ENDPOINT' (defaults to 'https://graph.microsoft.com')
 
 """
+import atexit
+import concurrent.futures
 import datetime
+import fcntl
 import json
 import os
-import requests
+import re
 import sys
 import time
 import uuid
 
+# Make the modules shared by all actions importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, 'shared'))
 
-def send_batch_request_to_arm(token, batch_requests):
-    """
-        Sends the passed batch requests to ARM, while handling pagination and throttling to return a complete response.
+from aztier import arm, transport
+from aztier.arm import ARM_BATCH_CHECKPOINT, ARM_THROTTLE_SCHEDULER, get_scope_hierarchy_from_arm, get_tenant_id_from_token, send_batch_request_to_arm, send_paginated_request, stream_paginated_batch_request_to_arm
+from aztier.assets import diff_assets
+from aztier.endpoints import ARM_BASE_URI, MSGRAPH_BASE_URI
+from aztier.files import write_file_if_changed
+from aztier.graph import send_batch_request_to_graph
+from aztier.metrics import RUN_METRICS, get_request_phase
+from aztier.transport import decode_json_stream, send_http_request
 
-        More info:
-            https://learn.microsoft.com/en-us/azure/azure-resource-manager/management/request-limits-and-throttling#migrating-to-regional-throttling-and-token-bucket-algorithm
-        
-        Args:
-            token(str): a valid access token for ARM
-            batch_requests(list(dict)): list of batch requests to send to ARM
 
-        Returns:
-            list(dict): list of responses from ARM
-    
-    """
-    complete_response = []
+# Maximum number of tenants scanned in parallel worker processes in multi-tenant mode (can be overridden in config.json)
+MAX_CONCURRENT_TENANTS = 8
 
-    # Divide the passed batch into smaller chunks to stay within API limits
-    batch_request_size_limit = 500  
-    limited_batch_requests = [batch_requests[i:i + batch_request_size_limit] for i in range(0, len(batch_requests), batch_request_size_limit)]
-    
-    for limited_batch_request in limited_batch_requests:
-        remaining_requests = limited_batch_request
-        
-        # Loop until no request is throttled
-        while remaining_requests:
-            # Create the batch request
-            endpoint = 'https://management.azure.com/batch?api-version=2021-04-01'
-            headers = {'Authorization': f"Bearer {token}"}
-            body = { 
-                'requests': remaining_requests
-            }
-
-            http_response = requests.post(endpoint, headers = headers, json = body)
-
-            if http_response.status_code != 200 and http_response.status_code != 202:
-                return None
-
-            # Check if the response is paginated
-            all_responses = []
-            redirect_header = 'Location'
-            retry_header = 'Retry-After'
-
-            if redirect_header in http_response.headers:
-                # The response is paginated - wait for all individual requests in the batch to finish
-                #retry_after_x_seconds = int(http_response.headers.get(retry_header))
-                #time.sleep(retry_after_x_seconds)
-                time.sleep(5)   # Seems acceptable and faster than the Retry-After header typically set to 20 seconds
-                page = http_response.headers.get(redirect_header)
-                http_response = requests.get(page, headers = headers)
-                
-                if http_response.status_code != 200 and http_response.status_code != 202:
-                    return None
+# Hyperlinked name of an asset in a row of an untiered report, followed by the definition Id of the asset in the link (if any)
+UNTIERED_ROW_ASSET_PATTERN = re.compile(r"^\| [^|]*\| \[([^\]]*)\]\((?:[^)]*/roleDefinitions/([^/?)]+))?")
 
-                paginated_response = http_response.json()['value']
-                all_responses = paginated_response
-                next_page = http_response.json()['nextLink'] if 'nextLink' in http_response.json() else ''
+# Accepted tenant names in the manifest of the multi-tenant mode, as each name is used as a directory name
+TENANT_NAME_PATTERN = re.compile(r"[A-Za-z0-9][A-Za-z0-9._-]*")
 
-                # Get paginated reponse until no more pages
-                while next_page:
-                    http_response = requests.get(next_page, headers = headers)
 
-                    if http_response.status_code != 200 and http_response.status_code != 202:
-                        return None
+def get_unique_role_definition_ids_from_assignments(assignments):
+    """
+        Collects the unique role definition Ids of the passed role assignments as they arrive, without keeping the assignments in memory.
 
-                    paginated_response = http_response.json()['value']
-                    next_page = http_response.json()['nextLink'] if 'nextLink' in http_response.json() else ''
-                    all_responses += paginated_response
-            else:
-                # The response is not paginated
-                all_responses = http_response.json()['responses']
+        Args:
+            assignments(iterable(dict)): iterable of role assignments or schedule instances, where None signals a failed request
 
-            # Identify throttled requests
-            successful_responses = [response for response in all_responses if response['httpStatusCode'] == 200 or response['httpStatusCode'] == 202]
-            complete_response += successful_responses
-            throttled_responses = [response for response in all_responses if response['httpStatusCode'] == 429]
+        Returns:
+            list(str): list of unique role definition Ids, or None if a request has failed
 
-            if not throttled_responses:
-                break
+    """
+    unique_role_ids = set()
+    unique_role_definition_ids = []
 
-            # Collect throttled requests
-            remaining_requests = []
-            for throttled_response in throttled_responses:
-                throttled_response_name = throttled_response['name']
-                throttled_request = next((r for r in limited_batch_request if r['name'] == throttled_response_name), None)
-                remaining_requests.append(throttled_request)
+    for assignment in assignments:
+        if assignment is None:
+            return None
 
-            # Verify if a Rety-After header has been served and sleep for the specified time
-            last_throttled_response = throttled_responses[-1]
-            last_throttled_headers = last_throttled_response['headers']
+        role_definition_id = assignment['properties']['roleDefinitionId']
+        role_id = role_definition_id.split("/")[-1]
 
-            if 'Retry-After' in last_throttled_headers:
-                wait_seconds = int(last_throttled_response['headers']['Retry-After'])
-                time.sleep(wait_seconds)
-        # End of While
+        if role_id not in unique_role_ids:
+            unique_role_ids.add(role_id)
+            unique_role_definition_ids.append(role_definition_id)
 
-    return complete_response
+    return unique_role_definition_ids
 
 
-def get_resource_id_of_all_scopes_from_arm(token):
+def get_resource_id_of_top_level_scopes_from_arm(token):
     """
-        Retrieves the resource Id of all scopes that the passed token has access to:
+        Retrieves the resource Id of the following top-level scopes that the passed token has access to:
             - Management Groups
             - Subscriptions
-            - Resource groups
-            - Individual resources
 
         Args:
             str: a valid access token for ARM
 
         Returns:
-            list(str): list of resource Ids for all scopes that the token has access to
+            tuple(list(str), list(str)): list of resource Ids for Management Groups, and list of resource Ids for Subscriptions
 
     """
-    all_scopes = []
+    hierarchy = get_scope_hierarchy_from_arm(token)
+    mg_resource_ids = [scope['id'] for scope in hierarchy.values() if scope['type'] == 'managementGroup']
+    subscription_resource_ids = [scope['id'] for scope in hierarchy.values() if scope['type'] == 'subscription']
 
-    # Get Management groups and Subscriptions
-    batch_requests = [
-        {
-            "httpMethod": "GET",
-            "url": "https://management.azure.com/providers/Microsoft.Management/managementGroups?api-version=2021-04-01"
-        },
-        {
-            "httpMethod": "GET",
-            "url": "https://management.azure.com/subscriptions?api-version=2021-04-01"
-        }
-    ]
+    return mg_resource_ids, subscription_resource_ids
 
-    http_responses = send_batch_request_to_arm(token, batch_requests)
 
-    if http_responses is None:
-        print('FATAL ERROR - The Azure scopes could not be retrieved from ARM.')
-        exit()
+def stream_resource_id_of_all_scopes_from_arm(token):
+    """
+        Streams the resource Id of all scopes that the passed token has access to, as soon as they are discovered:
+            - Management Groups
+            - Subscriptions
+            - Resource groups
+            - Individual resources
 
-    mg_responses = http_responses[0]['content']['value']
-    mg_resource_ids = [response['id'] for response in mg_responses]
-    subscription_responses = http_responses[1]['content']['value']
-    subscription_resource_ids = [response['id'] for response in subscription_responses]
+        Args:
+            str: a valid access token for ARM
 
-    # Get Resource groups
+        Yields:
+            str: the resource Id of each scope that the token has access to
+
+    """
+    # Management groups and Subscriptions
+    mg_resource_ids, subscription_resource_ids = get_resource_id_of_top_level_scopes_from_arm(token)
+    yield from mg_resource_ids
+    yield from subscription_resource_ids
+
+    # Resource groups and individual resources, with one listing per subscription rather than per resource group
     batch_requests = []
 
     for subscription_resource_id in subscription_resource_ids:
         batch_requests.append({
             "name": str(uuid.uuid4()),
             "httpMethod": "GET",
-            "url": f"https://management.azure.com{subscription_resource_id}/resourceGroups?api-version=2021-04-01"
+            "url": f"{ARM_BASE_URI}{subscription_resource_id}/resourceGroups?api-version=2021-04-01"
         })
-
-    http_responses = send_batch_request_to_arm(token, batch_requests)
-    
-    if http_responses is None:
-        print('FATAL ERROR - The Azure scopes could not be retrieved from ARM.')
-        exit()
-
-    rg_responses = sum([response['content']['value'] for response in http_responses], [])
-    rg_resource_ids = [response['id'] for response in rg_responses]
-
-    # Get individual resources
-    batch_requests = []
-
-    for rg_resource_id in rg_resource_ids:
         batch_requests.append({
             "name": str(uuid.uuid4()),
             "httpMethod": "GET",
-            "url": f"https://management.azure.com{rg_resource_id}/resources?api-version=2021-04-01"
+            "url": f"{ARM_BASE_URI}{subscription_resource_id}/resources?api-version=2021-04-01"
         })
 
-    http_responses = send_batch_request_to_arm(token, batch_requests)
+    for scope in stream_paginated_batch_request_to_arm(token, batch_requests):
+        if scope is None:
+            print('FATAL ERROR - The Azure scopes could not be retrieved from ARM.')
+            exit()
 
-    if http_responses is None:
-        print('FATAL ERROR - The Azure scopes could not be retrieved from ARM.')
-        exit()
-
-    resource_responses = sum([response['content']['value'] for response in http_responses], [])
-    resource_resource_ids = [response['id'] for response in resource_responses]
-
-    # Merge all scopes
-    all_scopes = mg_resource_ids + subscription_resource_ids + rg_resource_ids + resource_resource_ids
-    return all_scopes
+        yield scope['id']
 
 
 def is_pim_enabled_for_arm(token):
@@ -231,9 +172,9 @@ def is_pim_enabled_for_arm(token):
             bool: True if PIM is enabled, False otherwise
 
     """
-    endpoint = 'https://management.azure.com/providers/Microsoft.Authorization/roleEligibilityScheduleInstances?$filter=asTarget()&api-version=2020-10-01'
+    endpoint = f"{ARM_BASE_URI}/providers/Microsoft.Authorization/roleEligibilityScheduleInstances?$filter=asTarget()&api-version=2020-10-01"
     headers = {'Authorization': f"Bearer {token}"}
-    response = requests.get(endpoint, headers = headers)
+    response = send_http_request('GET', endpoint, headers = headers)
 
     if response.status_code == 200:
         return True
@@ -250,107 +191,213 @@ def get_role_definition_id_of_assigned_azure_roles_within_scope_from_arm(token,
          
         Args:
             token(str): a valid access token for ARM
-            scope(list(str)): list of resource Ids to check for existing role assignments
+            scope(iterable(str)): resource Ids to check for existing role assignments, consumed as a stream
 
         Returns:
             list(str): list of role definition Ids
 
     """
-    batch_requests = []
-
-    for resource_id in scope:
-        batch_requests.append({
+    batch_requests = (
+        {
             "httpMethod": "GET",
             "name": str(uuid.uuid4()),
-            "url": f"https://management.azure.com{resource_id}/providers/Microsoft.Authorization/roleAssignments?api-version=2022-04-01&$filter=atScope()"
-        })
-
-    http_responses = send_batch_request_to_arm(token, batch_requests)
+            "url": f"{ARM_BASE_URI}{resource_id}/providers/Microsoft.Authorization/roleAssignments?api-version=2022-04-01&$filter=atScope()"
+        }
+        for resource_id in scope
+    )
+    assignments = stream_paginated_batch_request_to_arm(token, batch_requests)
+    unique_role_definition_ids = get_unique_role_definition_ids_from_assignments(assignments)
 
-    if http_responses is None:
+    if unique_role_definition_ids is None:
         print('FATAL ERROR - The assigned Azure role definition Ids could not be retrieved from ARM.')
         exit()
- 
-    assignment_responses = sum([response['content']['value'] for response in http_responses], [])
-    role_definition_ids = [response['properties']['roleDefinitionId'] for response in assignment_responses]    
-    unique_role_ids = set()
-    unique_role_definition_ids = [role_definition_id for role_definition_id in role_definition_ids if role_definition_id.split("/")[-1] not in unique_role_ids and not unique_role_ids.add(role_definition_id.split("/")[-1])]
 
     return unique_role_definition_ids
 
 
-def get_role_definition_id_of_active_azure_roles_within_scope_from_arm(token, scope):
+def get_role_definition_id_of_active_and_eligible_azure_roles_within_scope_from_arm(token, scope):
     """
-        Retrieves the definition Id of all active Azure roles within the passed scope.
+        Retrieves the definition Id of all active and eligible Azure roles within the passed scope.
+        The active and eligible assignments of each scope are requested next to each other in a single batch stream, so that every 
+        scope is visited once and both endpoints share the same throttle budget. Role definition Ids are deduplicated as they arrive.
         
         Note:
             Uses PIM endpoints, which requires an Entra Premium 2 license 
          
         Args:
             token(str): a valid access token for ARM
-            scope(list(str)): list of resource Ids to check for existing role assignments
+            scope(iterable(str)): resource Ids to check for existing role assignments, consumed as a stream
 
         Returns:
             list(str): list of role definition Ids
 
     """
-    batch_requests = []
-
-    for resource_id in scope:
-        batch_requests.append({
+    assignment_endpoints = [
+        'roleAssignmentScheduleInstances?api-version=2020-10-01&$filter=atScope()',
+        'roleEligibilityScheduleInstances?api-version=2020-10-01&$filter=atScope()'
+    ]
+    batch_requests = (
+        {
             "httpMethod": "GET",
             "name": str(uuid.uuid4()),
-            "url": f"https://management.azure.com{resource_id}/providers/Microsoft.Authorization/roleAssignmentScheduleInstances?api-version=2020-10-01&$filter=atScope()"
-        })
+            "url": f"{ARM_BASE_URI}{resource_id}/providers/Microsoft.Authorization/{assignment_endpoint}"
+        }
+        for resource_id in scope
+        for assignment_endpoint in assignment_endpoints
+    )
+    assignments = stream_paginated_batch_request_to_arm(token, batch_requests)
+    unique_role_definition_ids = get_unique_role_definition_ids_from_assignments(assignments)
+
+    if unique_role_definition_ids is None:
+        print('FATAL ERROR - The active and eligible Azure role definition Ids could not be retrieved from ARM.')
+        exit()
 
-    http_responses = send_batch_request_to_arm(token, batch_requests)
+    return unique_role_definition_ids
 
-    if http_responses is None:
-        print('FATAL ERROR - The active Azure role definition Ids could not be retrieved from ARM.')
+
+def send_query_to_resource_graph(token, query, management_groups = None):
+    """
+        Sends the passed KQL query to Azure Resource Graph, while following the '$skipToken' of each page to return a complete response.
+        By default, the query covers the subscriptions accessible to the caller. When management groups are passed, it covers 
+        these management groups instead, including what is above and below them.
+
+        More info:
+            https://learn.microsoft.com/en-us/azure/governance/resource-graph/concepts/work-with-data#paging-results
+            https://learn.microsoft.com/en-us/rest/api/azureresourcegraph/resourcegraph/resources/resources#queryrequest
+
+        Args:
+            token(str): a valid access token for ARM
+            query(str): the KQL query to send to Azure Resource Graph
+            management_groups(list(str)): optional list of names of the management groups to query
+
+        Returns:
+            list(dict): list of rows returned by the query, or None if a page could not be retrieved
+
+    """
+    endpoint = f"{ARM_BASE_URI}/providers/Microsoft.ResourceGraph/resources?api-version=2024-04-01"
+    headers = {'Authorization': f"Bearer {token}"}
+    options = {
+        'resultFormat': 'objectArray',
+        'authorizationScopeFilter': 'AtScopeAboveAndBelow',
+        '$top': 1000
+    }
+    complete_response = []
+
+    while True:
+        body = {
+            'query': query,
+            'options': options
+        }
+
+        if management_groups:
+            body['managementGroups'] = management_groups
+
+        http_response = send_http_request('POST', endpoint, headers = headers, json = body, stream = True)
+
+        if http_response.status_code != 200:
+            return None
+
+        rows, page = decode_json_stream(http_response, 'data', get_request_phase(endpoint))
+        complete_response += rows
+        skip_token = page.get('$skipToken', '')
+
+        if not skip_token:
+            break
+
+        options = dict(options, **{ '$skipToken': skip_token })
+
+    return complete_response
+
+
+def get_role_definition_id_of_assigned_azure_roles_from_resource_graph(token):
+    """
+        Retrieves the definition Id of all assigned Azure roles in the tenant, using a single query to Azure Resource Graph.
+
+        Note:
+            The query targets the Tenant Root Management Group (named after the tenant Id), so that assignments made at the tenant root 
+            and on management groups without subscriptions are included, as with the discovery of assignments through ARM.
+            Active PIM assignments are included, as they are materialized as role assignments.
+            Eligible PIM assignments are not available in Azure Resource Graph, and are retrieved per management group and subscription instead.
+
+        Args:
+            token(str): a valid access token for ARM
+
+        Returns:
+            list(str): list of role definition Ids
+
+    """
+    query = """authorizationresources
+        | where type =~ 'microsoft.authorization/roleassignments'
+        | extend roleDefinitionId = tostring(properties['roleDefinitionId'])
+        | distinct roleDefinitionId
+        | order by roleDefinitionId asc"""
+    tenant_root_management_group = get_tenant_id_from_token(token)
+    rows = send_query_to_resource_graph(token, query, [tenant_root_management_group])
+
+    if rows is None:
+        print('FATAL ERROR - The assigned Azure role definition Ids could not be retrieved from Azure Resource Graph.')
         exit()
- 
-    assignment_responses = sum([response['content']['value'] for response in http_responses], [])
-    role_definition_ids = [response['properties']['roleDefinitionId'] for response in assignment_responses]    
+
     unique_role_ids = set()
-    unique_role_definition_ids = [role_definition_id for role_definition_id in role_definition_ids if role_definition_id.split("/")[-1] not in unique_role_ids and not unique_role_ids.add(role_definition_id.split("/")[-1])]
+    unique_role_definition_ids = []
+
+    for row in rows:
+        role_definition_id = row['roleDefinitionId']
+        role_id = role_definition_id.split("/")[-1].lower()
+
+        if role_id not in unique_role_ids:
+            unique_role_ids.add(role_id)
+            unique_role_definition_ids.append(role_definition_id)
 
     return unique_role_definition_ids
 
 
-def get_role_definition_id_of_eligible_azure_roles_within_scope_from_arm(token, scope):
+def get_role_definition_id_of_azure_roles_at_and_below_scope_from_arm(token, scope, assignment_types):
     """
-        Retrieves the definition Id of all eligible Azure roles within the passed scope.
+        Retrieves the definition Id of all Azure roles assigned at and below the passed top-level scopes.
 
         Note:
-            Uses PIM endpoints, which requires an Entra Premium 2 license 
+            Listing the assignments of a subscription without the atScope() filter returns the assignments of all its resource groups 
+            and resources. Combined with the listing of each management group, this covers the entire tenant with one request per
+            top-level scope, instead of one request per resource. Assignments returned by several scopes are deduplicated locally.
+            When several types of assignments are retrieved, their requests are interleaved in a single batch stream.
 
         Args:
             token(str): a valid access token for ARM
-            scope(list(str)): list of resource Ids to check for existing role assignments
+            scope(list(str)): list of resource Ids of management groups and subscriptions to check for existing role assignments
+            assignment_types(list(str)): the types of assignments to retrieve (accepted values: 'assigned', 'active', 'eligible')
 
         Returns:
             list(str): list of role definition Ids
 
     """
+    assignment_endpoints = {
+        'assigned': 'roleAssignments?api-version=2022-04-01',
+        'active': 'roleAssignmentScheduleInstances?api-version=2020-10-01',
+        'eligible': 'roleEligibilityScheduleInstances?api-version=2020-10-01'
+    }
+    assignment_types = [assignment_type.lower() for assignment_type in assignment_types]
+
+    if not assignment_types or any(assignment_type not in assignment_endpoints for assignment_type in assignment_types):
+        print ('FATAL ERROR - Improper use of function: the value of the assignment_types parameter is invalid. Accepted values are: assigned, active, eligible')
+        exit()
+
     batch_requests = []
 
     for resource_id in scope:
-        batch_requests.append({
-            "httpMethod": "GET",
-            "name": str(uuid.uuid4()),
-            "url": f"https://management.azure.com{resource_id}/providers/Microsoft.Authorization/roleEligibilityScheduleInstances?api-version=2020-10-01&$filter=atScope()"
-        })
+        for assignment_type in assignment_types:
+            batch_requests.append({
+                "httpMethod": "GET",
+                "name": str(uuid.uuid4()),
+                "url": f"{ARM_BASE_URI}{resource_id}/providers/Microsoft.Authorization/{assignment_endpoints[assignment_type]}"
+            })
 
-    http_responses = send_batch_request_to_arm(token, batch_requests)
+    assignments = stream_paginated_batch_request_to_arm(token, batch_requests)
+    unique_role_definition_ids = get_unique_role_definition_ids_from_assignments(assignments)
 
-    if http_responses is None:
-        print('FATAL ERROR - The eligible Azure role definition Ids could not be retrieved from ARM.')
+    if unique_role_definition_ids is None:
+        print(f"FATAL ERROR - The {' and '.join(assignment_types)} Azure role definition Ids could not be retrieved from ARM.")
         exit()
- 
-    assignment_responses = sum([response['content']['value'] for response in http_responses], [])
-    role_definition_ids = [response['properties']['roleDefinitionId'] for response in assignment_responses]
-    unique_role_ids = set()
-    unique_role_definition_ids = [role_definition_id for role_definition_id in role_definition_ids if role_definition_id.split("/")[-1] not in unique_role_ids and not unique_role_ids.add(role_definition_id.split("/")[-1])]
 
     return unique_role_definition_ids
 
@@ -374,7 +421,7 @@ def get_all_azure_role_definitions_from_arm(token, role_definition_ids):
         batch_requests.append({
             "httpMethod": "GET",
             "name": str(uuid.uuid4()),
-            "url": f"https://management.azure.com{role_definition_id}?api-version=2022-04-01"
+            "url": f"{ARM_BASE_URI}{role_definition_id}?api-version=2022-04-01"
         })
 
     http_responses = send_batch_request_to_arm(token, batch_requests)
@@ -397,74 +444,195 @@ def get_all_azure_role_definitions_from_arm(token, role_definition_ids):
     return all_role_definitions
 
 
-def get_built_in_azure_role_definitions_from_arm(token, role_definition_ids):
+def get_all_built_in_azure_role_definitions_from_arm(token):
     """
-        Retrieves the definition of all built-in Azure roles with the passed definition Ids.
-        Note: 
-        
+        Retrieves all built-in Azure role definitions from ARM, using a paginated listing.
+
         Args:
-            str: a valid access token for ARM
-            role_definition_ids(list): list of role definition Ids to check for existing role assignments
+            token(str): a valid access token for ARM
 
         Returns:
-            list(str): list of resource Ids for all scopes that the token has access to
+            list(dict): list of built-in role definitions
+
+    """
+    all_role_definitions = []
+    endpoint = f"{ARM_BASE_URI}/providers/Microsoft.Authorization/roleDefinitions?$filter=type eq 'BuiltInRole'&api-version=2022-04-01"
+    headers = {'Authorization': f"Bearer {token}"}
+    role_definition_responses = send_paginated_request(endpoint, headers)
+
+    if role_definition_responses is None:
+        print('FATAL ERROR - The built-in Azure role definitions could not be retrieved from ARM.')
+        exit()
+
+    for role_definition_response in role_definition_responses:
+        all_role_definitions.append({
+            'roleDefinitionId': role_definition_response['id'],
+            'roleId': role_definition_response['name'],
+            'roleName': role_definition_response['properties']['roleName'],
+            'roleType': role_definition_response['properties']['type'],
+            'roleDescription': role_definition_response['properties']['description']
+        })
+
+    return all_role_definitions
+
+
+def read_role_definition_catalog(catalog_file):
+    """
+        Retrieves the local catalog of Azure role definitions. 
+        An empty catalog is returned if the catalog does not exist yet or cannot be read, as the catalog is only used as a cache.
+
+        Args:
+            catalog_file(str): path to the local JSON file holding the catalog
 
         Returns:
-            list(str): list of custom role definitions
+            dict: the catalog, with the following properties:
+                - seededOn: the time at which the catalog was last seeded with all built-in role definitions (seconds since epoch)
+                - roleDefinitions: dict mapping the GUID of each role definition to its definition and retrieval time ('retrievedOn')
+
+    """
+    empty_catalog = { 'seededOn': 0, 'roleDefinitions': {} }
+
+    try:
+        with open(catalog_file, 'r', encoding = 'utf-8') as file:
+            catalog = json.load(file)
+
+        if not isinstance(catalog, dict) or not isinstance(catalog.get('roleDefinitions'), dict):
+            return empty_catalog
+
+        return catalog
+    except Exception:
+        return empty_catalog
+
 
+def update_role_definition_catalog(catalog_file, catalog):
     """
-    all_role_definitions = get_all_azure_role_definitions_from_arm(token, role_definition_ids)
-    built_in_role_definitions = [definition for definition in all_role_definitions if definition['roleType'] == 'BuiltInRole']
+        Updates the local catalog of Azure role definitions with the passed catalog.
+        The passed catalog is merged into the catalog on disk while holding a lock file, so that the scans of several tenants 
+        running in parallel (see the multi-tenant mode) do not overwrite the role definitions retrieved by each other.
+        The most recently retrieved definition of each role is kept.
+        Failing to update the catalog is not fatal, as the catalog is only used as a cache.
+
+        Args:
+            catalog_file(str): path to the local JSON file holding the catalog
+            catalog(dict): the catalog to save
+
+    """
+    try:
+        os.makedirs(os.path.dirname(catalog_file), exist_ok = True)
 
-    return built_in_role_definitions
+        with open(f"{catalog_file}.lock", 'w') as lock_file:
+            # The lock is released when the lock file is closed
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            stored_catalog = read_role_definition_catalog(catalog_file)
+            stored_role_definitions = stored_catalog['roleDefinitions']
 
+            for role_guid, role_definition in catalog['roleDefinitions'].items():
+                stored_role_definition = stored_role_definitions.get(role_guid)
 
-def deprecated_get_assigned_azure_role_definitions_from_arm(token):
+                if stored_role_definition is None or stored_role_definition.get('retrievedOn', 0) <= role_definition.get('retrievedOn', 0):
+                    stored_role_definitions[role_guid] = role_definition
+
+            stored_catalog['seededOn'] = max(stored_catalog.get('seededOn', 0), catalog.get('seededOn', 0))
+            write_file_if_changed(catalog_file, json.dumps(stored_catalog))
+    except Exception:
+        print('WARNING - The local catalog of Azure role definitions could not be updated.')
+
+
+def get_azure_role_definitions_from_catalog(token, role_definition_ids, catalog_file, catalog_ttl_hours):
     """
-        Retrieves all Azure role definitions from ARM that are currently in use in the tenant, with the following properties:
-            - roleDefinitionId
-            - roleId
-            - roleName
-            - roleType
-            - roleDescription
+        Retrieves the definition of all built-in and custom Azure roles with the passed definition Ids, using a local catalog of role 
+        definitions keyed by GUID. 
+        
+        When the catalog has not been seeded within its time to live, it is seeded in bulk with all built-in role definitions.
+        ARM is then only queried for role definitions that are unknown to the catalog or have expired (typically custom roles).
 
         Args:
             token(str): a valid access token for ARM
+            role_definition_ids(list(str)): list of role definition Ids to retrieve
+            catalog_file(str): path to the local JSON file holding the catalog
+            catalog_ttl_hours(int): time to live of the role definitions in the catalog, in hours
 
         Returns:
-            list(str): list of role definitions
+            list(dict): list of role definitions
 
     """
-    endpoint = 'https://management.azure.com/providers/Microsoft.ResourceGraph/resources?api-version=2024-04-01'
-    headers = {'Authorization': f"Bearer {token}"}
-    body = { 
-        'query': """authorizationresources 
-        | where type == 'microsoft.authorization/roledefinitions' 
-        | extend roleDefinitionId = tostring(id)
-        | extend roleId = tostring(name)
-        | extend roleName = tostring(properties['roleName'])
-        | extend roleType = tostring(properties['type'])
-        | extend roleDescription = tostring(properties['description'])
-        | project roleDefinitionId, roleId, roleName, roleType, roleDescription
-        | join kind=inner (
-            authorizationresources 
-            | where type == 'microsoft.authorization/roleassignments' 
-            | extend roleDefinitionId = tostring(properties['roleDefinitionId']) 
-            | project roleDefinitionId
-        ) on roleDefinitionId
-        | summarize by roleDefinitionId, roleId, roleName, roleType, roleDescription
-        | order by ['roleName'] asc"""
-    }
-    response = requests.post(endpoint, headers = headers, json = body)
+    if catalog_ttl_hours <= 0:
+        # The catalog is disabled
+        return get_all_azure_role_definitions_from_arm(token, role_definition_ids)
 
-    if response.status_code != 200:
-        print('FATAL ERROR - The Azure role definitions could not be retrieved from ARM.')
-        exit()
+    now = time.time()
+    catalog_ttl_seconds = catalog_ttl_hours * 3600
+    catalog = read_role_definition_catalog(catalog_file)
+    cached_role_definitions = catalog['roleDefinitions']
+    is_catalog_updated = False
+
+    def is_role_definition_cached(role_guid):
+        cached_role_definition = cached_role_definitions.get(role_guid)
+        return cached_role_definition is not None and now - cached_role_definition.get('retrievedOn', 0) < catalog_ttl_seconds
+
+    role_guids = [role_definition_id.split('/')[-1].lower() for role_definition_id in role_definition_ids]
+    is_seeding_required = now - catalog.get('seededOn', 0) >= catalog_ttl_seconds
+
+    if is_seeding_required and not all(is_role_definition_cached(role_guid) for role_guid in role_guids):
+        # Seed the catalog with all built-in role definitions
+        for role_definition in get_all_built_in_azure_role_definitions_from_arm(token):
+            cached_role_definitions[role_definition['roleId'].lower()] = dict(role_definition, retrievedOn = now)
+
+        catalog['seededOn'] = now
+        is_catalog_updated = True
+
+    # Retrieve unknown and expired role definitions from ARM
+    missing_role_definition_ids = [role_definition_id for role_definition_id, role_guid in zip(role_definition_ids, role_guids) if not is_role_definition_cached(role_guid)]
+
+    if missing_role_definition_ids:
+        for role_definition in get_all_azure_role_definitions_from_arm(token, missing_role_definition_ids):
+            cached_role_definitions[role_definition['roleId'].lower()] = dict(role_definition, retrievedOn = now)
+
+        is_catalog_updated = True
+
+    if is_catalog_updated:
+        update_role_definition_catalog(catalog_file, catalog)
+
+    role_definitions = []
+
+    for role_guid in dict.fromkeys(role_guids):
+        if is_role_definition_cached(role_guid):
+            role_definition = dict(cached_role_definitions[role_guid])
+            role_definition.pop('retrievedOn')
+            role_definitions.append(role_definition)
 
-    role_definitions = response.json()['data']
     return role_definitions
 
 
+def seed_role_definition_catalog(token, catalog_file, catalog_ttl_hours):
+    """
+        Seeds the local catalog of Azure role definitions with all built-in role definitions, unless it has been seeded within its 
+        time to live. This allows built-in role definitions to be retrieved once, before the catalog is shared by the scans of 
+        several tenants.
+
+        Args:
+            token(str): a valid access token for ARM
+            catalog_file(str): path to the local JSON file holding the catalog
+            catalog_ttl_hours(int): time to live of the role definitions in the catalog, in hours
+
+    """
+    if catalog_ttl_hours <= 0:
+        # The catalog is disabled
+        return
+
+    now = time.time()
+    catalog = read_role_definition_catalog(catalog_file)
+
+    if now - catalog.get('seededOn', 0) < catalog_ttl_hours * 3600:
+        return
+
+    for role_definition in get_all_built_in_azure_role_definitions_from_arm(token):
+        catalog['roleDefinitions'][role_definition['roleId'].lower()] = dict(role_definition, retrievedOn = now)
+
+    catalog['seededOn'] = now
+    update_role_definition_catalog(catalog_file, catalog)
+
+
 def get_custom_azure_role_definitions_from_arm(token):
     """
         Retrieves all custom Azure role definitions from ARM.
@@ -476,21 +644,21 @@ def get_custom_azure_role_definitions_from_arm(token):
             list(str): list of custom role definitions
 
     """
-    endpoint = "https://management.azure.com/providers/Microsoft.Authorization/roleDefinitions?$filter=type+eq+'CustomRole'&api-version=2022-04-01"
+    endpoint = f"{ARM_BASE_URI}/providers/Microsoft.Authorization/roleDefinitions?$filter=type+eq+'CustomRole'&api-version=2022-04-01"
     headers = {'Authorization': f"Bearer {token}"}
-    response = requests.get(endpoint, headers = headers)
+    custom_role_definitions = send_paginated_request(endpoint, headers)
 
-    if response.status_code != 200:
+    if custom_role_definitions is None:
         print('FATAL ERROR - The custom Azure roles could not be retrieved from ARM.')
         exit()
 
-    response_content = response.json()['value']
-    return response_content
+    return custom_role_definitions
 
 
 def get_custom_entra_role_definitions_from_graph(token):
     """
         Retrieves all custom Entra role definitions from MS Graph.
+        Only the properties used by AzTierWatcher are retrieved.
 
         Args:
             str: a valid access token for MS Graph
@@ -499,77 +667,188 @@ def get_custom_entra_role_definitions_from_graph(token):
             list(str): list of custom role definitions
 
     """
-    endpoint = 'https://graph.microsoft.com/v1.0/roleManagement/directory/roleDefinitions?$filter=isBuiltIn eq false'
-    headers = {'Authorization': f"Bearer {token}"}
-    response = requests.get(endpoint, headers = headers)
+    batch_requests = [
+        {
+            'id': 'customEntraRoles',
+            'url': '/roleManagement/directory/roleDefinitions?$filter=isBuiltIn eq false&$select=id,displayName,description'
+        }
+    ]
+    http_responses = send_batch_request_to_graph(token, batch_requests)
 
-    if response.status_code != 200:
+    if http_responses is None:
         print('FATAL ERROR - The custom Entra roles could not be retrieved from Graph.')
         exit()
 
-    response_content = response.json()['value']
+    response_content = http_responses['customEntraRoles']['value']
     return response_content
 
 
-def find_added_assets(extended_assets, base_assets):
+def date_added_assets(added_assets, base_assets):
     """
-        Compares a base list with a list of extended assets, to determine the assets that have been added to the extended list.
+        Enriches the passed added assets with the current date, while skipping those whose name is already used by a tiered base asset.
 
         Args:
-            extended_assets(list): list of extended assets, whose length is equal or greater than the base list
-            base_assets(list): list of base assets to compare with
+            added_assets(list(dict(str:str))): list of added assets to enrich
+            base_assets(list(dict(str:str))): list of base assets to compare with
 
         Returns:
-            list(): list of added assets
+            list(dict(str:str)): list of dated assets
 
     """
-    added_assets = []
-    extended_asset_names = [asset['name'] for asset in extended_assets]
-    extended_asset_ids = [asset['id'] for asset in extended_assets]
-    base_asset_ids = [asset['id'] for asset in base_assets]
-    added_asset_ids = [asset_id for asset_id in extended_asset_ids if asset_id not in base_asset_ids]
+    dated_assets = []
+    base_asset_names = set(asset['assetName'] for asset in base_assets)
+    now = datetime.datetime.now()
+    date = now.strftime("%Y-%m-%d")
 
-    if added_asset_ids:
-        now = datetime.datetime.now()
-        date = now.strftime("%Y-%m-%d")
+    for added_asset in added_assets:
+        if added_asset['name'] not in base_asset_names:
+            dated_asset = { 'date': date }
+            dated_asset.update(added_asset)
+            dated_assets.append(dated_asset)
 
-        for added_asset_id in added_asset_ids:
-            added_asset = [asset for asset in extended_assets if asset['id'] == added_asset_id][0]
+    return dated_assets
 
-            if added_asset['name'] not in extended_asset_names:
-                enriched_asset = { 'date': date }
-                enriched_asset.update(added_asset)
-                added_assets.append(enriched_asset)
 
-    return added_assets
+def get_azure_roles_from_arm(token, azure_discovery_mode, catalog_file, catalog_ttl_hours):
+    """
+        Retrieves all built-in Azure roles in use and all custom Azure roles in the tenant.
+        Roles in use are those with an active, eligible or permanent assignment, discovered according to the passed mode.
 
+        Args:
+            token(str): a valid access token for ARM
+            azure_discovery_mode(str): how role assignments are discovered (accepted values: 'scopes', 'subscriptions', 'resourcegraph')
+            catalog_file(str): path to the local catalog of Azure role definitions
+            catalog_ttl_hours(int): number of hours during which role definitions are reused from the catalog
+
+        Returns:
+            list(dict): list of Azure roles, with their id, type, name, description and link
 
-def find_removed_assets(extended_assets, base_assets):
     """
-        Compares a base list with a list of extended assets, to determine the assets that have been removed from the based list.
+    arm_role_template_base_uri = f"{ARM_BASE_URI}/providers/Microsoft.Authorization/roleDefinitions/"
+    arm_role_template_api_version = '2022-04-01'
+
+    # Get built-in Azure roles in use
+    built_in_azure_roles_in_use = []
+    is_pim_enabled = is_pim_enabled_for_arm(token)
+
+    if is_pim_enabled:
+        # Get active + eligible roles
+        if azure_discovery_mode == 'scopes':
+            # Scopes flow into a single stream of active and eligible assignment queries as soon as they are discovered
+            azure_scope_resource_ids = stream_resource_id_of_all_scopes_from_arm(token)
+            all_azure_role_ids_in_use = get_role_definition_id_of_active_and_eligible_azure_roles_within_scope_from_arm(token, azure_scope_resource_ids)
+        else:
+            mg_resource_ids, subscription_resource_ids = get_resource_id_of_top_level_scopes_from_arm(token)
+            azure_scope_resource_ids = mg_resource_ids + subscription_resource_ids
+
+            if azure_discovery_mode == 'resourcegraph':
+                active_azure_role_ids = get_role_definition_id_of_assigned_azure_roles_from_resource_graph(token)
+                eligible_azure_role_ids = get_role_definition_id_of_azure_roles_at_and_below_scope_from_arm(token, azure_scope_resource_ids, ['eligible'])
+                all_azure_role_ids_in_use = active_azure_role_ids + eligible_azure_role_ids
+            else:
+                all_azure_role_ids_in_use = get_role_definition_id_of_azure_roles_at_and_below_scope_from_arm(token, azure_scope_resource_ids, ['active', 'eligible'])
+
+        all_azure_role_definitions_in_use = get_azure_role_definitions_from_catalog(token, all_azure_role_ids_in_use, catalog_file, catalog_ttl_hours)
+        built_in_azure_role_definitions_in_use = [definition for definition in all_azure_role_definitions_in_use if definition['roleType'] == 'BuiltInRole']
+
+        for built_in_azure_role_definition in built_in_azure_role_definitions_in_use:
+            azure_role_type = 'Built-in' if built_in_azure_role_definition['roleType'] == 'BuiltInRole' else 'Custom'
+            built_in_azure_roles_in_use.append({
+                'id': built_in_azure_role_definition['roleId'],
+                'type': azure_role_type,
+                'name': built_in_azure_role_definition['roleName'],
+                'description': built_in_azure_role_definition['roleDescription'],
+                'link': f"{arm_role_template_base_uri}{built_in_azure_role_definition['roleId']}?api-version={arm_role_template_api_version}"   
+            })
+    else:
+        # Get permanently assigned roles
+        if azure_discovery_mode == 'resourcegraph':
+            assigned_azure_role_ids = get_role_definition_id_of_assigned_azure_roles_from_resource_graph(token)
+        elif azure_discovery_mode == 'subscriptions':
+            mg_resource_ids, subscription_resource_ids = get_resource_id_of_top_level_scopes_from_arm(token)
+            azure_scope_resource_ids = mg_resource_ids + subscription_resource_ids
+            assigned_azure_role_ids = get_role_definition_id_of_azure_roles_at_and_below_scope_from_arm(token, azure_scope_resource_ids, ['assigned'])
+        else:
+            # Scopes flow into assignment queries as soon as they are discovered
+            azure_scope_resource_ids = stream_resource_id_of_all_scopes_from_arm(token)
+            assigned_azure_role_ids = get_role_definition_id_of_assigned_azure_roles_within_scope_from_arm(token, azure_scope_resource_ids)
+
+        all_azure_role_definitions_in_use = get_azure_role_definitions_from_catalog(token, assigned_azure_role_ids, catalog_file, catalog_ttl_hours)
+
+        for azure_role_definition in all_azure_role_definitions_in_use:
+            azure_role_type = 'Built-in' if azure_role_definition['roleType'] == 'BuiltInRole' else 'Custom'
+            built_in_azure_roles_in_use.append({
+                'id': azure_role_definition['roleId'],
+                'type': azure_role_type,
+                'name': azure_role_definition['roleName'],
+                'description': azure_role_definition['roleDescription'],
+                'link': f"{arm_role_template_base_uri}{azure_role_definition['roleId']}?api-version={arm_role_template_api_version}"   
+            })
+
+    # Get custom Azure roles
+    custom_azure_roles = []
+    custom_azure_role_definitions = get_custom_azure_role_definitions_from_arm(token)
+
+    for custom_azure_role_definition in custom_azure_role_definitions:
+        custom_azure_roles.append({
+            'id': custom_azure_role_definition['name'],
+            'type': 'Custom',
+            'name': custom_azure_role_definition['properties']['roleName'],
+            'description': custom_azure_role_definition['properties']['description'],
+            'link': f"{arm_role_template_base_uri}{custom_azure_role_definition['name']}?api-version={arm_role_template_api_version}"   
+        })
+
+    # Merge all custom + built-in Azure roles in use
+    azure_roles = built_in_azure_roles_in_use + custom_azure_roles
+    return azure_roles
+
+
+def get_custom_entra_roles_from_graph(token):
+    """
+        Retrieves all custom Entra roles in the tenant.
 
         Args:
-            extended_assets(list): list of extended assets, whose length is equal or greater than the base list
-            base_assets(list): list of base assets to compare with
-        
+            token(str): a valid access token for MS Graph
+
         Returns:
-            list(): list of removed assets
-            
+            list(dict): list of custom Entra roles, with their id, type, name, description and link
+
     """
-    removed_assets = []
-    extended_asset_ids = [asset['id'] for asset in extended_assets]
-    base_asset_ids = [asset['id'] for asset in base_assets]
-    removed_asset_ids = [asset_id for asset_id in base_asset_ids if asset_id not in extended_asset_ids]
+    graph_role_template_base_uri = f"{MSGRAPH_BASE_URI}/v1.0/roleManagement/directory/roleDefinitions/"
+    custom_entra_roles = []
+    custom_entra_role_definitions = get_custom_entra_role_definitions_from_graph(token)
 
-    if removed_asset_ids:
-        now = datetime.datetime.now()
-        date = now.strftime("%Y-%m-%d")
+    for custom_entra_role_definition in custom_entra_role_definitions:
+        custom_entra_roles.append({
+            'id': custom_entra_role_definition['id'],
+            'type': 'Custom',
+            'name': custom_entra_role_definition['displayName'],
+            'description': custom_entra_role_definition['description'],
+            'link': f"{graph_role_template_base_uri}{custom_entra_role_definition['id']}"
+        })
+
+    return custom_entra_roles
+
+
+def find_untiered_assets(assets, tiered_assets):
+    """
+        Compares the passed assets from the tenant with the tiered ones, to determine the assets that are untiered and 
+        the tiered custom assets that do not exist anymore.
+
+        Args:
+            assets(list(dict(str:str))): list of assets from the tenant
+            tiered_assets(list(dict(str:str))): list of tiered assets to compare with
 
-        for removed_asset_id in removed_asset_ids:
-            asset = [asset for asset in base_assets if asset['id'] == removed_asset_id][0]
-            removed_assets.append(asset)
+        Returns:
+            list(dict(str:str)): list of untiered assets, dated and sorted by name
+            set(str): set of Ids of the tiered custom assets that have been removed from the tenant
+
+    """
+    added_assets, removed_assets, _ = diff_assets(assets, tiered_assets)
+    untiered_assets = sorted(date_added_assets(added_assets, tiered_assets), key=lambda x: x['name'])
+    removed_custom_asset_ids = set(asset['id'] for asset in removed_assets if asset['assetType'] == 'Custom')
 
-    return removed_assets
+    return untiered_assets, removed_custom_asset_ids
 
 
 def read_json_file(json_file):
@@ -613,13 +892,84 @@ def update_tiered_assets(tiered_json_file, tiered_assets):
 
     """
     try:
-        with open(tiered_json_file, 'w') as file:
-            file.write(json.dumps(tiered_assets, indent = 4))
+        write_file_if_changed(tiered_json_file, json.dumps(tiered_assets, indent = 4))
     except FileNotFoundError:
         print('FATAL ERROR - The tiered file could not be updated.')
         exit()
 
 
+def index_untiered_assets(untiered_md_content):
+    """
+        Indexes the assets already listed in the passed content of a Markdown file providing an overview of untiered roles,
+        in a single pass over its lines. Assets are indexed by the definition Id located in their hyperlink, or by their name 
+        if the hyperlink does not contain any.
+
+        Args:
+            untiered_md_content(str): the content of the Markdown file with untiered roles
+
+        Returns:
+            tuple(set(str), set(str), int): the Ids of the listed assets, the names of the listed assets without Id, and the 
+            position in the content after which new rows are inserted (i.e. the end of the last table header)
+
+    """
+    untiered_asset_ids = set()
+    untiered_asset_names = set()
+    insert_position = len(untiered_md_content.rstrip('\n'))
+    position = 0
+
+    for line in untiered_md_content.splitlines(True):
+        row = line.rstrip('\r\n')
+
+        if row.startswith('|---'):
+            insert_position = position + len(row)
+        elif row.startswith('| '):
+            asset_match = UNTIERED_ROW_ASSET_PATTERN.match(row)
+
+            if asset_match and asset_match.group(2):
+                untiered_asset_ids.add(asset_match.group(2).lower())
+            elif asset_match:
+                untiered_asset_names.add(asset_match.group(1))
+
+        position += len(line)
+
+    return untiered_asset_ids, untiered_asset_names, insert_position
+
+
+def render_untiered_assets(untiered_md_content, added_assets):
+    """
+        Renders the passed administrative assets into the passed content of a Markdown file providing an overview of untiered roles.
+        Assets that have already been detected as untiered are skipped.
+
+        Args:
+            untiered_md_content(str): the current content of the Markdown file with untiered roles
+            added_assets(list(dict)): the assets to be added to the untiered file
+
+        Returns:
+            str: the updated content of the Markdown file, or None if all the passed assets have been detected as untiered before
+    """
+    untiered_asset_ids, untiered_asset_names, insert_position = index_untiered_assets(untiered_md_content)
+    new_lines = []
+
+    for asset in added_assets:
+        asset_id = asset['id'].lower()
+
+        if asset_id in untiered_asset_ids or asset['name'] in untiered_asset_names:
+            continue
+
+        untiered_asset_ids.add(asset_id)
+        date = asset['date']
+        name = f"[{asset['name']}]({asset['link']})"
+        type = asset['type']
+        description = asset['description']
+        line = f"\n| {date} | {name} | {type} | {description} |"
+        new_lines.append(line)
+
+    if not new_lines:
+        return None
+
+    return untiered_md_content[:insert_position] + ''.join(new_lines) + untiered_md_content[insert_position:]
+
+
 def update_untiered_assets(untiered_md_file, added_assets):
     """
         Updates the passed file providing an overview of untiered roles with the passed administrative assets.
@@ -632,71 +982,243 @@ def update_untiered_assets(untiered_md_file, added_assets):
             bool: True if at least one of the passed assets has not been detected as untiered before, False otherwise
     """
     try:
-        page_metadata_content = ''
-        additions_content = ''
-
         with open(untiered_md_file, 'r', encoding = 'utf-8') as file:
             file_content = file.read()
-            splitter = '##' 
-            splitted_content = file_content.split(splitter)
-            page_metadata_content = splitted_content[0]
-            additions_content = splitter + splitted_content[1]
-
-        # Add to untiered additions
-        are_new_assets_untiered = False
-        updated_additions_content = ''
-        new_additions_content = ''
-        splitter = '---|'
-        splitted_additions_content = additions_content.rsplit(splitter, 1)
-        additions_metadata_content = splitted_additions_content[0] + splitter
-        current_additions_content = splitted_additions_content[1]
-        current_additions_assets = set(current_additions_content.split('\n|')[1:])
-        assets_to_add = [asset for asset in added_assets if (str(current_additions_assets).find(asset['name']) == -1)]
-
-        for asset in assets_to_add:
-            date = asset['date']
-            name = f"[{asset['name']}]({asset['link']})"
-            type = asset['type']
-            description = asset['description']
-            line = f"\n| {date} | {name} | {type} | {description} |"
-            new_additions_content += line
-
-        if new_additions_content:
-            # Update the untiered file with the new content
-            are_new_assets_untiered = True
-            updated_additions_content = additions_metadata_content + new_additions_content + current_additions_content
-            updated_content = page_metadata_content + updated_additions_content
-            with open(untiered_md_file, 'w', encoding = 'utf-8') as file:
-                file.write(updated_content)
-
-        return are_new_assets_untiered
+
+        updated_content = render_untiered_assets(file_content, added_assets)
+
+        if updated_content is None:
+            return False
+
+        # Update the untiered file with the new content
+        return write_file_if_changed(untiered_md_file, updated_content)
     except FileNotFoundError:
         print('FATAL ERROR - The untiered file could not be updated.')
         exit()
 
 
-if __name__ == "__main__":
-    # Get ARM and MS Graph access tokens from environment variables
-    arm_access_token = os.environ['ARM_ACCESS_TOKEN']
-    graph_access_token = os.environ['MSGRAPH_ACCESS_TOKEN']
+def create_untiered_report(untiered_md_file, template_md_file):
+    """
+        Creates the passed Markdown file providing an overview of the untiered roles of a single tenant, unless it already exists.
+        The new file contains the text and table header of the passed template, without the assets listed in the template.
 
-    if not arm_access_token:
-        print('FATAL ERROR - A valid access token for ARM is required.')
+        Args:
+            untiered_md_file(str): the local Markdown file with the untiered roles of the tenant
+            template_md_file(str): the local Markdown file with untiered roles used as a template
+
+    """
+    if os.path.exists(untiered_md_file):
+        return
+
+    try:
+        with open(template_md_file, 'r', encoding = 'utf-8') as file:
+            template_content = file.read()
+
+        _, _, insert_position = index_untiered_assets(template_content)
+        os.makedirs(os.path.dirname(untiered_md_file), exist_ok = True)
+        write_file_if_changed(untiered_md_file, template_content[:insert_position] + '\n')
+    except FileNotFoundError:
+        print('FATAL ERROR - The untiered file of the tenant could not be created.')
         exit()
 
-    if not graph_access_token:
-        print('FATAL ERROR - A valid access token for MS Graph is required.')
+
+def read_tenant_manifest(manifest_file):
+    """
+        Retrieves the tenants to scan in multi-tenant mode from the passed manifest file.
+        The manifest is a JSON list with one entry per tenant, providing the ARM and MS Graph access tokens of the tenant either 
+        directly ('armAccessToken', 'msgraphAccessToken') or as paths to files containing them ('armAccessTokenFile', 
+        'msgraphAccessTokenFile'), relative to the manifest. Each tenant is named after its optional 'name', or its tenant Id.
+
+        Args:
+            manifest_file(str): path to the local JSON manifest
+
+        Returns:
+            list(dict): list of tenants, with their name, ARM access token and MS Graph access token
+
+    """
+    manifest_dir = os.path.dirname(os.path.abspath(manifest_file))
+    tenants = []
+
+    def get_token(entry, token_name):
+        if entry.get(token_name):
+            return entry[token_name]
+
+        with open(os.path.join(manifest_dir, entry[f"{token_name}File"]), 'r', encoding = 'utf-8') as file:
+            return file.read().strip()
+
+    try:
+        with open(manifest_file, 'r', encoding = 'utf-8') as file:
+            manifest = json.load(file)
+
+        for entry in manifest:
+            arm_access_token = get_token(entry, 'armAccessToken')
+            graph_access_token = get_token(entry, 'msgraphAccessToken')
+            tenants.append({
+                'name': str(entry.get('name') or get_tenant_id_from_token(arm_access_token)),
+                'armAccessToken': arm_access_token,
+                'msgraphAccessToken': graph_access_token
+            })
+    except Exception:
+        print('FATAL ERROR - The tenant manifest could not be retrieved.')
         exit()
 
-    # Set Microsoft APIs info
-    arm_role_template_base_uri = 'https://management.azure.com/providers/Microsoft.Authorization/roleDefinitions/'
-    graph_role_template_base_uri = 'https://graph.microsoft.com/v1.0/roleManagement/directory/roleDefinitions/'
-    arm_role_template_api_version = '2022-04-01'
+    tenant_names = [tenant['name'] for tenant in tenants]
+
+    if not tenants or len(set(tenant_names)) != len(tenant_names):
+        print('FATAL ERROR - The tenant manifest must contain at least one tenant, and tenant names must be unique.')
+        exit()
+
+    for tenant_name in tenant_names:
+        if not TENANT_NAME_PATTERN.fullmatch(tenant_name):
+            print(f"FATAL ERROR - The tenant name '{tenant_name}' is invalid. Accepted characters are letters, digits, '.', '_' and '-'")
+            exit()
+
+    return tenants
+
+
+def initialize_tenant_worker(max_concurrent_arm_batches):
+    """
+        Initializes a worker process of the multi-tenant mode, which does not inherit the configuration of the main process 
+        when started with 'spawn' or 'forkserver', and must not share its HTTP connections when started with 'fork'.
+
+        Args:
+            max_concurrent_arm_batches(int): maximum number of batch chunks kept in flight towards ARM by the worker
+
+    """
+    arm.MAX_CONCURRENT_ARM_BATCHES = max_concurrent_arm_batches
+    transport.HTTP_SESSION = transport.create_http_session()
+
+
+def scan_tenant(tenant, scan_settings):
+    """
+        Scans the passed tenant for untiered Azure roles and custom Entra roles, and adds them to the untiered files of the tenant.
+        Runs in a worker process of the multi-tenant mode. As worker processes are reused across tenants, the metrics, throttling 
+        state and checkpoint of the run are reset for each tenant.
+
+        Note:
+            The tiered files are shared by all tenants, so tiered custom roles missing from a single tenant are not removed from them
+
+        Args:
+            tenant(dict): the tenant to scan, with its name, ARM access token and MS Graph access token
+            scan_settings(dict): the settings shared by the scans of all tenants (see the multi-tenant mode in main)
+
+        Returns:
+            dict: whether untiered Azure roles ('haveAzureRolesBeenAdded') and custom Entra roles ('haveCustomEntraRolesBeenAdded') 
+            have been detected in the tenant
+
+    """
+    RUN_METRICS.reset()
+    ARM_THROTTLE_SCHEDULER.reset()
+
+    tenant_name = tenant['name']
+    tenant_dir = f"{scan_settings['tenantsDir']}/{tenant_name}"
+    azure_roles_untiered_file = f"{tenant_dir}/{os.path.basename(scan_settings['azureRolesUntieredFile'])}"
+    entra_roles_untiered_file = f"{tenant_dir}/{os.path.basename(scan_settings['entraRolesUntieredFile'])}"
+    arm_batch_checkpoint_file = f"{scan_settings['cacheDir']}/tenants/{tenant_name}/arm-batch-checkpoint.jsonl"
+    metrics_file = f"{scan_settings['cacheDir']}/metrics/azTierWatcher-{tenant_name}.json"
+
+    try:
+        create_untiered_report(azure_roles_untiered_file, scan_settings['azureRolesUntieredFile'])
+        create_untiered_report(entra_roles_untiered_file, scan_settings['entraRolesUntieredFile'])
+
+        # Get all custom + built-in Azure roles in use
+        ARM_BATCH_CHECKPOINT.open(arm_batch_checkpoint_file, scan_settings['resume'])
+        azure_roles = get_azure_roles_from_arm(tenant['armAccessToken'], scan_settings['azureDiscoveryMode'], scan_settings['catalogFile'], scan_settings['catalogTtlHours'])
+        ARM_BATCH_CHECKPOINT.close()
+
+        # Find untiered Azure roles
+        added_azure_roles, _ = find_untiered_assets(azure_roles, scan_settings['tieredAzureRoles'])
+        have_azure_roles_been_added = update_untiered_assets(azure_roles_untiered_file, added_azure_roles)
+
+        # Find untiered custom Entra roles
+        custom_entra_roles = get_custom_entra_roles_from_graph(tenant['msgraphAccessToken'])
+        tiered_custom_entra_roles = [role for role in scan_settings['tieredEntraRoles'] if role['assetType'] == 'Custom']
+        added_custom_entra_roles, _ = find_untiered_assets(custom_entra_roles, tiered_custom_entra_roles)
+        have_custom_entra_roles_been_added = update_untiered_assets(entra_roles_untiered_file, added_custom_entra_roles)
+    finally:
+        RUN_METRICS.write_summary(metrics_file, f"AzTierWatcher ({tenant_name})")
+
+    return {
+        'haveAzureRolesBeenAdded': have_azure_roles_been_added,
+        'haveCustomEntraRolesBeenAdded': have_custom_entra_roles_been_added
+    }
+
+
+def scan_tenants(tenants, scan_settings, max_concurrent_tenants):
+    """
+        Scans the passed tenants in parallel worker processes, so that the wall time of the run is bounded by the largest tenant 
+        rather than the sum of all tenants, as long as the number of tenants does not exceed the number of workers.
+        A tenant that cannot be scanned does not prevent the other tenants from being scanned.
+
+        Args:
+            tenants(list(dict)): list of tenants to scan, with their name, ARM access token and MS Graph access token
+            scan_settings(dict): the settings shared by the scans of all tenants
+            max_concurrent_tenants(int): maximum number of tenants scanned in parallel
+
+        Returns:
+            list(str): the names of the tenants that could not be scanned
+
+    """
+    failed_tenant_names = []
+    max_workers = min(max_concurrent_tenants, len(tenants))
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers = max_workers, initializer = initialize_tenant_worker, initargs = (arm.MAX_CONCURRENT_ARM_BATCHES,)) as executor:
+        futures = { executor.submit(scan_tenant, tenant, scan_settings): tenant['name'] for tenant in tenants }
+
+        for future in concurrent.futures.as_completed(futures):
+            tenant_name = futures[future]
+
+            try:
+                tenant_result = future.result()
+            except (Exception, SystemExit):
+                # Fatal errors in a worker surface as SystemExit
+                print (f"❗ {tenant_name}: the tenant could not be scanned")
+                failed_tenant_names.append(tenant_name)
+                continue
+
+            if tenant_result['haveAzureRolesBeenAdded']:
+                print (f"➕ {tenant_name} - Azure roles: additions have been detected")
+            else:
+                print (f"➖ {tenant_name} - Azure roles: no changes")
+
+            if tenant_result['haveCustomEntraRolesBeenAdded']:
+                print (f"➕ {tenant_name} - Custom Entra roles: additions have been detected")
+            else:
+                print (f"➖ {tenant_name} - Custom Entra roles: no changes")
+
+    return sorted(failed_tenant_names)
+
+
+if __name__ == "__main__":
+    # Get the manifest of the tenants to scan when running in multi-tenant mode (i.e. '--tenants <manifest file>')
+    tenant_manifest_file = None
+
+    if '--tenants' in sys.argv[1:]:
+        tenant_manifest_option_position = sys.argv.index('--tenants')
+
+        if tenant_manifest_option_position + 1 >= len(sys.argv):
+            print('FATAL ERROR - The path to a tenant manifest is required after --tenants.')
+            exit()
+
+        tenant_manifest_file = sys.argv[tenant_manifest_option_position + 1]
+    else:
+        # Get ARM and MS Graph access tokens from environment variables
+        arm_access_token = os.environ['ARM_ACCESS_TOKEN']
+        graph_access_token = os.environ['MSGRAPH_ACCESS_TOKEN']
+
+        if not arm_access_token:
+            print('FATAL ERROR - A valid access token for ARM is required.')
+            exit()
+
+        if not graph_access_token:
+            print('FATAL ERROR - A valid access token for MS Graph is required.')
+            exit()
 
     # Set local tier files
     github_action_dir_name = '.github'
     absolute_path_to_script = os.path.abspath(sys.argv[0])
     root_dir = absolute_path_to_script.split(github_action_dir_name)[0]
+    config_file = root_dir + 'config.json'
     azure_dir = root_dir + 'Azure roles'
     entra_dir = root_dir + 'Entra roles'
     azure_roles_tier_file = f"{azure_dir}/tiered-azure-roles.json"
@@ -706,74 +1228,106 @@ if __name__ == "__main__":
     azure_roles_untiered_file = f"{azure_dir}/Untiered Azure roles.md"
     entra_roles_untiered_file = f"{entra_dir}/Untiered custom Entra roles.md"
 
+    # Set local directory of the untiered files of each tenant in multi-tenant mode
+    tenants_dir = root_dir + 'Tenants'
+
+    # Set local cache files
+    cache_dir = root_dir + '.cache'
+    azure_role_definition_catalog_file = f"{cache_dir}/azure-role-definitions.json"
+    arm_batch_checkpoint_file = f"{cache_dir}/arm-batch-checkpoint.jsonl"
+    metrics_file = f"{cache_dir}/metrics/azTierWatcher.json"
+
+    # Write the metrics of the run when it ends, including when it fails
+    atexit.register(RUN_METRICS.write_summary, metrics_file, 'AzTierWatcher')
+
+    # Get project configuration from local config file
+    project_config = {}
+    try:
+        with open(config_file, 'r', encoding = 'utf-8') as file:
+            project_config = json.load(file)
+    except Exception:
+        print('FATAL ERROR - The config JSON file could not be retrieved.')
+        exit()
+
+    # Set the number of batch chunks kept in flight towards ARM
+    max_concurrent_arm_batches_config = str(project_config.get('maxConcurrentArmBatches', arm.MAX_CONCURRENT_ARM_BATCHES))
+
+    if not max_concurrent_arm_batches_config.isdigit() or int(max_concurrent_arm_batches_config) < 1:
+        print("FATAL ERROR - The 'maxConcurrentArmBatches' value set in the project's configuration file is invalid. Accepted values are positive integers")
+        exit()
+
+    arm.MAX_CONCURRENT_ARM_BATCHES = int(max_concurrent_arm_batches_config)
+
+    # Set how Azure role assignments are discovered
+    azure_discovery_mode = str(project_config.get('azureDiscoveryMode', 'scopes')).lower()
+    accepted_values = [ 'scopes', 'subscriptions', 'resourcegraph' ]
+
+    if not azure_discovery_mode in accepted_values:
+        print("FATAL ERROR - The 'azureDiscoveryMode' value set in the project's configuration file is invalid. Accepted values are: 'scopes', 'subscriptions', 'resourceGraph'")
+        exit()
+
+    # Set the time to live of the local catalog of Azure role definitions
+    role_definition_cache_ttl_hours_config = str(project_config.get('roleDefinitionCacheTtlHours', 24))
+
+    if not role_definition_cache_ttl_hours_config.isdigit():
+        print("FATAL ERROR - The 'roleDefinitionCacheTtlHours' value set in the project's configuration file is invalid. Accepted values are positive integers or 0 to disable caching")
+        exit()
+
+    role_definition_cache_ttl_hours = int(role_definition_cache_ttl_hours_config)
+
+    # Set the number of tenants scanned in parallel in multi-tenant mode
+    max_concurrent_tenants_config = str(project_config.get('maxConcurrentTenants', MAX_CONCURRENT_TENANTS))
+
+    if not max_concurrent_tenants_config.isdigit() or int(max_concurrent_tenants_config) < 1:
+        print("FATAL ERROR - The 'maxConcurrentTenants' value set in the project's configuration file is invalid. Accepted values are positive integers")
+        exit()
+
+    max_concurrent_tenants = int(max_concurrent_tenants_config)
+
     # Get tiered built-in roles from local files
     tiered_azure_roles = read_json_file(azure_roles_tier_file)
     tiered_entra_roles = read_json_file(entra_roles_tier_file)
 
-    # Get built-in Azure roles in use
-    built_in_azure_roles_in_use = []
-    is_pim_enabled = is_pim_enabled_for_arm(arm_access_token)
-
-    if is_pim_enabled:
-        # Get active + eligible roles
-        azure_scope_resource_ids = get_resource_id_of_all_scopes_from_arm(arm_access_token)
-        active_azure_role_ids = get_role_definition_id_of_active_azure_roles_within_scope_from_arm(arm_access_token, azure_scope_resource_ids)
-        eligible_azure_role_ids = get_role_definition_id_of_eligible_azure_roles_within_scope_from_arm(arm_access_token, azure_scope_resource_ids)
-        all_azure_role_ids_in_use = active_azure_role_ids + eligible_azure_role_ids
-        built_in_azure_role_definitions_in_use = get_built_in_azure_role_definitions_from_arm(arm_access_token, all_azure_role_ids_in_use)
+    if tenant_manifest_file:
+        # Scan the tenants of the manifest in parallel, after seeding the catalog of built-in role definitions they share
+        tenants = read_tenant_manifest(tenant_manifest_file)
+        seed_role_definition_catalog(tenants[0]['armAccessToken'], azure_role_definition_catalog_file, role_definition_cache_ttl_hours)
+
+        scan_settings = {
+            'azureDiscoveryMode': azure_discovery_mode,
+            'catalogFile': azure_role_definition_catalog_file,
+            'catalogTtlHours': role_definition_cache_ttl_hours,
+            'resume': '--resume' in sys.argv[1:],
+            'cacheDir': cache_dir,
+            'tenantsDir': tenants_dir,
+            'azureRolesUntieredFile': azure_roles_untiered_file,
+            'entraRolesUntieredFile': entra_roles_untiered_file,
+            'tieredAzureRoles': tiered_azure_roles,
+            'tieredEntraRoles': tiered_entra_roles
+        }
+        failed_tenant_names = scan_tenants(tenants, scan_settings, max_concurrent_tenants)
 
-        for built_in_azure_role_definition in built_in_azure_role_definitions_in_use:
-            azure_role_type = 'Built-in' if built_in_azure_role_definition['roleType'] == 'BuiltInRole' else 'Custom'
-            built_in_azure_roles_in_use.append({
-                'id': built_in_azure_role_definition['roleId'],
-                'type': azure_role_type,
-                'name': built_in_azure_role_definition['roleName'],
-                'description': built_in_azure_role_definition['roleDescription'],
-                'link': f"{arm_role_template_base_uri}{built_in_azure_role_definition['roleId']}?api-version={arm_role_template_api_version}"   
-            })
-    else:
-        # Get permanently assigned roles
-        azure_scope_resource_ids = get_resource_id_of_all_scopes_from_arm(arm_access_token)
-        assigned_azure_role_ids = get_role_definition_id_of_assigned_azure_roles_within_scope_from_arm(arm_access_token, azure_scope_resource_ids)
-        all_azure_role_definitions_in_use = get_all_azure_role_definitions_from_arm(arm_access_token, assigned_azure_role_ids)
+        if failed_tenant_names:
+            print(f"FATAL ERROR - The following tenants could not be scanned: {', '.join(failed_tenant_names)}")
+            sys.exit(1)
 
-        for azure_role_definition in all_azure_role_definitions_in_use:
-            azure_role_type = 'Built-in' if azure_role_definition['roleType'] == 'BuiltInRole' else 'Custom'
-            built_in_azure_roles_in_use.append({
-                'id': azure_role_definition['roleId'],
-                'type': azure_role_type,
-                'name': azure_role_definition['roleName'],
-                'description': azure_role_definition['roleDescription'],
-                'link': f"{arm_role_template_base_uri}{azure_role_definition['roleId']}?api-version={arm_role_template_api_version}"   
-            })
+        exit()
 
-    # Get custom Azure roles
-    custom_azure_roles = []
-    custom_azure_role_definitions = get_custom_azure_role_definitions_from_arm(arm_access_token)
+    # Record ARM responses, so that a failed run can be resumed with '--resume'
+    ARM_BATCH_CHECKPOINT.open(arm_batch_checkpoint_file, '--resume' in sys.argv[1:])
 
-    for custom_azure_role_definition in custom_azure_role_definitions:
-        custom_azure_roles.append({
-            'id': custom_azure_role_definition['name'],
-            'type': 'Custom',
-            'name': custom_azure_role_definition['properties']['roleName'],
-            'description': custom_azure_role_definition['properties']['description'],
-            'link': f"{arm_role_template_base_uri}{custom_azure_role_definition['name']}?api-version={arm_role_template_api_version}"   
-        })
+    # Get all custom + built-in Azure roles in use
+    azure_roles = get_azure_roles_from_arm(arm_access_token, azure_discovery_mode, azure_role_definition_catalog_file, role_definition_cache_ttl_hours)
 
-    # Merge all custom + built-in Azure roles in use
-    azure_roles = built_in_azure_roles_in_use + custom_azure_roles
+    # All ARM responses have been received
+    ARM_BATCH_CHECKPOINT.close()
 
     # Find untiered Azure roles
-    added_azure_roles = sorted(find_added_assets(azure_roles, tiered_azure_roles), key=lambda x: x['name'])
-    removed_azure_roles = find_removed_assets(azure_roles, tiered_azure_roles)
-    removed_custom_azure_roles = [role for role in removed_azure_roles if role['assetType'] == 'Custom']
-    have_custom_roles_been_removed = True if removed_custom_azure_roles else False
+    added_azure_roles, removed_custom_azure_role_ids = find_untiered_assets(azure_roles, tiered_azure_roles)
+    have_custom_roles_been_removed = True if removed_custom_azure_role_ids else False
 
     if have_custom_roles_been_removed:
-        for removed_custom_role in removed_custom_azure_roles:
-            removed_role_id = removed_custom_role['id']
-            tiered_azure_roles = [role for role in tiered_azure_roles if role['id'] != removed_role_id]
-
+        tiered_azure_roles = [role for role in tiered_azure_roles if role['id'] not in removed_custom_azure_role_ids]
         update_tiered_assets(azure_roles_tier_file, tiered_azure_roles)
 
     have_roles_been_added = update_untiered_assets(azure_roles_untiered_file, added_azure_roles)
@@ -786,29 +1340,15 @@ if __name__ == "__main__":
         print ('➖ Azure roles: no changes')
 
     # Get all custom Entra roles
-    custom_entra_roles = []
-    custom_entra_role_definitions = get_custom_entra_role_definitions_from_graph(graph_access_token)
-
-    for custom_entra_role_definition in custom_entra_role_definitions:
-        custom_entra_roles.append({
-            'id': custom_entra_role_definition['id'],
-            'type': 'Custom',
-            'name': custom_entra_role_definition['displayName'],
-            'description': custom_entra_role_definition['description'],
-            'link': f"{graph_role_template_base_uri}{custom_entra_role_definition['id']}"
-        })
+    custom_entra_roles = get_custom_entra_roles_from_graph(graph_access_token)
 
     # Find untiered custom Entra roles
     tiered_custom_entra_roles = [role for role in tiered_entra_roles if role['assetType'] == 'Custom']
-    added_custom_entra_roles = sorted(find_added_assets(custom_entra_roles, tiered_custom_entra_roles), key=lambda x: x['name'])
-    removed_custom_entra_roles = find_removed_assets(custom_entra_roles, tiered_custom_entra_roles)
-    have_custom_roles_been_removed = True if removed_custom_entra_roles else False
+    added_custom_entra_roles, removed_custom_entra_role_ids = find_untiered_assets(custom_entra_roles, tiered_custom_entra_roles)
+    have_custom_roles_been_removed = True if removed_custom_entra_role_ids else False
 
     if have_custom_roles_been_removed:
-        for removed_role in removed_custom_entra_roles:
-            removed_role_id = removed_role['id']
-            tiered_entra_roles = [role for role in tiered_entra_roles if role['id'] != removed_role_id]
-
+        tiered_entra_roles = [role for role in tiered_entra_roles if role['id'] not in removed_custom_entra_role_ids]
         update_tiered_assets(entra_roles_tier_file, tiered_entra_roles)
 
     have_custom_roles_been_added = update_untiered_assets(entra_roles_untiered_file, added_custom_entra_roles)
@@ -0,0 +1,289 @@
+"""
+    Name: 
+        AzTierPipeline
+        
+    Author: 
+        Emilien Socchi
+
+    Description:  
+        AzTierPipeline runs the following stages in a single process, while sharing one in-memory catalog of tiered assets:
+            1. Synchronization of built-in assets with the upstream Azure Administrative Tiering (AAT) project (AzTierSyncer)
+            2. Conversion of tiered assets from JSON to Markdown (convert-json-to-markdown)
+            3. Conversion of tiered assets from Markdown to JSON, enriched with their definition Ids (convert-markdown-to-json)
+            4. Detection of untiered assets in the configured tenant (AzTierWatcher)
+
+        Local files are read once before the first stage, and written once after the last stage if their content has changed.
+
+    References:
+        https://github.com/emiliensocchi/azure-tiering
+
+    Requirements:
+        - The same access as AzTierWatcher and convert-markdown-to-json (see their own requirements)
+        - Valid access tokens for ARM and MS Graph are expected to be available to AzTierPipeline via the following environment variables:
+            - 'ARM_ACCESS_TOKEN'
+            - 'MSGRAPH_ACCESS_TOKEN'
+
+"""
+import atexit
+import importlib.util
+import json
+import os
+import sys
+
+# Make the modules shared by all actions importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, 'shared'))
+
+from aztier import arm
+from aztier.arm import ARM_BATCH_CHECKPOINT
+from aztier.files import write_file_if_changed
+from aztier.metrics import RUN_METRICS
+
+
+def load_stage_module(module_name, script_file):
+    """
+        Loads the passed stage script as a module, without running its main section.
+
+        Args:
+            module_name(str): the name given to the loaded module
+            script_file(str): path to the script of the stage
+
+        Returns:
+            module: the loaded stage module
+
+    """
+    try:
+        spec = importlib.util.spec_from_file_location(module_name, script_file)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+    except FileNotFoundError:
+        print(f"FATAL ERROR - The stage script '{script_file}' could not be loaded.")
+        exit()
+
+
+def read_local_file(local_file):
+    """
+        Retrieves the content of the passed local file.
+
+        Args:
+            local_file(str): path to the local file
+
+        Returns:
+            str: the content of the file, or an empty string if the file does not exist
+
+    """
+    if not os.path.exists(local_file):
+        return ''
+
+    try:
+        with open(local_file, 'r', encoding = 'utf-8') as file:
+            return file.read()
+    except Exception:
+        print(f"FATAL ERROR - The local file '{local_file}' could not be retrieved.")
+        exit()
+
+
+if __name__ == "__main__":
+    # Get ARM and MS Graph access tokens from environment variables
+    arm_access_token = os.environ['ARM_ACCESS_TOKEN']
+    graph_access_token = os.environ['MSGRAPH_ACCESS_TOKEN']
+
+    if not arm_access_token:
+        print('FATAL ERROR - A valid access token for ARM is required.')
+        exit()
+
+    if not graph_access_token:
+        print('FATAL ERROR - A valid access token for MS Graph is required.')
+        exit()
+
+    # Set local directories and config file
+    github_action_dir_name = '.github'
+    absolute_path_to_script = os.path.abspath(sys.argv[0])
+    root_dir = absolute_path_to_script.split(github_action_dir_name)[0]
+    actions_dir = root_dir + github_action_dir_name + '/actions'
+    config_file = root_dir + 'config.json'
+    azure_dir = root_dir + 'Azure roles'
+    entra_dir = root_dir + 'Entra roles'
+    app_permissions_dir = root_dir + 'Microsoft Graph application permissions'
+
+    # Set local tier, Markdown and untiered files
+    tier_files = {
+        'azure': f"{azure_dir}/tiered-azure-roles.json",
+        'entra': f"{entra_dir}/tiered-entra-roles.json",
+        'msgraph': f"{app_permissions_dir}/tiered-msgraph-app-permissions.json"
+    }
+    markdown_files = {
+        'azure': f"{azure_dir}/README.md",
+        'entra': f"{entra_dir}/README.md",
+        'msgraph': f"{app_permissions_dir}/README.md"
+    }
+    untiered_files = {
+        'azure': f"{azure_dir}/Untiered Azure roles.md",
+        'entra': f"{entra_dir}/Untiered custom Entra roles.md"
+    }
+
+    # Set local cache files
+    cache_dir = root_dir + '.cache'
+    azure_role_definition_catalog_file = f"{cache_dir}/azure-role-definitions.json"
+    aat_cache_file = f"{cache_dir}/aat-tier-files.json"
+    arm_batch_checkpoint_file = f"{cache_dir}/arm-batch-checkpoint.jsonl"
+    metrics_file = f"{cache_dir}/metrics/azTierPipeline.json"
+
+    # Load the stages
+    syncer = load_stage_module('azTierSyncer', f"{actions_dir}/sync-from-upstream/scripts/azTierSyncer.py")
+    json_to_markdown = load_stage_module('convert_json_to_markdown', f"{actions_dir}/convert-json-to-markdown/scripts/convert-json-to-markdown.py")
+    markdown_to_json = load_stage_module('convert_markdown_to_json', f"{actions_dir}/convert-markdown-to-json/scripts/convert-markdown-to-json.py")
+    watcher = load_stage_module('azTierWatcher', f"{actions_dir}/detect-untiered/scripts/azTierWatcher.py")
+
+    # Get project configuration from local config file
+    project_config = {}
+    try:
+        with open(config_file, 'r', encoding = 'utf-8') as file:
+            project_config = json.load(file)
+    except Exception:
+        print('FATAL ERROR - The config JSON file could not be retrieved.')
+        exit()
+
+    keep_local_changes_config = project_config['keepLocalChanges'].lower()
+    accepted_values = [ 'false', 'true' ]
+
+    if not keep_local_changes_config in accepted_values:
+        print("FATAL ERROR - The 'keepLocalChanges' value set in the project's configuration file is invalid. Accepted values are: 'True', 'False'")
+        exit()
+
+    keep_local_changes = True if keep_local_changes_config == 'true' else False
+    max_concurrent_arm_batches_config = str(project_config.get('maxConcurrentArmBatches', arm.MAX_CONCURRENT_ARM_BATCHES))
+
+    if not max_concurrent_arm_batches_config.isdigit() or int(max_concurrent_arm_batches_config) < 1:
+        print("FATAL ERROR - The 'maxConcurrentArmBatches' value set in the project's configuration file is invalid. Accepted values are positive integers")
+        exit()
+
+    azure_discovery_mode = str(project_config.get('azureDiscoveryMode', 'scopes')).lower()
+    accepted_values = [ 'scopes', 'subscriptions', 'resourcegraph' ]
+
+    if not azure_discovery_mode in accepted_values:
+        print("FATAL ERROR - The 'azureDiscoveryMode' value set in the project's configuration file is invalid. Accepted values are: 'scopes', 'subscriptions', 'resourceGraph'")
+        exit()
+
+    role_definition_cache_ttl_hours_config = str(project_config.get('roleDefinitionCacheTtlHours', 24))
+
+    if not role_definition_cache_ttl_hours_config.isdigit():
+        print("FATAL ERROR - The 'roleDefinitionCacheTtlHours' value set in the project's configuration file is invalid. Accepted values are positive integers or 0 to disable caching")
+        exit()
+
+    role_definition_cache_ttl_hours = int(role_definition_cache_ttl_hours_config)
+
+    # The HTTP session, the ARM throttle budget and the metrics are shared by all stages through the 'aztier' package
+    arm.MAX_CONCURRENT_ARM_BATCHES = int(max_concurrent_arm_batches_config)
+
+    # Write the metrics of the run when it ends, including when it fails
+    atexit.register(RUN_METRICS.write_summary, metrics_file, 'AzTierPipeline')
+
+    # Load all local files once into the in-memory catalog
+    local_files = {}
+
+    for local_file in list(tier_files.values()) + list(markdown_files.values()) + list(untiered_files.values()):
+        local_files[local_file] = read_local_file(local_file)
+
+    tiered_assets = {}
+
+    for asset_type, tier_file in tier_files.items():
+        try:
+            tiered_assets[asset_type] = json.loads(local_files[tier_file] or '[]')
+        except json.JSONDecodeError:
+            print('FATAL ERROR - The tiered JSON file does not contain valid JSON.')
+            exit()
+
+    markdown_pages = { asset_type: local_files[markdown_file] for asset_type, markdown_file in markdown_files.items() }
+    untiered_pages = { asset_type: local_files[untiered_file] for asset_type, untiered_file in untiered_files.items() }
+
+    # Stage 1: synchronize built-in assets with AAT
+    print ('Stage 1: Sync from upstream')
+
+    aat_cache = syncer.read_aat_cache(aat_cache_file)
+    tiered_builtin_assets_from_aat = syncer.get_tiered_builtin_assets_from_aat(aat_cache)
+
+    for asset_type in tier_files:
+        tiered_builtin_assets, is_modified_upstream = tiered_builtin_assets_from_aat[asset_type]
+
+        # Nothing to merge if neither the upstream file nor the local file have changed since the last run
+        if not is_modified_upstream and aat_cache[asset_type].get('localHash') == syncer.get_assets_hash(tiered_assets[asset_type]):
+            print (f"{syncer.READABLE_ASSET_TYPES[asset_type]}: not modified upstream")
+            continue
+
+        tiered_assets[asset_type], _ = syncer.sync_tiered_assets_with_aat(keep_local_changes, asset_type, tiered_assets[asset_type], tiered_builtin_assets)
+
+    # Stage 2: convert tiered assets from JSON to Markdown
+    print ('Stage 2: Convert JSON to Markdown')
+
+    for asset_type in markdown_files:
+        markdown_pages[asset_type] = json_to_markdown.render_tiered_markdown(markdown_pages[asset_type], tiered_assets[asset_type], json_to_markdown.MARKDOWN_TIER_COLUMNS[asset_type], json_to_markdown.UPSTREAM_TIER_MODEL_URIS[asset_type])
+
+    # Stage 3: convert tiered assets from Markdown to JSON, enriched with their definition Ids
+    # Asset names are already hyperlinked by stage 2, so the Markdown pages do not need to be standardized
+    print ('Stage 3: Convert Markdown to JSON')
+    asset_ids = markdown_to_json.get_definition_ids_of_all_assets(arm_access_token, graph_access_token)
+
+    for asset_type in markdown_files:
+        markdown_lines = markdown_pages[asset_type].splitlines(keepends = True)
+        tiered_assets[asset_type] = list(markdown_to_json.parse_tiered_markdown(markdown_lines, markdown_to_json.MARKDOWN_TIER_SCHEMAS[asset_type], asset_ids[asset_type]))
+
+    # Stage 4: detect untiered assets
+    print ('Stage 4: Detect untiered assets')
+    readable_asset_types = {
+        'azure': 'Azure roles',
+        'entra': 'Custom Entra roles'
+    }
+    # Record ARM responses, so that a failed run can be resumed with '--resume'
+    ARM_BATCH_CHECKPOINT.open(arm_batch_checkpoint_file, '--resume' in sys.argv[1:])
+    azure_roles = watcher.get_azure_roles_from_arm(arm_access_token, azure_discovery_mode, azure_role_definition_catalog_file, role_definition_cache_ttl_hours)
+    ARM_BATCH_CHECKPOINT.close()
+
+    tenant_assets = {
+        'azure': azure_roles,
+        'entra': watcher.get_custom_entra_roles_from_graph(graph_access_token)
+    }
+
+    for asset_type, assets in tenant_assets.items():
+        # Only custom Entra roles are monitored, as built-in ones are tiered upstream
+        comparable_tiered_assets = tiered_assets[asset_type] if asset_type == 'azure' else [asset for asset in tiered_assets[asset_type] if asset['assetType'] == 'Custom']
+        untiered_assets, removed_custom_asset_ids = watcher.find_untiered_assets(assets, comparable_tiered_assets)
+
+        if removed_custom_asset_ids:
+            print (f"❌ {readable_asset_types[asset_type]}: custom removals have been detected and applied")
+            tiered_assets[asset_type] = [asset for asset in tiered_assets[asset_type] if asset['id'] not in removed_custom_asset_ids]
+            markdown_pages[asset_type] = json_to_markdown.render_tiered_markdown(markdown_pages[asset_type], tiered_assets[asset_type], json_to_markdown.MARKDOWN_TIER_COLUMNS[asset_type], json_to_markdown.UPSTREAM_TIER_MODEL_URIS[asset_type])
+
+        updated_untiered_page = watcher.render_untiered_assets(untiered_pages[asset_type], untiered_assets)
+
+        if updated_untiered_page is not None:
+            print (f"➕ {readable_asset_types[asset_type]}: additions have been detected")
+            untiered_pages[asset_type] = updated_untiered_page
+
+    # Write the in-memory catalog to the local files that have changed
+    updated_files = {}
+
+    for asset_type, tier_file in tier_files.items():
+        updated_files[tier_file] = json.dumps(tiered_assets[asset_type], indent = 4)
+        aat_cache[asset_type]['localHash'] = syncer.get_assets_hash(tiered_assets[asset_type])
+
+    for asset_type, markdown_file in markdown_files.items():
+        updated_files[markdown_file] = markdown_pages[asset_type]
+
+    for asset_type, untiered_file in untiered_files.items():
+        updated_files[untiered_file] = untiered_pages[asset_type]
+
+    for local_file, content in updated_files.items():
+        if content == local_files[local_file]:
+            continue
+
+        try:
+            has_been_written = write_file_if_changed(local_file, content)
+        except Exception:
+            print(f"FATAL ERROR - The local file '{local_file}' could not be updated.")
+            exit()
+
+        if has_been_written:
+            print (f"Updated: {os.path.relpath(local_file, root_dir)}")
+
+    syncer.update_aat_cache(aat_cache_file, aat_cache)
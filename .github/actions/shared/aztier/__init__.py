@@ -0,0 +1,20 @@
+"""
+    Name: 
+        aztier
+
+    Author: 
+        Emilien Socchi
+
+    Description:  
+        aztier gathers the modules shared by the scripts of all actions, so that each piece of logic exists only once:
+            - arm: batching client of ARM, with its throttle scheduler and checkpoint of responses
+            - assets: Id-indexed comparison of lists of assets
+            - endpoints: base URIs of ARM and MS Graph
+            - files: change-aware and atomic writing of local files
+            - graph: JSON batching client of MS Graph, handling pagination and throttling
+            - metrics: counters and timings of the HTTP requests of a run, per phase of the run
+            - transport: pooled HTTP session retrying transient errors, and streamed decoding of JSON bodies
+
+        The scripts make the package importable by adding '.github/actions/shared' to their module search path.
+
+"""
@@ -0,0 +1,713 @@
+"""
+    Client of the ARM batch endpoint, shared by the scripts reading Azure role definitions and assignments.
+    Batches are divided into chunks whose size and pace are decided by a throttle scheduler mirroring the token buckets of ARM, 
+    and their responses can be checkpointed so that an interrupted run can be resumed.
+
+"""
+import base64
+import collections
+import concurrent.futures
+import itertools
+import json
+import os
+import re
+import threading
+import time
+import uuid
+
+from aztier.endpoints import ARM_BASE_URI
+from aztier.metrics import RUN_METRICS, get_request_phase
+from aztier.transport import decode_json_stream, project_json_value, send_http_request
+
+
+# Maximum number of batch chunks kept in flight towards ARM (can be overridden in config.json)
+MAX_CONCURRENT_ARM_BATCHES = 4
+
+# Number of seconds waited between two polls of an asynchronous ARM batch when ARM does not ask for a delay with 'Retry-After'
+ARM_BATCH_POLL_INTERVAL_SECONDS = 5
+
+# Maximum number of seconds during which an asynchronous ARM batch is polled before being considered as failed
+ARM_BATCH_POLL_TIMEOUT_SECONDS = 600
+
+# Fields of the items listed by ARM that are used by the actions, where None keeps the whole field (other fields are dropped when decoding)
+ARM_ITEM_FIELDS = {
+    'id': None,
+    'name': None,
+    'properties': {
+        'roleDefinitionId': None,
+        'roleName': None,
+        'type': None,
+        'description': None,
+        'parent': None
+    }
+}
+
+# Matches the subscription Id targeted by an ARM request URL
+SUBSCRIPTION_ID_PATTERN = re.compile(r"/subscriptions/([0-9a-fA-F-]{36})")
+
+
+def project_arm_item(item):
+    """
+        Reduces the passed item listed by ARM to the fields in ARM_ITEM_FIELDS.
+
+    """
+    return project_json_value(item, ARM_ITEM_FIELDS)
+
+
+def project_arm_batch_response(batch_response):
+    """
+        Reduces the items listed in the content of the passed individual response of an ARM batch to the fields in ARM_ITEM_FIELDS.
+        Responses that do not contain a list are kept as is.
+
+    """
+    content = batch_response.get('content')
+
+    if isinstance(content, dict) and isinstance(content.get('value'), list):
+        content = dict(content, value = [project_arm_item(item) for item in content['value']])
+        batch_response = dict(batch_response, content = content)
+
+    return batch_response
+
+
+def send_paginated_request(url, headers, phase = None):
+    """
+        Sends a GET request to the passed URL and follows the 'nextLink' of each page until the last one.
+        Pages are decoded as a stream, and only the fields in ARM_ITEM_FIELDS are kept from their values.
+
+        Args:
+            url(str): the URL of the first page
+            headers(dict): the HTTP headers of the request
+            phase(str): the phase of the run to which the requests are attributed (defaults to the phase derived from the URL)
+
+        Returns:
+            list(dict): the values of all pages, or None if a page could not be retrieved
+
+    """
+    complete_response = []
+    next_page = url
+
+    while next_page:
+        page_phase = phase or get_request_phase(next_page)
+        http_response = send_http_request('GET', next_page, phase = page_phase, headers = headers, stream = True)
+
+        if http_response.status_code != 200:
+            return None
+
+        values, page = decode_json_stream(http_response, 'value', page_phase, project_arm_item)
+        complete_response += values
+        next_page = page.get('nextLink', '')
+
+        if next_page:
+            RUN_METRICS.add(phase or get_request_phase(next_page), pages = 1)
+
+    return complete_response
+
+
+class ArmThrottleScheduler:
+    """
+        Client-side scheduler pacing the requests sent to ARM ahead of time, by modelling the regional token buckets used by ARM 
+        for throttling. Requests targeting a subscription consume tokens from the bucket of that subscription, while other requests 
+        consume tokens from the bucket of the tenant.
+
+        Each bucket is refilled at a constant rate and kept in sync with the 'x-ms-ratelimit-remaining-*' headers served by ARM.
+        The size of the batch chunks sent to ARM shrinks or grows based on the observed throttle rate.
+
+        More info:
+            https://learn.microsoft.com/en-us/azure/azure-resource-manager/management/request-limits-and-throttling#migrating-to-regional-throttling-and-token-bucket-algorithm
+
+    """
+    def __init__(self, bucket_size = 250, refill_rate = 25, min_chunk_size = 20, max_chunk_size = 500):
+        """
+            Args:
+                bucket_size(int): maximum number of tokens in a bucket
+                refill_rate(int): number of tokens added to a bucket per second
+                min_chunk_size(int): lower bound for the number of requests per batch chunk
+                max_chunk_size(int): upper bound for the number of requests per batch chunk (ARM accepts up to 500)
+
+        """
+        self.bucket_size = bucket_size
+        self.refill_rate = refill_rate
+        self.min_chunk_size = min_chunk_size
+        self.max_chunk_size = max_chunk_size
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+            Refills all buckets and restores the largest chunk size, e.g. when a worker process starts the scan of another tenant.
+
+        """
+        with self.lock:
+            self.chunk_size = self.max_chunk_size
+            self.buckets = {}
+
+    def get_bucket_key(self, url):
+        """
+            Returns the key of the token bucket consumed by the passed request URL (i.e. the subscription Id or 'tenant').
+
+        """
+        match = SUBSCRIPTION_ID_PATTERN.search(url)
+        return match.group(1).lower() if match else 'tenant'
+
+    def get_bucket(self, key):
+        """
+            Returns the passed bucket after refilling it with the tokens accumulated since its last use.
+            Must be called with the lock held.
+
+        """
+        now = time.monotonic()
+        bucket = self.buckets.setdefault(key, { 'tokens': float(self.bucket_size), 'updated': now, 'paused_until': 0.0 })
+        elapsed = now - bucket['updated']
+        bucket['tokens'] = min(float(self.bucket_size), bucket['tokens'] + elapsed * self.refill_rate)
+        bucket['updated'] = now
+        return bucket
+
+    def acquire(self, batch_requests):
+        """
+            Blocks until the token buckets consumed by the passed batch requests hold enough tokens, and consumes them.
+            As a bucket never holds more than its size, the tokens of more requests than the size of a bucket are consumed in 
+            pieces of at most the size of the bucket, waiting for the bucket to refill between pieces.
+
+            Args:
+                batch_requests(list(dict)): list of batch requests about to be sent to ARM
+
+        """
+        remaining_counts = collections.Counter(self.get_bucket_key(request['url']) for request in batch_requests)
+
+        while True:
+            with self.lock:
+                wait_seconds = 0.0
+                now = time.monotonic()
+
+                for key, remaining_count in list(remaining_counts.items()):
+                    bucket = self.get_bucket(key)
+                    required_tokens = min(remaining_count, self.bucket_size)
+                    missing_tokens = max(0.0, required_tokens - bucket['tokens'])
+                    bucket_wait_seconds = max(bucket['paused_until'] - now, missing_tokens / self.refill_rate)
+
+                    if bucket_wait_seconds <= 0:
+                        bucket['tokens'] -= required_tokens
+                        remaining_counts[key] -= required_tokens
+
+                        if remaining_counts[key] <= 0:
+                            del remaining_counts[key]
+                    else:
+                        wait_seconds = max(wait_seconds, bucket_wait_seconds)
+
+                if not remaining_counts:
+                    return
+
+            if wait_seconds > 0:
+                RUN_METRICS.add(get_request_phase(batch_requests[0]['url']), sleptSeconds = wait_seconds)
+                time.sleep(wait_seconds)
+
+    def update(self, batch_requests, batch_responses):
+        """
+            Synchronizes the token buckets with the rate-limit headers of the passed batch responses, pauses the buckets of 
+            throttled requests for the time requested by ARM, and adjusts the chunk size to the observed throttle rate.
+
+            Args:
+                batch_requests(list(dict)): list of batch requests sent to ARM
+                batch_responses(list(dict)): list of responses received from ARM for the passed requests
+
+        """
+        requests_by_name = { request['name']: request for request in batch_requests if 'name' in request }
+        throttled_response_count = 0
+
+        with self.lock:
+            now = time.monotonic()
+
+            for response in batch_responses:
+                request = requests_by_name.get(response.get('name'))
+                is_throttled = response['httpStatusCode'] == 429
+                throttled_response_count += 1 if is_throttled else 0
+
+                if request is None:
+                    continue
+
+                bucket = self.get_bucket(self.get_bucket_key(request['url']))
+                headers = { name.lower(): value for name, value in (response.get('headers') or {}).items() }
+                remaining_reads = [int(value) for name, value in headers.items() if name.startswith('x-ms-ratelimit-remaining-') and name.endswith('reads') and str(value).isdigit()]
+
+                if remaining_reads:
+                    bucket['tokens'] = min(bucket['tokens'], float(min(remaining_reads)))
+
+                if is_throttled:
+                    retry_after = str(headers.get('retry-after', ''))
+                    wait_seconds = int(retry_after) if retry_after.isdigit() else self.bucket_size / self.refill_rate
+                    bucket['tokens'] = 0.0
+                    bucket['paused_until'] = max(bucket['paused_until'], now + wait_seconds)
+
+            # Shrink the chunks proportionally to the throttle rate, or grow them slowly while nothing is throttled
+            if throttled_response_count:
+                throttle_rate = throttled_response_count / max(len(batch_responses), 1)
+                self.chunk_size = max(self.min_chunk_size, int(self.chunk_size * (1 - throttle_rate)))
+            else:
+                self.chunk_size = min(self.max_chunk_size, int(self.chunk_size * 1.25) + 1)
+
+    def get_chunk_size(self):
+        """
+            Returns the number of requests to send in the next batch chunk.
+
+        """
+        with self.lock:
+            return self.chunk_size
+
+
+# Scheduler shared by all batch requests sent to ARM
+ARM_THROTTLE_SCHEDULER = ArmThrottleScheduler()
+
+
+class ArmBatchCheckpoint:
+    """
+        Append-only store of the ARM responses received during a run, allowing a run that has failed part-way through to be resumed.
+        Each successful response is recorded as one JSON line keyed by the method and URL of its request, as the names of batch 
+        requests are random and chunk boundaries change from one run to another. The store is inactive until it has been opened.
+        Only the responses loaded from the checkpoint of a previous run are kept in memory, while the responses of the current 
+        run are only written to the checkpoint file.
+
+    """
+    def __init__(self):
+        self.file = None
+        self.checkpoint_file = None
+        self.responses = {}
+        self.lock = threading.Lock()
+
+    def get_key(self, request):
+        """
+            Returns the key under which the response to the passed batch request is recorded.
+
+        """
+        return f"{request['httpMethod'].upper()} {request['url']}"
+
+    def open(self, checkpoint_file, resume):
+        """
+            Opens the passed checkpoint file, after loading the responses it already contains if the run is resumed.
+            Otherwise, the checkpoint of any previous run is discarded.
+
+            Args:
+                checkpoint_file(str): path to the local checkpoint file
+                resume(bool): whether the responses recorded by a previous run are reused
+
+        """
+        self.responses = {}
+
+        if resume and os.path.exists(checkpoint_file):
+            with open(checkpoint_file, 'r', encoding = 'utf-8') as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                        self.responses[record['key']] = record['response']
+                    except (json.JSONDecodeError, KeyError):
+                        # The last line may have been cut short by the interruption of the previous run
+                        continue
+
+            print (f"Resuming from checkpoint: {len(self.responses)} ARM responses reused")
+
+        os.makedirs(os.path.dirname(checkpoint_file), exist_ok = True)
+        self.checkpoint_file = checkpoint_file
+        self.file = open(checkpoint_file, 'a' if resume else 'w', encoding = 'utf-8')
+
+    def get(self, request):
+        """
+            Returns the response recorded for the passed batch request, renamed after it, or None if no response has been recorded.
+
+        """
+        response = self.responses.get(self.get_key(request))
+        return dict(response, name = request['name']) if response is not None else None
+
+    def record(self, batch_requests, batch_responses):
+        """
+            Records the passed successful responses to the passed batch requests.
+
+            Args:
+                batch_requests(list(dict)): list of batch requests sent to ARM
+                batch_responses(list(dict)): list of successful responses from ARM
+
+        """
+        if self.file is None:
+            return
+
+        requests_by_name = { request['name']: request for request in batch_requests }
+
+        with self.lock:
+            for batch_response in batch_responses:
+                request = requests_by_name.get(batch_response.get('name'))
+
+                if request is None:
+                    continue
+
+                self.file.write(json.dumps({ 'key': self.get_key(request), 'response': batch_response }) + '\n')
+
+            self.file.flush()
+
+    def close(self):
+        """
+            Closes and removes the checkpoint file, once the run has completed.
+
+        """
+        if self.file is None:
+            return
+
+        self.file.close()
+        self.file = None
+        os.remove(self.checkpoint_file)
+
+
+# Checkpoint of the ARM responses received during the run
+ARM_BATCH_CHECKPOINT = ArmBatchCheckpoint()
+
+
+def get_batch_response_from_arm(http_response, headers, phase):
+    """
+        Retrieves all responses of a batch request sent to ARM, from the initial HTTP response to the batch request.
+        Large batches are processed asynchronously by ARM, which answers with a 202 and a 'Location' to poll after 'Retry-After' 
+        seconds, until all individual requests have finished. Completed batches may also be paged with a 'nextLink'.
+
+        More info:
+            https://learn.microsoft.com/en-us/azure/azure-resource-manager/management/async-operations
+
+        Args:
+            http_response(requests.Response): the initial HTTP response to the batch request
+            headers(dict): the HTTP headers used to poll the batch
+            phase(str): the phase of the run to which the polls are attributed
+
+        Returns:
+            list(dict): the responses of all individual requests in the batch, or None if the batch has failed or timed out
+
+    """
+    all_responses = []
+    deadline = time.monotonic() + ARM_BATCH_POLL_TIMEOUT_SECONDS
+
+    while True:
+        if http_response.status_code == 202:
+            # The batch is still running - poll its Location once the requested delay has passed
+            location = http_response.headers.get('Location', '')
+            retry_after = str(http_response.headers.get('Retry-After', ''))
+            wait_seconds = int(retry_after) if retry_after.isdigit() else ARM_BATCH_POLL_INTERVAL_SECONDS
+
+            if not location or time.monotonic() + wait_seconds > deadline:
+                return None
+
+            RUN_METRICS.add(phase, sleptSeconds = wait_seconds)
+            time.sleep(wait_seconds)
+            http_response = send_http_request('GET', location, phase = phase, headers = headers, stream = True)
+            continue
+
+        if http_response.status_code != 200:
+            return None
+
+        # The batch has completed - merge the responses of all its pages, decoded one individual response at a time
+        responses, batch_response = decode_json_stream(http_response, 'responses', phase, project_arm_batch_response)
+        all_responses += responses
+        next_page = batch_response.get('nextLink', '')
+
+        if not next_page:
+            return all_responses
+
+        RUN_METRICS.add(phase, pages = 1)
+        http_response = send_http_request('GET', next_page, phase = phase, headers = headers, stream = True)
+
+
+def send_limited_batch_request_to_arm(token, limited_batch_request):
+    """
+        Sends a single chunk of batch requests to ARM, while handling pagination and throttling to return a complete response.
+        The chunk is expected to stay within the ARM limit of 500 requests per batch, and is paced by the ARM throttle scheduler.
+
+        Args:
+            token(str): a valid access token for ARM
+            limited_batch_request(list(dict)): chunk of batch requests to send to ARM
+
+        Returns:
+            list(dict): list of responses from ARM, or None if the batch request has failed
+
+    """
+    complete_response = []
+    remaining_requests = []
+
+    # Reuse the responses recorded by a previous run
+    for request in limited_batch_request:
+        checkpointed_response = ARM_BATCH_CHECKPOINT.get(request)
+
+        if checkpointed_response is not None:
+            complete_response.append(checkpointed_response)
+        else:
+            remaining_requests.append(request)
+    
+    # Loop until no request is throttled
+    while remaining_requests:
+        # Create the batch request
+        endpoint = f"{ARM_BASE_URI}/batch?api-version=2021-04-01"
+        headers = {'Authorization': f"Bearer {token}"}
+        body = { 
+            'requests': remaining_requests
+        }
+
+        # Wait until the token buckets consumed by the requests allow sending them
+        ARM_THROTTLE_SCHEDULER.acquire(remaining_requests)
+        phase = get_request_phase(remaining_requests[0]['url'])
+        http_response = send_http_request('POST', endpoint, phase = phase, headers = headers, json = body, stream = True)
+
+        if http_response.status_code != 200 and http_response.status_code != 202:
+            return None
+
+        # Collect the responses of all requests in the batch, which may be delivered asynchronously and paged
+        all_responses = get_batch_response_from_arm(http_response, headers, phase)
+
+        if all_responses is None:
+            return None
+
+        # Keep the throttle model in sync with ARM
+        ARM_THROTTLE_SCHEDULER.update(remaining_requests, all_responses)
+
+        # Identify throttled requests
+        successful_responses = [response for response in all_responses if response['httpStatusCode'] == 200 or response['httpStatusCode'] == 202]
+        complete_response += successful_responses
+        ARM_BATCH_CHECKPOINT.record(remaining_requests, successful_responses)
+        throttled_responses = [response for response in all_responses if response['httpStatusCode'] == 429]
+        RUN_METRICS.add(phase, throttled = len(throttled_responses))
+
+        if not throttled_responses:
+            break
+
+        # Collect throttled requests
+        remaining_requests = []
+        for throttled_response in throttled_responses:
+            throttled_response_name = throttled_response['name']
+            throttled_request = next((r for r in limited_batch_request if r['name'] == throttled_response_name), None)
+            remaining_requests.append(throttled_request)
+
+        # Throttled requests are resent once the scheduler has honoured the Retry-After of every throttled response
+    # End of While
+
+    return complete_response
+
+
+def stream_batch_request_to_arm(token, batch_requests, max_concurrent_batches = None):
+    """
+        Sends the passed batch requests to ARM as a stream, while handling pagination and throttling to yield complete responses.
+        The requests are consumed lazily and divided into chunks that are kept in flight concurrently, up to the passed concurrency limit.
+        A new chunk is only built when a slot is free, so that the passed requests can be produced by an upstream stage while earlier
+        chunks are still in flight. The size of each chunk and the pace at which chunks are sent are decided by the ARM throttle scheduler.
+
+        More info:
+            https://learn.microsoft.com/en-us/azure/azure-resource-manager/management/request-limits-and-throttling#migrating-to-regional-throttling-and-token-bucket-algorithm
+        
+        Args:
+            token(str): a valid access token for ARM
+            batch_requests(iterable(dict)): iterable of batch requests to send to ARM
+            max_concurrent_batches(int): maximum number of chunks in flight at the same time (defaults to MAX_CONCURRENT_ARM_BATCHES)
+
+        Yields:
+            list(dict): list of responses from ARM for each chunk, in the order of the chunks, or None if a chunk has failed
+    
+    """
+    max_concurrent_batches = max_concurrent_batches if max_concurrent_batches else MAX_CONCURRENT_ARM_BATCHES
+    remaining_requests = iter(batch_requests)
+    has_remaining_requests = True
+    pending_batch_responses = collections.deque()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers = max_concurrent_batches) as executor:
+        try:
+            while has_remaining_requests or pending_batch_responses:
+                # Divide the passed batch into smaller chunks, whose size is adjusted by the scheduler to stay within API limits
+                while has_remaining_requests and len(pending_batch_responses) < max_concurrent_batches:
+                    batch_request_size_limit = ARM_THROTTLE_SCHEDULER.get_chunk_size()
+                    limited_batch_request = list(itertools.islice(remaining_requests, batch_request_size_limit))
+
+                    if not limited_batch_request:
+                        has_remaining_requests = False
+                        break
+
+                    pending_batch_responses.append(executor.submit(send_limited_batch_request_to_arm, token, limited_batch_request))
+
+                if not pending_batch_responses:
+                    break
+
+                # Yield the responses in the order of the chunks
+                limited_batch_response = pending_batch_responses.popleft().result()
+                yield limited_batch_response
+
+                if limited_batch_response is None:
+                    return
+        finally:
+            # Pending chunks are not sent if a chunk has failed or the stream is closed early
+            for pending_batch_response in pending_batch_responses:
+                pending_batch_response.cancel()
+
+
+def send_batch_request_to_arm(token, batch_requests, max_concurrent_batches = None):
+    """
+        Sends the passed batch requests to ARM, while handling pagination and throttling to return a complete response.
+        Responses are returned in the same order as if the chunks had been sent sequentially.
+
+        Args:
+            token(str): a valid access token for ARM
+            batch_requests(list(dict)): list of batch requests to send to ARM
+            max_concurrent_batches(int): maximum number of chunks in flight at the same time (defaults to MAX_CONCURRENT_ARM_BATCHES)
+
+        Returns:
+            list(dict): list of responses from ARM, or None if the batch request has failed
+    
+    """
+    complete_response = []
+
+    for limited_batch_response in stream_batch_request_to_arm(token, batch_requests, max_concurrent_batches):
+        if limited_batch_response is None:
+            return None
+
+        complete_response += limited_batch_response
+
+    return complete_response
+
+
+def stream_paginated_batch_request_to_arm(token, batch_requests):
+    """
+        Sends the passed batch requests to ARM as a stream, and follows the 'nextLink' of each response with additional batch requests,
+        until the last page of every response has been retrieved. Values are yielded as soon as their page has been received.
+
+        Args:
+            token(str): a valid access token for ARM
+            batch_requests(iterable(dict)): iterable of batch requests to send to ARM
+
+        Yields:
+            dict: the values of all pages of all responses, or None if a batch request has failed
+
+    """
+    while batch_requests:
+        next_batch_requests = []
+
+        for limited_batch_response in stream_batch_request_to_arm(token, batch_requests):
+            if limited_batch_response is None:
+                yield None
+                return
+
+            for http_response in limited_batch_response:
+                content = http_response.get('content') or {}
+                yield from content.get('value', [])
+                next_page = content.get('nextLink', '')
+
+                if next_page:
+                    RUN_METRICS.add(get_request_phase(next_page), pages = 1)
+                    next_batch_requests.append({
+                        "name": str(uuid.uuid4()),
+                        "httpMethod": "GET",
+                        "url": next_page
+                    })
+
+        batch_requests = next_batch_requests
+
+
+def send_paginated_batch_request_to_arm(token, batch_requests):
+    """
+        Sends the passed batch requests to ARM, and follows the 'nextLink' of each response with additional batch requests,
+        until the last page of every response has been retrieved.
+
+        Args:
+            token(str): a valid access token for ARM
+            batch_requests(list(dict)): list of batch requests to send to ARM
+
+        Returns:
+            list(dict): the values of all pages of all responses, or None if a batch request has failed
+
+    """
+    complete_response = []
+
+    for value in stream_paginated_batch_request_to_arm(token, batch_requests):
+        if value is None:
+            return None
+
+        complete_response.append(value)
+
+    return complete_response
+
+
+def get_tenant_id_from_token(token):
+    """
+        Retrieves the Id of the tenant that issued the passed access token, from its 'tid' claim.
+
+        Args:
+            token(str): a valid access token
+
+        Returns:
+            str: the tenant Id
+
+    """
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+        return claims['tid']
+    except Exception:
+        print('FATAL ERROR - The tenant Id could not be retrieved from the access token.')
+        exit()
+
+
+def get_scope_hierarchy_from_arm(token):
+    """
+        Retrieves the hierarchy of Management Groups and Subscriptions that the passed token has access to, as an in-memory tree.
+        The whole hierarchy is loaded in one go from the descendants of the Tenant Root Management Group. 
+        If the descendants cannot be retrieved, the hierarchy falls back to flat lists of Management Groups and Subscriptions without parents.
+
+        More info:
+            https://learn.microsoft.com/en-us/rest/api/managementgroups/management-groups/get-descendants
+
+        Args:
+            token(str): a valid access token for ARM
+
+        Returns:
+            dict(str:dict): the tree of scopes, mapping the resource Id of each scope to a dict with the following properties:
+                - id: the resource Id of the scope
+                - type: the type of the scope ('managementGroup' or 'subscription')
+                - parent: the resource Id of the parent Management Group, or None for the Tenant Root Management Group
+                - children: the resource Ids of the child Management Groups and Subscriptions
+
+    """
+    hierarchy = {}
+    headers = {'Authorization': f"Bearer {token}"}
+    tenant_id = get_tenant_id_from_token(token)
+    root_resource_id = f"/providers/Microsoft.Management/managementGroups/{tenant_id}"
+    endpoint = f"{ARM_BASE_URI}{root_resource_id}/descendants?api-version=2020-05-01"
+    descendants = send_paginated_request(endpoint, headers)
+
+    if descendants is None:
+        # Fall back to flat lists of Management Groups and Subscriptions
+        batch_requests = [
+            {
+                "name": str(uuid.uuid4()),
+                "httpMethod": "GET",
+                "url": f"{ARM_BASE_URI}/providers/Microsoft.Management/managementGroups?api-version=2021-04-01"
+            },
+            {
+                "name": str(uuid.uuid4()),
+                "httpMethod": "GET",
+                "url": f"{ARM_BASE_URI}/subscriptions?api-version=2021-04-01"
+            }
+        ]
+
+        http_responses = send_batch_request_to_arm(token, batch_requests)
+
+        if http_responses is None or len(http_responses) != 2:
+            print('FATAL ERROR - The Azure scopes could not be retrieved from ARM.')
+            exit()
+
+        scopes = http_responses[0]['content']['value'] + http_responses[1]['content']['value']
+        descendants = [{ 'id': scope['id'] } for scope in scopes]
+    else:
+        hierarchy[root_resource_id] = { 'id': root_resource_id, 'type': 'managementGroup', 'parent': None, 'children': [] }
+
+    for descendant in descendants:
+        resource_id = descendant['id']
+        parent = ((descendant.get('properties') or {}).get('parent') or {}).get('id')
+        hierarchy[resource_id] = {
+            'id': resource_id,
+            'type': 'subscription' if resource_id.lower().startswith('/subscriptions/') else 'managementGroup',
+            'parent': parent,
+            'children': []
+        }
+
+    for scope in hierarchy.values():
+        if scope['parent'] in hierarchy:
+            hierarchy[scope['parent']]['children'].append(scope['id'])
+
+    return hierarchy
@@ -0,0 +1,49 @@
+"""
+    Comparison of lists of administrative assets, shared by the synchronization with upstream and the detection of untiered assets.
+
+"""
+
+
+def diff_assets(extended_assets, base_assets):
+    """
+        Compares a base list with a list of extended assets in a single pass, to determine the assets that have been added to,
+        removed from and modified in the extended list. Assets are matched by Id.
+
+        Args:
+            extended_assets(list(dict(str:str))): list of extended assets
+            base_assets(list(dict(str:str))): list of base assets to compare with
+
+        Returns:
+            list(dict(str:str)): added assets
+            list(dict(str:str)): removed assets
+            list(dict): modified assets, each as a record with the 'id' of the asset, the extended 'asset', and the 'changes'
+            of each property shared with the base asset as a (base value, extended value) tuple
+
+    """
+    extended_assets_by_id = { asset['id']: asset for asset in extended_assets }
+    base_assets_by_id = { asset['id']: asset for asset in base_assets }
+    added_assets = [asset for asset_id, asset in extended_assets_by_id.items() if asset_id not in base_assets_by_id]
+    removed_assets = []
+    modified_assets = []
+
+    for asset_id, base_asset in base_assets_by_id.items():
+        extended_asset = extended_assets_by_id.get(asset_id)
+
+        if extended_asset is None:
+            removed_assets.append(base_asset)
+            continue
+
+        changes = {
+            asset_property: (base_value, extended_asset[asset_property])
+            for asset_property, base_value in base_asset.items()
+            if asset_property in extended_asset and base_value != extended_asset[asset_property]
+        }
+
+        if changes:
+            modified_assets.append({
+                'id': asset_id,
+                'asset': extended_asset,
+                'changes': changes
+            })
+
+    return added_assets, removed_assets, modified_assets
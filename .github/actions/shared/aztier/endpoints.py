@@ -0,0 +1,10 @@
+"""
+    Base URIs of the services queried by the actions, shared so that an override applies to all scripts at once.
+
+"""
+import os
+
+
+# Base URIs of ARM and MS Graph, which can be overridden to target a national cloud or a local stand-in
+ARM_BASE_URI = os.environ.get('ARM_ENDPOINT', 'https://management.azure.com').rstrip('/')
+MSGRAPH_BASE_URI = os.environ.get('MSGRAPH_ENDPOINT', 'https://graph.microsoft.com').rstrip('/')
@@ -0,0 +1,49 @@
+"""
+    Change-aware and atomic writing of the local files updated by the actions (tier files, Markdown pages, reports and caches).
+
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+
+
+def write_file_if_changed(local_file, content):
+    """
+        Writes the passed content to the passed local file, unless the file already has the exact same content.
+        The content is first written to a temporary file in the same directory, which then atomically replaces the local file,
+        so that an interrupted run never leaves a partially-written file behind.
+
+        Args:
+            local_file(str): path to the local file
+            content(str): the content to write
+
+        Returns:
+            bool: True if the file has been written, False if its content was already up to date
+
+    """
+    encoded_content = content.encode('utf-8')
+
+    if os.path.exists(local_file) and os.path.getsize(local_file) == len(encoded_content):
+        with open(local_file, 'rb') as file:
+            if hashlib.sha256(file.read()).digest() == hashlib.sha256(encoded_content).digest():
+                return False
+
+    file_descriptor, temporary_file = tempfile.mkstemp(dir = os.path.dirname(local_file) or '.', prefix = '.', suffix = '.tmp')
+
+    try:
+        with os.fdopen(file_descriptor, 'wb') as file:
+            file.write(encoded_content)
+
+        if os.path.exists(local_file):
+            shutil.copymode(local_file, temporary_file)
+        else:
+            os.chmod(temporary_file, 0o644)
+
+        os.replace(temporary_file, local_file)
+    except Exception:
+        if os.path.exists(temporary_file):
+            os.remove(temporary_file)
+        raise
+
+    return True
@@ -0,0 +1,94 @@
+"""
+    Client of the MS Graph JSON batching endpoint, shared by the scripts reading Entra role and application permission definitions.
+
+"""
+import time
+
+from aztier.endpoints import MSGRAPH_BASE_URI
+from aztier.metrics import RUN_METRICS, get_request_phase
+from aztier.transport import decode_json_stream, send_http_request
+
+
+def send_batch_request_to_graph(token, batch_requests):
+    """
+        Sends the passed requests to MS Graph in JSON batches of up to 20 requests, while handling pagination and throttling to 
+        return a complete response.
+
+        More info:
+            https://learn.microsoft.com/en-us/graph/json-batching
+            https://learn.microsoft.com/en-us/graph/throttling
+
+        Args:
+            token(str): a valid access token for MS Graph
+            batch_requests(list(dict)): list of requests with a unique 'id' and a 'url' relative to the MS Graph v1.0 endpoint
+
+        Returns:
+            dict(str:dict): dictionary mapping each request Id to its response body, where the 'value' of all pages is merged
+            for collections, or None if a request has failed
+
+    """
+    complete_response = {}
+    endpoint = f"{MSGRAPH_BASE_URI}/v1.0/$batch"
+    base_uri = f"{MSGRAPH_BASE_URI}/v1.0"
+    headers = {'Authorization': f"Bearer {token}"}
+    batch_request_size_limit = 20
+    remaining_requests = [dict(request, method = 'GET') for request in batch_requests]
+
+    while remaining_requests:
+        limited_batch_request = remaining_requests[:batch_request_size_limit]
+        remaining_requests = remaining_requests[batch_request_size_limit:]
+        requests_by_id = { request['id']: request for request in limited_batch_request }
+        body = {
+            'requests': limited_batch_request
+        }
+
+        http_response = send_http_request('POST', endpoint, headers = headers, json = body, stream = True)
+
+        if http_response.status_code != 200:
+            return None
+
+        throttled_requests = []
+        wait_seconds = 0
+        responses, _ = decode_json_stream(http_response, 'responses', get_request_phase(endpoint))
+
+        for response in responses:
+            request = requests_by_id[response['id']]
+
+            if response['status'] == 429:
+                # Collect throttled requests and honour the longest Retry-After
+                response_headers = { name.lower(): value for name, value in (response.get('headers') or {}).items() }
+                retry_after = str(response_headers.get('retry-after', ''))
+                wait_seconds = max(wait_seconds, int(retry_after) if retry_after.isdigit() else 1)
+                throttled_requests.append(request)
+                continue
+
+            if response['status'] != 200:
+                return None
+
+            response_body = response['body']
+
+            if request['id'] in complete_response:
+                # Subsequent page of a collection
+                complete_response[request['id']]['value'] += response_body.get('value', [])
+            else:
+                complete_response[request['id']] = response_body
+
+            next_page = response_body.get('@odata.nextLink', '')
+
+            if next_page:
+                RUN_METRICS.add(get_request_phase(endpoint), pages = 1)
+                remaining_requests.append({
+                    'id': request['id'],
+                    'method': 'GET',
+                    'url': next_page.replace(base_uri, '', 1)
+                })
+
+        if throttled_requests:
+            RUN_METRICS.add(get_request_phase(endpoint), throttled = len(throttled_requests), sleptSeconds = wait_seconds)
+            time.sleep(wait_seconds)
+            remaining_requests = throttled_requests + remaining_requests
+
+    for response_body in complete_response.values():
+        response_body.pop('@odata.nextLink', None)
+
+    return complete_response
@@ -0,0 +1,145 @@
+"""
+    Bookkeeping of the HTTP requests sent by the actions, shared by all scripts so that the requests of the stages of a pipeline 
+    run are accounted in a single summary.
+
+"""
+import datetime
+import json
+import os
+import threading
+import time
+
+from aztier.endpoints import MSGRAPH_BASE_URI
+
+
+# Phase of the run to which each request is attributed, based on a pattern in its URL (the first match applies)
+REQUEST_PHASES = [
+    ('raw.githubusercontent.com', 'Upstream download'),
+    (MSGRAPH_BASE_URI, 'Entra lookup'),
+    ('roleEligibilitySchedule', 'Eligible assignments'),
+    ('roleAssignmentSchedule', 'Active assignments'),
+    ('roleAssignments', 'Assigned assignments'),
+    ('Microsoft.ResourceGraph', 'Assigned assignments'),
+    ('roleDefinitions', 'Definition lookup'),
+    ('', 'Scope discovery')
+]
+
+
+class RequestMetrics:
+    """
+        Counters and timings of the HTTP requests sent during the run, aggregated per phase of the run.
+        Requests are attributed to a phase based on their URL (see REQUEST_PHASES), so that requests sent concurrently 
+        by overlapping stages are still accounted to the right phase.
+        The effective throughput of each phase is reported in sub-requests per second over its elapsed time, which includes the 
+        time slept to honour throttling, so that the cost of throttling can be compared across runs and tenants.
+
+    """
+    COUNTERS = ('requests', 'subRequests', 'throttled', 'retries', 'sleptSeconds', 'pages', 'bytes', 'requestSeconds')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+            Clears the counters and restarts the run, e.g. when a worker process starts the scan of another tenant.
+
+        """
+        with self.lock:
+            self.phases = {}
+            self.started = time.time()
+
+    def add(self, phase, started = None, **counters):
+        """
+            Adds the passed counters to the passed phase, and extends the time span of the phase to the passed start time and now.
+
+        """
+        now = time.time()
+
+        with self.lock:
+            metrics = self.phases.setdefault(phase, dict.fromkeys(self.COUNTERS, 0))
+            metrics['startedAt'] = min(metrics.get('startedAt', now), started or now)
+            metrics['endedAt'] = now
+
+            for name, value in counters.items():
+                metrics[name] += value
+
+    def get_summary(self):
+        """
+            Returns the counters and timings of each phase and their totals, as a JSON-serializable dictionary.
+
+        """
+        phases = {}
+        total = dict.fromkeys(self.COUNTERS, 0)
+
+        with self.lock:
+            for phase, metrics in self.phases.items():
+                phases[phase] = { name: round(metrics[name], 3) for name in self.COUNTERS }
+                elapsed_seconds = metrics['endedAt'] - metrics['startedAt']
+                phases[phase]['elapsedSeconds'] = round(elapsed_seconds, 3)
+                phases[phase]['subRequestsPerSecond'] = round(metrics['subRequests'] / elapsed_seconds, 1) if elapsed_seconds > 0 else None
+
+                for name in self.COUNTERS:
+                    total[name] += metrics[name]
+
+        total = { name: round(value, 3) for name, value in total.items() }
+        elapsed_seconds = time.time() - self.started
+        total['elapsedSeconds'] = round(elapsed_seconds, 3)
+        total['subRequestsPerSecond'] = round(total['subRequests'] / elapsed_seconds, 1) if elapsed_seconds > 0 else None
+
+        return {
+            'startedAt': datetime.datetime.fromtimestamp(self.started, datetime.timezone.utc).isoformat(),
+            'phases': phases,
+            'total': total
+        }
+
+    def write_summary(self, summary_file, title):
+        """
+            Writes the summary of the run to the passed JSON file, and appends it to the job summary when running in GitHub Actions.
+
+            Args:
+                summary_file(str): path to the local JSON file receiving the summary
+                title(str): the title of the summary in the job summary
+
+        """
+        summary = self.get_summary()
+        job_summary_file = os.environ.get('GITHUB_STEP_SUMMARY')
+        rows = [
+            f"### {title}",
+            '',
+            '| Phase | Requests | Sub-requests | Throttled | Retries | Pages | Downloaded (KB) | Slept (s) | Elapsed (s) | Sub-requests/s |',
+            '|---|---|---|---|---|---|---|---|---|---|'
+        ]
+
+        for phase, metrics in list(summary['phases'].items()) + [('**Total**', summary['total'])]:
+            rows.append(f"| {phase} | {metrics['requests']} | {metrics['subRequests']} | {metrics['throttled']} | {metrics['retries']} | {metrics['pages']} | {metrics['bytes'] // 1024} | {metrics['sleptSeconds']} | {metrics['elapsedSeconds']} | {metrics['subRequestsPerSecond'] or '-'} |")
+
+        try:
+            os.makedirs(os.path.dirname(summary_file), exist_ok = True)
+
+            with open(summary_file, 'w', encoding = 'utf-8') as file:
+                file.write(json.dumps(summary, indent = 4))
+
+            if job_summary_file:
+                with open(job_summary_file, 'a', encoding = 'utf-8') as file:
+                    file.write('\n'.join(rows) + '\n\n')
+        except Exception:
+            print('WARNING - The metrics of the run could not be written.')
+
+
+# Counters and timings of the HTTP requests sent during the run
+RUN_METRICS = RequestMetrics()
+
+
+def get_request_phase(url):
+    """
+        Returns the phase of the run to which the passed request URL is attributed.
+
+        Args:
+            url(str): the URL of the request (followed by the URL of its first sub-request for batch requests)
+
+        Returns:
+            str: the name of the phase
+
+    """
+    return next(phase for pattern, phase in REQUEST_PHASES if pattern in url)
@@ -0,0 +1,234 @@
+"""
+    HTTP transport shared by the scripts of all actions: a pooled session retrying transient errors, the accounting of each request 
+    in the metrics of the run, and the streamed decoding of JSON response bodies.
+
+"""
+import codecs
+import json
+import re
+import requests
+import requests.adapters
+import time
+import urllib3
+
+from aztier.metrics import RUN_METRICS, get_request_phase
+
+
+# Connect and read timeouts (in seconds) of the HTTP requests
+HTTP_TIMEOUT_SECONDS = (10, 120)
+
+# Size of the chunks (in bytes) in which response bodies are read when they are decoded as a stream
+HTTP_STREAM_CHUNK_SIZE = 64 * 1024
+
+# Matches the JSON whitespace preceding a token in a response body
+JSON_WHITESPACE_PATTERN = re.compile(r"[ \t\n\r]*")
+
+
+def create_http_session():
+    """
+        Creates the HTTP session shared by all requests sent by the actions.
+        The session keeps connections alive in a pool per host, and retries requests failing with a transient error (429/5xx) 
+        with an exponential backoff honouring the Retry-After header.
+
+        Returns:
+            requests.Session: the shared HTTP session
+
+    """
+    retry_policy = urllib3.util.Retry(
+        total = 5,
+        backoff_factor = 1,
+        status_forcelist = [429, 500, 502, 503, 504],
+        allowed_methods = None,
+        respect_retry_after_header = True,
+        raise_on_status = False
+    )
+    http_adapter = requests.adapters.HTTPAdapter(pool_connections = 4, pool_maxsize = 32, max_retries = retry_policy)
+    http_session = requests.Session()
+    http_session.mount('https://', http_adapter)
+    http_session.mount('http://', http_adapter)
+    return http_session
+
+
+# HTTP session shared by all requests
+HTTP_SESSION = create_http_session()
+
+
+def send_http_request(method, url, phase = None, **kwargs):
+    """
+        Sends an HTTP request through the shared HTTP session, using the default timeout unless another one is passed.
+        The request is accounted in the metrics of the run, under the passed phase or the phase derived from its URL.
+        When the request is sent with 'stream = True', the body of a successful response is left to be decoded as a stream by the 
+        caller (see decode_json_stream), which accounts for the downloaded bytes.
+
+        Args:
+            method(str): the HTTP method of the request
+            url(str): the URL of the request
+            phase(str): the phase of the run to which the request is attributed (defaults to the phase derived from the URL)
+            kwargs: optional arguments accepted by requests (e.g. headers, json, timeout)
+
+        Returns:
+            requests.Response: the HTTP response
+
+    """
+    kwargs.setdefault('timeout', HTTP_TIMEOUT_SECONDS)
+    started = time.time()
+    http_response = HTTP_SESSION.request(method, url, **kwargs)
+    body = kwargs.get('json')
+    batch_requests = body.get('requests', []) if isinstance(body, dict) else []
+    retries = getattr(getattr(http_response.raw, 'retries', None), 'history', None) or ()
+
+    if phase is None:
+        phase = get_request_phase(' '.join([url] + [request['url'] for request in batch_requests[:1]]))
+
+    # Bodies decoded as a stream are accounted while they are read
+    downloaded_bytes = 0 if kwargs.get('stream') and http_response.status_code == 200 else len(http_response.content)
+
+    RUN_METRICS.add(
+        phase,
+        started = started,
+        requests = 1,
+        subRequests = max(len(batch_requests), 1),
+        throttled = sum(1 for retry in retries if retry.status == 429) + (1 if http_response.status_code == 429 else 0),
+        retries = len(retries),
+        bytes = downloaded_bytes,
+        requestSeconds = time.time() - started
+    )
+
+    return http_response
+
+
+def project_json_value(value, fields):
+    """
+        Reduces the passed decoded JSON value to the passed fields, recursively.
+
+        Args:
+            value(any): the decoded JSON value
+            fields(dict): the fields to keep, mapped to the fields to keep within them, or to None to keep them whole
+
+        Returns:
+            any: the reduced value
+
+    """
+    if fields is None or not isinstance(value, dict):
+        return value
+
+    return { name: project_json_value(value[name], child_fields) for name, child_fields in fields.items() if name in value }
+
+
+def decode_json_stream(http_response, array_key, phase, project_item = None):
+    """
+        Decodes the JSON body of the passed HTTP response as a stream, in a single pass over the body.
+        The body is expected to be a JSON object, whose array under the passed key is decoded one item at a time, as soon as the item
+        has been received. Each item is reduced with the passed projection before the next one is decoded, so that neither the raw 
+        body nor the complete tree of decoded objects is held in memory. The other members of the object are decoded as is.
+
+        Args:
+            http_response(requests.Response): the successful HTTP response, sent with 'stream = True'
+            array_key(str): the key of the array to decode item by item (e.g. 'value', 'responses')
+            phase(str): the phase of the run to which the downloaded bytes are attributed
+            project_item(function): reduces each decoded item to the fields that are used (defaults to keeping items as is)
+
+        Returns:
+            tuple(list, dict): the reduced items of the array, and the other members of the object (e.g. 'nextLink')
+
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    chunks = http_response.iter_content(chunk_size = HTTP_STREAM_CHUNK_SIZE)
+    buffer = ''
+    position = 0
+    is_exhausted = False
+    downloaded_bytes = 0
+    items = []
+    members = {}
+
+    def read_more():
+        # Drop the decoded text and read until the remaining text has doubled, so that values spanning many chunks are decoded in linear time
+        nonlocal buffer, position, is_exhausted, downloaded_bytes
+        buffer = buffer[position:]
+        position = 0
+        min_length = max(len(buffer) * 2, 1)
+
+        while len(buffer) < min_length:
+            chunk = next(chunks, None)
+
+            if chunk is None:
+                buffer += text_decoder.decode(b'', final = True)
+                is_exhausted = True
+                return
+
+            downloaded_bytes += len(chunk)
+            buffer += text_decoder.decode(chunk)
+
+    def peek():
+        # Return the next character that is not whitespace, without consuming it
+        nonlocal position
+        position = JSON_WHITESPACE_PATTERN.match(buffer, position).end()
+
+        while position >= len(buffer) and not is_exhausted:
+            read_more()
+            position = JSON_WHITESPACE_PATTERN.match(buffer, position).end()
+
+        if position >= len(buffer):
+            raise ValueError('Unexpected end of the JSON body.')
+
+        return buffer[position]
+
+    def consume(char):
+        nonlocal position
+
+        if peek() != char:
+            raise ValueError(f"Expecting '{char}' at position {position} of the JSON body.")
+
+        position += 1
+
+    def decode_value():
+        # A value is only complete once a delimiter following it has been received, as a number may be cut short by a chunk (e.g. '-0.')
+        nonlocal position
+        peek()
+
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+
+                if (end < len(buffer) and buffer[end] in ' \t\n\r,:]}') or is_exhausted:
+                    position = end
+                    return value
+            except json.JSONDecodeError:
+                if is_exhausted:
+                    raise
+
+            read_more()
+
+    try:
+        consume('{')
+
+        while peek() != '}':
+            key = decode_value()
+            consume(':')
+
+            if key == array_key and peek() == '[':
+                consume('[')
+
+                while peek() != ']':
+                    item = decode_value()
+                    items.append(project_item(item) if project_item else item)
+
+                    if peek() == ',':
+                        consume(',')
+
+                consume(']')
+            else:
+                members[key] = decode_value()
+
+            if peek() == ',':
+                consume(',')
+
+        # Read the rest of the body, so that the connection can be reused
+        for chunk in chunks:
+            downloaded_bytes += len(chunk)
+    finally:
+        http_response.close()
+        RUN_METRICS.add(phase, bytes = downloaded_bytes)
+
+    return items, members
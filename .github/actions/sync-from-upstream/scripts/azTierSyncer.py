@@ -18,171 +18,163 @@
         None
 
 """
-import datetime
+import atexit
+import concurrent.futures
+import hashlib
 import json
 import os
-import requests
 import sys
 
+# Make the modules shared by all actions importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, 'shared'))
 
-def get_tiered_builtin_azure_role_definitions_from_aat():
-    """
-        Retrieves a list of tiered built-in Azure roles from the Azure Administrative Tiering (AAT) project.
-       
-        Returns:
-            list(): list of dict containing the tiered Azure roles
-
-        References:
-            https://github.com/emiliensocchi/azure-tiering
+from aztier.assets import diff_assets
+from aztier.files import write_file_if_changed
+from aztier.metrics import RUN_METRICS
+from aztier.transport import send_http_request
 
-    """
-    endpoint = 'https://raw.githubusercontent.com/emiliensocchi/azure-tiering/refs/heads/main/Azure%20roles/tiered-azure-roles.json'
-    response = requests.get(endpoint)
 
-    if response.status_code != 200:
-        print('FATAL ERROR - The tiered Azure roles could not be retrieved from the AAT project.')
-        exit()
+# Tiered built-in assets of each type in the upstream AAT project
+AAT_TIER_FILE_URIS = {
+    'azure': 'https://raw.githubusercontent.com/emiliensocchi/azure-tiering/refs/heads/main/Azure%20roles/tiered-azure-roles.json',
+    'entra': 'https://raw.githubusercontent.com/emiliensocchi/azure-tiering/refs/heads/main/Entra%20roles/tiered-entra-roles.json',
+    'msgraph': 'https://raw.githubusercontent.com/emiliensocchi/azure-tiering/refs/heads/main/Microsoft%20Graph%20application%20permissions/tiered-msgraph-app-permissions.json'
+}
 
-    tiered_azure_role_definitions = response.json()
-    return tiered_azure_role_definitions
+# Readable name of each asset type
+READABLE_ASSET_TYPES = {
+    'azure': 'Built-in Azure roles',
+    'entra': 'Built-in Entra roles',
+    'msgraph': 'Built-in MS Graph app permissions'
+}
 
 
-def get_tiered_builtin_entra_role_definitions_from_aat():
+def read_aat_cache(cache_file):
     """
-        Retrieves a list of tiered built-in Entra roles from the Azure Administrative Tiering (AAT) project.
-       
-        Returns:
-            list(): list of dict containing the tiered Entra roles
+        Retrieves the local cache of upstream AAT files.
 
-        References:
-            https://github.com/emiliensocchi/azure-tiering
+        Args:
+            cache_file(str): path to the local cache file
 
-    """
-    endpoint = 'https://raw.githubusercontent.com/emiliensocchi/azure-tiering/refs/heads/main/Entra%20roles/tiered-entra-roles.json'
-    response = requests.get(endpoint)
+        Returns:
+            dict(str:dict): dictionary mapping each asset type to its cached 'etag', upstream 'content', 'localHash' and the 
+            'keepLocalChanges' setting of its last sync, or an empty dictionary if the cache does not exist or is invalid
 
-    if response.status_code != 200:
-        print('FATAL ERROR - The tiered Entra roles could not be retrieved from the AAT project.')
-        exit()
+    """
+    try:
+        if os.path.exists(cache_file):
+            with open(cache_file, 'r', encoding = 'utf-8') as file:
+                return json.load(file)
+    except Exception:
+        print('WARNING - The local AAT cache is invalid and will be rebuilt.')
 
-    tiered_entra_role_definitions = response.json()
-    return tiered_entra_role_definitions
+    return {}
 
 
-def get_tiered_builtin_msgraph_app_permission_definitions_from_aat():
+def update_aat_cache(cache_file, aat_cache):
     """
-        Retrieves a list of tiered built-in MS Graph application permissions from the Azure Administrative Tiering (AAT) project.
-       
-        Returns:
-            list(): list of dict containing the tiered application permissions
+        Updates the local cache of upstream AAT files.
 
-        References:
-            https://github.com/emiliensocchi/azure-tiering
+        Args:
+            cache_file(str): path to the local cache file
+            aat_cache(dict(str:dict)): the cache to write
 
     """
-    endpoint = 'https://raw.githubusercontent.com/emiliensocchi/azure-tiering/refs/heads/main/Microsoft%20Graph%20application%20permissions/tiered-msgraph-app-permissions.json'
-    response = requests.get(endpoint)
-
-    if response.status_code != 200:
-        print('FATAL ERROR - The tiered MS Graph application permissions could not be retrieved from the AAT project.')
-        exit()
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok = True)
 
-    tiered_msgraph_app_permission_definitions = response.json()
-    return tiered_msgraph_app_permission_definitions
+        write_file_if_changed(cache_file, json.dumps(aat_cache))
+    except Exception:
+        print('WARNING - The local AAT cache could not be updated.')
 
 
-def find_added_assets(extended_assets, base_assets):
+def get_assets_hash(assets):
     """
-        Compares a base list with a list of extended assets, to determine the assets that have been added to the extended list.
+        Computes a hash of the passed assets, which does not depend on how they are formatted on disk.
 
         Args:
-            extended_assets(list(dict(str:str))): list of extended assets, whose length is equal to or greater than the base list
-            base_assets(list(dict(str:str))): list of base assets to compare with
+            assets(list(dict)): the assets to hash
 
         Returns:
-            list(): added assets
+            str: the SHA-256 hash of the assets
 
     """
-    if len(extended_assets) < len(base_assets):
-        print ('FATAL ERROR - Improper use of function: the length of the extended list should be equal to or greater than the length of the base list')
-        exit() 
-
-    added_assets = []
-    extended_asset_ids = [asset['id'] for asset in extended_assets]
-    base_asset_ids = [asset['id'] for asset in base_assets]
-    added_asset_ids = [asset_id for asset_id in extended_asset_ids if asset_id not in base_asset_ids]
-
-    if added_asset_ids:
-        for added_asset_id in added_asset_ids:
-            asset = [asset for asset in extended_assets if asset['id'] == added_asset_id][0]
-            added_assets.append(asset)
+    return hashlib.sha256(json.dumps(assets, sort_keys = True).encode('utf-8')).hexdigest()
 
-    return added_assets
 
-
-def find_removed_assets(extended_assets, base_assets):
+def is_in_sync_with_aat(cached_file, is_modified_upstream, tiered_assets_from_local, keep_local_changes):
     """
-        Compares a base list with a list of extended assets, to determine the assets that have been removed from the based list.
+        Checks whether the local tiered assets of a type are still in sync with the AAT project since the last sync, i.e. whether 
+        neither the upstream file, the local file nor the 'keepLocalChanges' setting have changed since then.
 
         Args:
-            extended_assets(list(dict(str:str))): list of extended assets, whose length is equal to or greater than the base list
-            base_assets(list(dict(str:str))): list of base assets to compare with
-        
+            cached_file(dict): the cached upstream file of the asset type, with the 'localHash' and 'keepLocalChanges' of the last sync
+            is_modified_upstream(bool): whether the upstream file has been modified since it was cached
+            tiered_assets_from_local(list(dict)): the local tiered assets of the asset type
+            keep_local_changes(bool): whether local changes applied to built-in assets are preserved
+
         Returns:
-            list(): removed assets
-            
-    """
-    if len(extended_assets) < len(base_assets):
-        print ('FATAL ERROR - Improper use of function: the length of the extended list should be equal to or greater than the length of the base list')
-        exit() 
+            bool: True if the local tiered assets are in sync with the AAT project, otherwise False
 
-    removed_assets = []
-    extended_asset_ids = [asset['id'] for asset in extended_assets]
-    base_asset_ids = [asset['id'] for asset in base_assets]
-    removed_asset_ids = [asset_id for asset_id in base_asset_ids if asset_id not in extended_asset_ids]
+    """
+    if is_modified_upstream:
+        return False
 
-    if removed_asset_ids:
-        for removed_asset_id in removed_asset_ids:
-            asset = [asset for asset in base_assets if asset['id'] == removed_asset_id][0]
-            removed_assets.append(asset)
+    if cached_file.get('keepLocalChanges') != keep_local_changes:
+        return False
 
-    return removed_assets
+    return cached_file.get('localHash') == get_assets_hash(tiered_assets_from_local)
 
 
-def find_modified_assets(extended_assets, base_assets):
+def get_tiered_builtin_assets_from_aat(aat_cache):
     """
-        Compares a base list with a list of extended assets, to determine the assets that have been modified in the extended list.
+        Retrieves the tiered built-in assets of all types from the Azure Administrative Tiering (AAT) project.
+        The upstream files are requested concurrently, and revalidated with their cached ETag, so that an unmodified file
+        is not downloaded again. The passed cache is updated in place with the new ETags and contents.
 
         Args:
-            extended_assets(list(dict(str:str))): list of extended assets, whose length is equal to or greater than the base list
-            base_assets(list(dict(str:str))): list of base assets to compare with
+            aat_cache(dict(str:dict)): the local cache of upstream AAT files
 
         Returns:
-            list(): modified assets
+            dict(str:tuple(list(dict), bool)): dictionary mapping each asset type to its tiered built-in assets, and whether
+            those have been modified upstream since they were cached
+
+        References:
+            https://github.com/emiliensocchi/azure-tiering
 
     """
-    if len(extended_assets) < len(base_assets):
-        print ('FATAL ERROR - Improper use of function: the length of the extended list should be equal to or greater than the length of the base list')
-        exit() 
+    tiered_builtin_assets = {}
+    pending_responses = {}
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers = len(AAT_TIER_FILE_URIS)) as executor:
+        for asset_type, endpoint in AAT_TIER_FILE_URIS.items():
+            cached_file = aat_cache.get(asset_type) or {}
+            headers = {}
+
+            if cached_file.get('etag') and 'content' in cached_file:
+                headers['If-None-Match'] = cached_file['etag']
 
-    modified_assets = []
+            pending_responses[asset_type] = executor.submit(send_http_request, 'GET', endpoint, headers = headers)
 
-    for base_asset in base_assets:
-        base_asset_id = base_asset['id']
-        extended_asset = next((asset for asset in extended_assets if asset["id"] == base_asset_id), None)
+    for asset_type, pending_response in pending_responses.items():
+        response = pending_response.result()
 
-        if extended_assets:
-            base_asset_properties = base_asset.keys()
-            extended_asset_properties = extended_asset.keys()
+        if response.status_code == 304:
+            tiered_builtin_assets[asset_type] = (aat_cache[asset_type]['content'], False)
+            continue
 
-            for base_asset_property in base_asset_properties:
-                if base_asset_property in extended_asset_properties:
-                    is_asset_modified = base_asset[base_asset_property] != extended_asset[base_asset_property]
+        if response.status_code != 200:
+            print(f"FATAL ERROR - The tiered {READABLE_ASSET_TYPES[asset_type].lower()} could not be retrieved from the AAT project.")
+            exit()
 
-                    if is_asset_modified:
-                        modified_assets.append(base_asset)
+        content = response.json()
+        aat_cache[asset_type] = {
+            'etag': response.headers.get('ETag', ''),
+            'content': content
+        }
+        tiered_builtin_assets[asset_type] = (content, True)
 
-    return modified_assets
+    return tiered_builtin_assets
 
 
 def read_tiered_json_file(tiered_json_file):
@@ -223,8 +215,7 @@ def update_tiered_assets(tiered_json_file, tiered_assets):
 
     """
     try:
-        with open(tiered_json_file, 'w', encoding = 'utf-8') as file:
-            file.write(json.dumps(tiered_assets, indent = 4))
+        write_file_if_changed(tiered_json_file, json.dumps(tiered_assets, indent = 4))
     except FileNotFoundError:
         print('FATAL ERROR - The tiered file could not be updated.')
         exit()
@@ -276,68 +267,81 @@ def run_sync_workflow(keep_local_changes, role_type, tiered_builtin_roles_from_a
     tiered_builtin_roles_from_local = [role for role in tiered_all_roles_from_local if role['assetType'] == 'Built-in']
     role_type = role_type.lower()
 
-    if role_type == 'azure':
-        # Added Azure roles
-        added_tiered_azure_roles = find_added_assets(tiered_builtin_roles_from_aat, tiered_builtin_roles_from_local)
+    if role_type not in ['azure', 'entra']:
+        print ('FATAL ERROR - Improper use of function: the value of the role_type parameter is invalid. Accepted values are: azure, entra')
+        exit() 
 
-        for added_azure_role in added_tiered_azure_roles:
-            enriched_added_azure_role = enrich_asset_with_type(added_azure_role, 'builtin')
-            tiered_all_roles_from_local.append(enriched_added_azure_role)
+    added_tiered_roles, removed_tiered_roles, modified_tiered_roles = diff_assets(tiered_builtin_roles_from_aat, tiered_builtin_roles_from_local)
 
-        # Modified Azure roles
-        if not keep_local_changes:
-            modified_tiered_azure_roles = find_modified_assets(tiered_builtin_roles_from_aat, tiered_builtin_roles_from_local)
+    # Added roles
+    for added_role in added_tiered_roles:
+        enriched_added_role = enrich_asset_with_type(added_role, 'builtin')
+        tiered_all_roles_from_local.append(enriched_added_role)
 
-            for modified_tiered_azure_role in modified_tiered_azure_roles:
-                tiered_azure_roles_from_aat = [role for role in tiered_builtin_roles_from_aat if role['id'] == modified_tiered_azure_role['id']]
+    # Modified roles
+    if not keep_local_changes:
+        local_role_index_by_id = { role['id']: index for index, role in enumerate(tiered_all_roles_from_local) }
 
-                if len(tiered_azure_roles_from_aat) > 0:
-                    tiered_azure_role_from_aat = tiered_azure_roles_from_aat[0]
-                    enriched_tiered_azure_role_from_aat = enrich_asset_with_type(tiered_azure_role_from_aat, 'builtin')
-                    index = next((i for i, role in enumerate(tiered_all_roles_from_local) if role['id'] == modified_tiered_azure_role['id']), None)
-                    tiered_all_roles_from_local[index] = enriched_tiered_azure_role_from_aat
+        for modified_tiered_role in modified_tiered_roles:
+            enriched_tiered_role_from_aat = enrich_asset_with_type(modified_tiered_role['asset'], 'builtin')
+            index = local_role_index_by_id[modified_tiered_role['id']]
+            tiered_all_roles_from_local[index] = enriched_tiered_role_from_aat
 
-        # Removed Azure roles
-        removed_tiered_azure_roles = find_removed_assets(tiered_builtin_roles_from_aat, tiered_builtin_roles_from_local)
-        removed_tiered_built_in_azure_role = [role for role in removed_tiered_azure_roles if role['assetType'] == 'Built-in']   # Custom roles should always be preserved
+    # Removed roles
+    removed_tiered_built_in_role_ids = set(role['id'] for role in removed_tiered_roles if role['assetType'] == 'Built-in')   # Custom roles should always be preserved
 
-        for removed_azure_role in removed_tiered_built_in_azure_role:
-            removed_azure_role_id = removed_azure_role['id']
-            tiered_all_roles_from_local = [role for role in tiered_all_roles_from_local if role['id'] != removed_azure_role_id]
+    if removed_tiered_built_in_role_ids:
+        tiered_all_roles_from_local = [role for role in tiered_all_roles_from_local if role['id'] not in removed_tiered_built_in_role_ids]
 
-    elif role_type == 'entra':
-        # Added Entra roles
-        added_tiered_entra_roles = find_added_assets(tiered_builtin_roles_from_aat, tiered_builtin_roles_from_local)
+    return tiered_all_roles_from_local
 
-        for added_entra_role in added_tiered_entra_roles:
-            enriched_added_entra_role = enrich_asset_with_type(added_entra_role, 'builtin')
-            tiered_all_roles_from_local.append(enriched_added_entra_role)
 
-        # Modified Entra roles
-        if not keep_local_changes:
-            modified_tiered_entra_roles = find_modified_assets(tiered_builtin_roles_from_aat, tiered_builtin_roles_from_local)
+def sync_tiered_assets_with_aat(keep_local_changes, asset_type, tiered_assets_from_local, tiered_builtin_assets_from_aat):
+    """
+        Synchronizes the passed locally-tiered assets with their latest upstream version from AAT.
 
-            for modified_tiered_entra_role in modified_tiered_entra_roles:
-                tiered_entra_roles_from_aat = [role for role in tiered_builtin_roles_from_aat if role['id'] == modified_tiered_entra_role['id']]
+        Args:
+            keep_local_changes(bool): whether local changes applied to built-in assets are preserved
+            asset_type(str): the type of assets to synchronize (accepted values: 'azure', 'entra', 'msgraph')
+            tiered_assets_from_local(list(dict)): list of all assets currently tiered locally
+            tiered_builtin_assets_from_aat(list(dict)): list of built-in assets tiered upstream
 
-                if len(tiered_entra_roles_from_aat) > 0:
-                    tiered_entra_role_from_aat = tiered_entra_roles_from_aat[0]
-                    enriched_tiered_entra_role_from_aat = enrich_asset_with_type(tiered_entra_role_from_aat, 'builtin')
-                    index = next((i for i, role in enumerate(tiered_all_roles_from_local) if role['id'] == modified_tiered_entra_role['id']), None)
-                    tiered_all_roles_from_local[index] = enriched_tiered_entra_role_from_aat
+        Returns:
+            list(dict): list of synchronized assets
+            bool: True if the synchronized assets differ from the local ones, False otherwise
 
-        # Removed Entra roles
-        removed_tiered_entra_roles = find_removed_assets(tiered_builtin_roles_from_aat, tiered_builtin_roles_from_local)
-        removed_tiered_built_in_entra_role = [role for role in removed_tiered_entra_roles if role['assetType'] == 'Built-in']   # Custom roles should always be preserved
+    """
+    asset_type = asset_type.lower()
+
+    if asset_type not in READABLE_ASSET_TYPES:
+        print ('FATAL ERROR - Improper use of function: the value of the asset_type parameter is invalid. Accepted values are: azure, entra, msgraph')
+        exit()
 
-        for removed_role in removed_tiered_built_in_entra_role:
-            removed_role_id = removed_role['id']
-            tiered_all_entra_roles_from_local = [role for role in tiered_all_entra_roles_from_local if role['id'] != removed_role_id]
+    readable_asset_type = READABLE_ASSET_TYPES[asset_type]
+
+    if asset_type == 'msgraph':
+        # Local changes are always overridden, as custom MS Graph application permissions do not exist
+        updated_tiered_assets = [enrich_asset_with_type(asset, 'builtin') for asset in tiered_builtin_assets_from_aat]
     else:
-        print ('FATAL ERROR - Improper use of function: the value of the role_type parameter is invalid. Accepted values are: azure, entra')
-        exit() 
+        updated_tiered_assets = run_sync_workflow(keep_local_changes, asset_type, tiered_builtin_assets_from_aat, tiered_assets_from_local[:])
 
-    return tiered_all_roles_from_local
+    has_aat_been_updated = False if (updated_tiered_assets == tiered_assets_from_local) else True
+
+    if not has_aat_been_updated:
+        print (f"{readable_asset_type}: no changes")
+        return tiered_assets_from_local, False
+
+    if asset_type != 'msgraph':
+        updated_tiered_assets = sorted(updated_tiered_assets, key=lambda x: (x['tier'], x['assetName']))
+
+    has_aat_been_updated = False if (len(updated_tiered_assets) == len(tiered_assets_from_local)) else True
+
+    if has_aat_been_updated:
+        print (f"{readable_asset_type}: changes have been detected and merged from AAT")
+    else:
+        print (f"{readable_asset_type}: no changes detected in AAT, but local changes have been overridden")
+
+    return updated_tiered_assets, True
 
 
 if __name__ == "__main__":
@@ -349,6 +353,14 @@ if __name__ == "__main__":
     # Set local config file
     config_file = root_dir + 'config.json'
 
+    # Set local cache files
+    cache_dir = root_dir + '.cache'
+    aat_cache_file = f"{cache_dir}/aat-tier-files.json"
+    metrics_file = f"{cache_dir}/metrics/azTierSyncer.json"
+
+    # Write the metrics of the run when it ends, including when it fails
+    atexit.register(RUN_METRICS.write_summary, metrics_file, 'AzTierSyncer')
+
     # Set local tier files
     azure_dir = root_dir + 'Azure roles'
     entra_dir = root_dir + 'Entra roles'
@@ -376,69 +388,31 @@ if __name__ == "__main__":
 
     keep_local_changes = True if keep_local_changes_config == 'true' else False
 
-    # Get tiered built-in roles/permissions from local files
-    tiered_builtin_azure_roles = read_tiered_json_file(azure_roles_tier_file)
-    tiered_builtin_entra_roles = read_tiered_json_file(entra_roles_tier_file)
-    tiered_builtin_msgraph_app_permissions = read_tiered_json_file(msgraph_app_permissions_tier_file)
-    
-    # Update locally-tiered Azure roles with the latest upstream version from AAT
-    tiered_all_azure_roles_from_local = read_tiered_json_file(azure_roles_tier_file)
-    tiered_builtin_azure_roles_from_aat = get_tiered_builtin_azure_role_definitions_from_aat()
-
-    updated_tiered_all_azure_roles_from_local = run_sync_workflow(keep_local_changes, 'azure', tiered_builtin_azure_roles_from_aat, tiered_all_azure_roles_from_local[:])
-    has_aat_been_updated = False if (updated_tiered_all_azure_roles_from_local == tiered_all_azure_roles_from_local) else True
+    # Update locally-tiered roles and permissions with the latest upstream version from AAT
+    tier_files = {
+        'azure': azure_roles_tier_file,
+        'entra': entra_roles_tier_file,
+        'msgraph': msgraph_app_permissions_tier_file
+    }
 
-    if has_aat_been_updated:
-        has_aat_been_updated = False if (len(updated_tiered_all_azure_roles_from_local) == len(tiered_all_azure_roles_from_local)) else True
-        tiered_all_azure_roles_from_local = sorted(updated_tiered_all_azure_roles_from_local, key=lambda x: (x['tier'], x['assetName']))
-        update_tiered_assets(azure_roles_tier_file, tiered_all_azure_roles_from_local)
-
-        if has_aat_been_updated:
-            print ('Built-in Azure roles: changes have been detected and merged from AAT')
-        else:
-            print ('Built-in Azure roles: no changes detected in AAT, but local changes have been overridden')
-    else:
-        print ('Built-in Azure roles: no changes')
-
-    # Update locally-tiered Entra roles with the latest upstream version from AAT
-    tiered_all_entra_roles_from_local = read_tiered_json_file(entra_roles_tier_file)
-    tiered_builtin_entra_roles_from_aat = get_tiered_builtin_entra_role_definitions_from_aat()
+    aat_cache = read_aat_cache(aat_cache_file)
+    tiered_builtin_assets_from_aat = get_tiered_builtin_assets_from_aat(aat_cache)
 
-    updated_tiered_all_entra_roles_from_local = run_sync_workflow(keep_local_changes, 'entra', tiered_builtin_entra_roles_from_aat, tiered_all_entra_roles_from_local[:])
-    has_aat_been_updated = False if (updated_tiered_all_entra_roles_from_local == tiered_all_entra_roles_from_local) else True
+    for asset_type, tier_file in tier_files.items():
+        tiered_assets_from_local = read_tiered_json_file(tier_file)
+        tiered_builtin_assets, is_modified_upstream = tiered_builtin_assets_from_aat[asset_type]
 
-    if has_aat_been_updated:
-        has_aat_been_updated = False if (len(updated_tiered_all_entra_roles_from_local) == len(tiered_all_entra_roles_from_local)) else True
-        tiered_all_entra_roles_from_local = sorted(updated_tiered_all_entra_roles_from_local, key=lambda x: (x['tier'], x['assetName']))
-        update_tiered_assets(entra_roles_tier_file, tiered_all_entra_roles_from_local)
-
-        if has_aat_been_updated:
-            print ('Built-in Entra roles: changes have been detected and merged from AAT')
-        else:
-            print ('Built-in Entra roles: no changes detected in AAT, but local changes have been overridden')
-    else:
-        print ('Built-in Entra roles: no changes')
+        # Nothing to merge if neither the upstream file, the local file nor the way local changes are handled have changed since the last sync
+        if is_in_sync_with_aat(aat_cache[asset_type], is_modified_upstream, tiered_assets_from_local, keep_local_changes):
+            print (f"{READABLE_ASSET_TYPES[asset_type]}: not modified upstream")
+            continue
 
-    # Update locally-tiered MS Graph application permissions with the latest upstream version from AAT
-    tiered_builtin_msgraph_app_permissions_from_aat = get_tiered_builtin_msgraph_app_permission_definitions_from_aat()    
-    local_tiered_builtin_msgraph_app_permissions = read_tiered_json_file(msgraph_app_permissions_tier_file)
+        updated_tiered_assets, has_been_updated = sync_tiered_assets_with_aat(keep_local_changes, asset_type, tiered_assets_from_local, tiered_builtin_assets)
 
-    # Enrich each permission with its asset type
-    enriched_tiered_builtin_msgraph_app_permissions_from_aat = []
+        if has_been_updated:
+            update_tiered_assets(tier_file, updated_tiered_assets)
 
-    for app_permission in tiered_builtin_msgraph_app_permissions_from_aat:
-        enriched_app_permission = enrich_asset_with_type(app_permission, 'builtin')
-        enriched_tiered_builtin_msgraph_app_permissions_from_aat.append(enriched_app_permission)
+        aat_cache[asset_type]['localHash'] = get_assets_hash(updated_tiered_assets)
+        aat_cache[asset_type]['keepLocalChanges'] = keep_local_changes
 
-    has_aat_been_updated = True if enriched_tiered_builtin_msgraph_app_permissions_from_aat != local_tiered_builtin_msgraph_app_permissions else False
-
-    if has_aat_been_updated:
-        has_aat_been_updated = False if (len(enriched_tiered_builtin_msgraph_app_permissions_from_aat) == len(local_tiered_builtin_msgraph_app_permissions)) else True
-        update_tiered_assets(msgraph_app_permissions_tier_file, enriched_tiered_builtin_msgraph_app_permissions_from_aat)
-
-        if has_aat_been_updated:
-            print ('Built-in MS Graph app permissions: changes have been detected and merged from AAT')
-        else:
-            print ('Built-in MS Graph app permissions: no changes detected in AAT, but local changes have been overridden')
-    else:
-        print ('Built-in MS Graph app permissions: no changes')
+    update_aat_cache(aat_cache_file, aat_cache)
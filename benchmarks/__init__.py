@@ -0,0 +1,18 @@
+"""
+    Name: 
+        benchmarks
+
+    Author: 
+        Emilien Socchi
+
+    Description:  
+        Offline benchmarks of the scripts run by the actions. Each benchmark is run from the root of the repository as a module 
+        (e.g. 'python3 -m benchmarks.diff_assets'), and prints its results as a Markdown table.
+
+"""
+import os
+import sys
+
+# Make the modules shared by all actions importable
+SHARED_MODULES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.github', 'actions', 'shared')
+sys.path.insert(0, SHARED_MODULES_DIR)
@@ -0,0 +1,135 @@
+"""
+    Name:
+        arm_batch_client
+
+    Author:
+        Emilien Socchi
+
+    Description:
+        Measures the throughput of the ARM batch client and its throttle scheduler (see aztier.arm) against the local stand-in for
+        ARM (see mock_azure), while the stand-in injects the faults of each fault profile below into its '/batch' endpoint.
+        For each profile, the benchmark reports the sub-requests completed per second, the HTTP requests received by the stand-in
+        (including polls, pages and retries), and the time slept by the client to honour throttling and asynchronous batches.
+        As chunks are sent concurrently, the time slept is summed over all chunks and may exceed the wall time.
+
+    Usage:
+        python3 -m benchmarks.arm_batch_client [--sub-requests 2000] [--profiles none,throttled,...] [--concurrency 4]
+
+"""
+import argparse
+import time
+import uuid
+
+# The shared modules are importable once the benchmarks package has been loaded
+from aztier import arm
+from aztier.arm import ARM_THROTTLE_SCHEDULER, send_batch_request_to_arm
+from aztier.metrics import RUN_METRICS
+from benchmarks.mock_azure import FaultInjectingRequestHandler, MockAzureServer, SyntheticTenant
+
+
+# Faults injected by the stand-in for each profile (see DEFAULT_FAULT_PROFILE in mock_azure)
+FAULT_PROFILES = {
+    'none': {},
+    'throttled': { 'throttleRatio': 0.1 },
+    'heavily-throttled': { 'throttleRatio': 0.5 },
+    'throttled-batches': { 'batchThrottleRatio': 0.2 },
+    'asynchronous': { 'asyncRatio': 0.5, 'asyncPollCount': 2 },
+    'paged': { 'batchPageSize': 50 },
+    'slow': { 'latencySeconds': (0.05, 0.25) },
+    'mixed': { 'throttleRatio': 0.1, 'asyncRatio': 0.3, 'batchPageSize': 100, 'latencySeconds': (0.01, 0.1) }
+}
+
+
+def create_batch_requests(tenant, sub_request_count, base_uri):
+    """
+        Creates batch requests reading role definitions at the subscriptions of the passed tenant, in turn.
+        Requests targeting different subscriptions consume tokens from different buckets of the throttle scheduler.
+
+        Args:
+            tenant(SyntheticTenant): the tenant served by the stand-in
+            sub_request_count(int): number of batch requests to create
+            base_uri(str): the ARM endpoint of the stand-in
+
+        Returns:
+            list(dict): the batch requests
+
+    """
+    role_guids = list(tenant.role_definitions)
+    batch_requests = []
+
+    for position in range(sub_request_count):
+        subscription_id = tenant.subscription_ids[position % len(tenant.subscription_ids)]
+        role_guid = role_guids[position % len(role_guids)]
+        batch_requests.append({
+            "name": str(uuid.uuid4()),
+            "httpMethod": "GET",
+            "url": f"{base_uri}{subscription_id}/providers/Microsoft.Authorization/roleDefinitions/{role_guid}?api-version=2022-04-01"
+        })
+
+    return batch_requests
+
+
+def measure_batch_client(tenant, fault_profile, sub_request_count, max_concurrent_batches, seed):
+    """
+        Sends batch requests to a new stand-in injecting the passed faults, and measures how the batch client copes with them.
+
+        Args:
+            tenant(SyntheticTenant): the tenant served by the stand-in
+            fault_profile(dict): the faults injected by the stand-in
+            sub_request_count(int): number of batch requests to send
+            max_concurrent_batches(int): maximum number of chunks in flight at the same time
+            seed(int): seed of the generator drawing the injected faults
+
+        Returns:
+            dict: the wall time (s), the run metrics, the number of HTTP requests received by the stand-in, and the number of
+                  successful responses returned by the client (or None if the batch request has failed)
+
+    """
+    server = MockAzureServer(tenant, handler_class = FaultInjectingRequestHandler, fault_profile = fault_profile, seed = seed)
+    environment = server.start()
+
+    try:
+        # Point the batch client at the stand-in, with fresh metrics and token buckets
+        arm.ARM_BASE_URI = environment['ARM_ENDPOINT']
+        RUN_METRICS.reset()
+        ARM_THROTTLE_SCHEDULER.reset()
+        batch_requests = create_batch_requests(tenant, sub_request_count, environment['ARM_ENDPOINT'])
+
+        started = time.perf_counter()
+        responses = send_batch_request_to_arm(environment['ARM_ACCESS_TOKEN'], batch_requests, max_concurrent_batches)
+        wall_seconds = time.perf_counter() - started
+
+        return {
+            'wallSeconds': wall_seconds,
+            'runMetrics': RUN_METRICS.get_summary()['total'],
+            'serverRequests': server.request_count,
+            'successfulResponses': None if responses is None else sum(1 for response in responses if response['httpStatusCode'] == 200)
+        }
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = 'Benchmarks the ARM batch client against a local stand-in injecting faults.')
+    parser.add_argument('--sub-requests', type = int, default = 2000, help = 'number of batch requests sent for each fault profile')
+    parser.add_argument('--profiles', default = ','.join(FAULT_PROFILES), help = 'comma-separated fault profiles to run')
+    parser.add_argument('--concurrency', type = int, default = arm.MAX_CONCURRENT_ARM_BATCHES, help = 'maximum number of batch chunks in flight')
+    parser.add_argument('--scopes', type = int, default = 1000, help = 'approximate number of scopes of the synthetic tenant')
+    parser.add_argument('--seed', type = int, default = 0, help = 'seed of the synthetic tenant and of the injected faults')
+    arguments = parser.parse_args()
+
+    tenant = SyntheticTenant(arguments.scopes, arguments.seed)
+
+    print ('| Fault profile | Wall time (s) | Sub-requests/s | HTTP requests | Retries | Throttled | Slept (s) | Complete |')
+    print ('|---|---|---|---|---|---|---|---|')
+
+    for profile_name in arguments.profiles.split(','):
+        if profile_name not in FAULT_PROFILES:
+            print (f"FATAL ERROR - Unknown fault profile '{profile_name}'. Accepted values are: {', '.join(FAULT_PROFILES)}")
+            exit()
+
+        result = measure_batch_client(tenant, FAULT_PROFILES[profile_name], arguments.sub_requests, arguments.concurrency, arguments.seed)
+        total = result['runMetrics']
+        is_complete = result['successfulResponses'] == arguments.sub_requests
+        print (f"| {profile_name} | {result['wallSeconds']:.2f} | {arguments.sub_requests / result['wallSeconds']:.0f} | {result['serverRequests']} | {total['retries']} | {total['throttled']} | {total['sleptSeconds']:.2f} | {'yes' if is_complete else 'no'} |")
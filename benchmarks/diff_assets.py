@@ -0,0 +1,101 @@
+"""
+    Name: 
+        diff_assets
+
+    Author: 
+        Emilien Socchi
+
+    Description:  
+        Measures the time taken by diff_assets to compare lists of 1k up to 1M assets, to show that it scales linearly.
+        The extended list keeps 90% of the base assets (of which 5% are modified) and adds 10% of new assets.
+
+    Usage:
+        python3 -m benchmarks.diff_assets [--sizes 1000,10000,100000,1000000] [--repeat 3]
+
+"""
+import argparse
+import gc
+import time
+
+# The shared modules are importable once the benchmarks package has been loaded
+from aztier.assets import diff_assets
+
+
+def generate_assets(size):
+    """
+        Generates a base and an extended list of synthetic tiered assets.
+
+        Args:
+            size(int): number of assets in the base list
+
+        Returns:
+            tuple(list(dict), list(dict)): the base assets, and the extended assets
+
+    """
+    base_assets = []
+    extended_assets = []
+
+    for position in range(size):
+        asset = {
+            'tier': str(position % 4),
+            'id': f"00000000-0000-0000-0000-{position:012d}",
+            'assetType': 'Built-in',
+            'assetName': f"Role {position}",
+            'worstCaseScenario': 'Synthetic asset'
+        }
+        base_assets.append(asset)
+
+        if position % 10 == 0:
+            # Removed from the extended list
+            continue
+
+        if position % 20 == 1:
+            asset = dict(asset, tier = str((position + 1) % 4))
+
+        extended_assets.append(asset)
+
+    for position in range(size, size + size // 10):
+        extended_assets.append({
+            'tier': '0',
+            'id': f"00000000-0000-0000-0000-{position:012d}",
+            'assetType': 'Built-in',
+            'assetName': f"Role {position}",
+            'worstCaseScenario': 'Synthetic asset'
+        })
+
+    return base_assets, extended_assets
+
+
+def measure_diff_assets(size, repeat):
+    """
+        Returns the best time (in seconds) taken by diff_assets to compare the synthetic lists of the passed size, and its result.
+
+    """
+    base_assets, extended_assets = generate_assets(size)
+    best_seconds = None
+
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        result = diff_assets(extended_assets, base_assets)
+        elapsed_seconds = time.perf_counter() - started
+        best_seconds = elapsed_seconds if best_seconds is None else min(best_seconds, elapsed_seconds)
+
+    return best_seconds, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = 'Benchmarks diff_assets on synthetic lists of assets.')
+    parser.add_argument('--sizes', default = '1000,10000,100000,1000000', help = 'comma-separated sizes of the base list')
+    parser.add_argument('--repeat', type = int, default = 3, help = 'number of runs per size (the best one is reported)')
+    arguments = parser.parse_args()
+
+    print ('| Assets | Added | Removed | Modified | Time (s) | Time per asset (µs) | Growth vs. previous size |')
+    print ('|---|---|---|---|---|---|---|')
+    previous = None
+
+    for size in [int(size) for size in arguments.sizes.split(',')]:
+        elapsed_seconds, (added_assets, removed_assets, modified_assets) = measure_diff_assets(size, arguments.repeat)
+        growth = f"x{elapsed_seconds / previous[1]:.1f} for x{size / previous[0]:.0f} assets" if previous else '-'
+        print (f"| {size} | {len(added_assets)} | {len(removed_assets)} | {len(modified_assets)} | {elapsed_seconds:.3f} | {elapsed_seconds / size * 1e6:.2f} | {growth} |")
+        previous = (size, elapsed_seconds)
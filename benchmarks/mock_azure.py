@@ -0,0 +1,588 @@
+"""
+    Name:
+        mock_azure
+
+    Author:
+        Emilien Socchi
+
+    Description:
+        Local stand-in for the subset of ARM and MS Graph used by the scripts, serving a deterministic synthetic tenant.
+        ARM is served under '/arm' and MS Graph under '/graph', so that the scripts are pointed at the stand-in with:
+            - ARM_ENDPOINT=http://<host>:<port>/arm
+            - MSGRAPH_ENDPOINT=http://<host>:<port>/graph
+
+        The following endpoints are implemented (API versions are ignored):
+            - ARM: '/batch', management group descendants, management groups, subscriptions, resource groups, resources,
+              role assignments, PIM schedule instances (active and eligible), role definitions and Azure Resource Graph queries
+            - MS Graph: '/v1.0/$batch', with role definitions and service principals as individual requests
+
+        Faults can be injected into the ARM '/batch' endpoint with a fault profile (see DEFAULT_FAULT_PROFILE), served by
+        FaultInjectingRequestHandler: throttled individual requests (429 with 'Retry-After'), throttled batches, asynchronous
+        batches (202 with a 'Location' to poll), paged batch results and added latency. Faults are drawn from a seeded generator.
+
+        Authentication is not checked, but the scripts expect the ARM access token to carry the Id of the tenant in its 'tid' claim
+        (see get_access_token).
+
+    Usage:
+        python3 -m benchmarks.mock_azure [--scopes 1000] [--port 8080] [--faults '{"throttleRatio": 0.1}']
+
+"""
+import argparse
+import base64
+import http.server
+import json
+import math
+import random
+import threading
+import time
+import urllib.parse
+import uuid
+
+
+# Number of items per page of the listings served by the stand-in (ARM typically pages role assignments by 1000)
+DEFAULT_PAGE_SIZE = 1000
+
+# Number of built-in Azure role definitions in a synthetic tenant, of which the first half are assigned
+BUILT_IN_ROLE_COUNT = 400
+
+# Number of custom Azure role and custom Entra role definitions in a synthetic tenant
+CUSTOM_ROLE_COUNT = 20
+
+# Number of scopes of each synthetic subscription, including the subscription itself (9 resource groups of 10 resources)
+SCOPES_PER_SUBSCRIPTION = 100
+
+# Number of subscriptions placed under each synthetic management group
+SUBSCRIPTIONS_PER_MANAGEMENT_GROUP = 10
+
+# Ratios of the scopes holding a permanent (or active) assignment and an eligible assignment
+ASSIGNMENT_RATIO = 0.2
+ELIGIBLE_ASSIGNMENT_RATIO = 0.05
+
+# Namespace of the deterministic Ids generated for a synthetic tenant
+SYNTHETIC_ID_NAMESPACE = uuid.UUID('6f6b1c3e-1d1c-4a8e-9d1f-5b7b0e0c2a10')
+
+# Faults injected into the ARM '/batch' endpoint by FaultInjectingRequestHandler, none by default:
+#   - throttleRatio: share of individual requests answered with a 429 and 'Retry-After: retryAfterSeconds'
+#   - batchThrottleRatio: share of whole batches answered with a 429 and 'Retry-After: retryAfterSeconds'
+#   - asyncRatio: share of batches answered with a 202 and a 'Location', polled asyncPollCount times every pollRetryAfterSeconds
+#   - batchPageSize: number of individual responses per page of batch results, linked with a 'nextLink'
+#   - latencySeconds: range of the latency added to each response of the '/batch' endpoint
+DEFAULT_FAULT_PROFILE = {
+    'throttleRatio': 0.0,
+    'batchThrottleRatio': 0.0,
+    'retryAfterSeconds': 1,
+    'asyncRatio': 0.0,
+    'asyncPollCount': 1,
+    'pollRetryAfterSeconds': 1,
+    'batchPageSize': 500,
+    'latencySeconds': (0.0, 0.0)
+}
+
+
+class SyntheticTenant:
+    """
+        Deterministic synthetic tenant with the passed number of scopes, organized as follows:
+            - a Tenant Root Management Group, with child management groups of 10 subscriptions each
+            - an additional management group without subscriptions, holding an assignment (as only ARM lists it by default)
+            - subscriptions of 9 resource groups, each holding 10 resources
+        Role assignments, active and eligible PIM assignments are spread randomly over the scopes, using the passed seed.
+
+    """
+    def __init__(self, scope_count, seed = 0):
+        """
+            Args:
+                scope_count(int): approximate number of scopes (management groups, subscriptions, resource groups and resources)
+                seed(int): seed of the random distribution of assignments
+
+        """
+        randomizer = random.Random(seed)
+        generate_id = lambda name: str(uuid.uuid5(SYNTHETIC_ID_NAMESPACE, f"{seed}/{name}"))
+        subscription_count = max(1, math.ceil(scope_count / SCOPES_PER_SUBSCRIPTION))
+        management_group_count = math.ceil(subscription_count / SUBSCRIPTIONS_PER_MANAGEMENT_GROUP)
+
+        self.tenant_id = generate_id('tenant')
+        self.root_id = f"/providers/Microsoft.Management/managementGroups/{self.tenant_id}"
+        self.parents = { self.root_id: '/' }
+        self.management_group_ids = [self.root_id]
+        self.subscription_ids = []
+        self.resource_group_ids = {}
+        self.resource_ids = {}
+
+        for position in range(management_group_count + 1):
+            management_group_id = f"/providers/Microsoft.Management/managementGroups/mg-{position}"
+            self.management_group_ids.append(management_group_id)
+            self.parents[management_group_id] = self.root_id
+
+        for position in range(subscription_count):
+            subscription_id = f"/subscriptions/{generate_id('subscription-' + str(position))}"
+            self.subscription_ids.append(subscription_id)
+            self.parents[subscription_id] = self.management_group_ids[1 + position // SUBSCRIPTIONS_PER_MANAGEMENT_GROUP]
+            self.resource_group_ids[subscription_id] = []
+            self.resource_ids[subscription_id] = []
+
+            for group_position in range(9):
+                resource_group_id = f"{subscription_id}/resourceGroups/rg-{group_position}"
+                self.resource_group_ids[subscription_id].append(resource_group_id)
+                self.parents[resource_group_id] = subscription_id
+
+                for resource_position in range(10):
+                    resource_id = f"{resource_group_id}/providers/Microsoft.Storage/storageAccounts/st{group_position}x{resource_position}"
+                    self.resource_ids[subscription_id].append(resource_id)
+                    self.parents[resource_id] = resource_group_id
+
+        # Role definitions
+        self.role_definitions = {}
+
+        for position in range(BUILT_IN_ROLE_COUNT + CUSTOM_ROLE_COUNT):
+            role_type = 'BuiltInRole' if position < BUILT_IN_ROLE_COUNT else 'CustomRole'
+            role_guid = generate_id(f"role-{position}")
+            self.role_definitions[role_guid] = {
+                'id': f"/providers/Microsoft.Authorization/roleDefinitions/{role_guid}",
+                'name': role_guid,
+                'type': 'Microsoft.Authorization/roleDefinitions',
+                'properties': {
+                    'roleName': f"Synthetic {'built-in' if role_type == 'BuiltInRole' else 'custom'} role {position}",
+                    'type': role_type,
+                    'description': f"Synthetic role definition {position}",
+                    'assignableScopes': ['/'],
+                    'permissions': [{ 'actions': [f"Microsoft.Synthetic/resource{position}/read"], 'notActions': [] }]
+                }
+            }
+
+        assignable_role_guids = list(self.role_definitions)[:BUILT_IN_ROLE_COUNT // 2] + list(self.role_definitions)[BUILT_IN_ROLE_COUNT:]
+        self.entra_role_definitions = [
+            { 'id': generate_id(f"entra-role-{position}"), 'displayName': f"Synthetic custom Entra role {position}", 'description': 'Synthetic role definition', 'isBuiltIn': False }
+            for position in range(CUSTOM_ROLE_COUNT)
+        ]
+
+        # Assignments at each scope, for each type of assignment
+        self.assignments = { 'roleAssignments': {}, 'roleAssignmentScheduleInstances': {}, 'roleEligibilityScheduleInstances': {} }
+        self.assignments['roleAssignments'][self.management_group_ids[-1]] = [assignable_role_guids[0]]
+
+        for scope_id in self.parents:
+            if randomizer.random() < ASSIGNMENT_RATIO:
+                self.assignments['roleAssignments'].setdefault(scope_id, []).append(randomizer.choice(assignable_role_guids))
+
+            if randomizer.random() < ELIGIBLE_ASSIGNMENT_RATIO:
+                self.assignments['roleEligibilityScheduleInstances'][scope_id] = [randomizer.choice(assignable_role_guids)]
+
+        # Active PIM assignments are materialized as role assignments
+        self.assignments['roleAssignmentScheduleInstances'] = self.assignments['roleAssignments']
+
+    def get_scope_count(self):
+        """
+            Returns the number of scopes of the tenant.
+
+        """
+        return len(self.parents)
+
+    def get_access_token(self):
+        """
+            Returns an unsigned access token carrying the Id of the tenant in its 'tid' claim.
+
+        """
+        encode = lambda value: base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip('=')
+        return f"{encode({ 'alg': 'none' })}.{encode({ 'tid': self.tenant_id })}.signature"
+
+    def get_scopes_above(self, scope_id):
+        """
+            Returns the Ids of the management groups above the passed scope, up to the Tenant Root Management Group.
+
+        """
+        scopes_above = []
+        parent_id = self.parents.get(scope_id)
+
+        while parent_id and parent_id != '/':
+            scopes_above.append(parent_id)
+            parent_id = self.parents.get(parent_id)
+
+        return scopes_above
+
+    def get_scopes_below(self, scope_id):
+        """
+            Returns the Ids of the resource groups and resources below the passed subscription or resource group.
+
+        """
+        subscription_id = '/'.join(scope_id.split('/')[:3])
+        scopes_below = self.resource_group_ids.get(subscription_id, []) + self.resource_ids.get(subscription_id, [])
+        return [below_id for below_id in scopes_below if below_id.startswith(f"{scope_id}/")]
+
+    def list_assignments(self, scope_id, assignment_type, at_scope_only):
+        """
+            Lists the assignments of the passed type that apply to the passed scope, as ARM does: assignments at and above the scope,
+            and also below it for subscriptions and resource groups unless the listing is filtered with 'atScope()'.
+
+        """
+        assignments_by_scope = self.assignments[assignment_type]
+        scope_ids = [scope_id] + self.get_scopes_above(scope_id)
+
+        if not at_scope_only and scope_id.startswith('/subscriptions/'):
+            scope_ids += self.get_scopes_below(scope_id)
+
+        return [
+            {
+                'id': f"{assigned_scope_id}/providers/Microsoft.Authorization/{assignment_type}/{role_guid}",
+                'name': role_guid,
+                'properties': {
+                    'scope': assigned_scope_id,
+                    'roleDefinitionId': f"/providers/Microsoft.Authorization/roleDefinitions/{role_guid}"
+                }
+            }
+            for assigned_scope_id in scope_ids
+            for role_guid in assignments_by_scope.get(assigned_scope_id, [])
+        ]
+
+    def get_arm_items(self, path, query):
+        """
+            Returns the items listed by the passed ARM path, or a single item, or None if the path is not implemented.
+
+            Returns:
+                tuple(int, list(dict) | dict): the HTTP status code, and the listed items or the single item
+
+        """
+        filter_expression = query.get('$filter', '')
+        scope_id, _, provider_path = path.partition('/providers/Microsoft.Authorization/')
+
+        if provider_path:
+            if provider_path.startswith('roleDefinitions/'):
+                role_definition = self.role_definitions.get(provider_path.split('/')[-1].lower())
+                return (200, role_definition) if role_definition else (404, { 'error': { 'code': 'RoleDefinitionDoesNotExist' } })
+
+            if provider_path == 'roleDefinitions':
+                role_type = 'CustomRole' if 'CustomRole' in filter_expression else 'BuiltInRole'
+                return 200, [definition for definition in self.role_definitions.values() if definition['properties']['type'] == role_type]
+
+            if provider_path in self.assignments:
+                if 'asTarget()' in filter_expression:
+                    return 200, []
+
+                return 200, self.list_assignments(scope_id or self.root_id, provider_path, 'atScope()' in filter_expression)
+
+        if path == f"{self.root_id}/descendants":
+            return 200, [
+                { 'id': descendant_id, 'properties': { 'parent': { 'id': self.parents[descendant_id] } } }
+                for descendant_id in self.management_group_ids[1:] + self.subscription_ids
+            ]
+
+        if path == '/providers/Microsoft.Management/managementGroups':
+            return 200, [{ 'id': management_group_id } for management_group_id in self.management_group_ids]
+
+        if path == '/subscriptions':
+            return 200, [{ 'id': subscription_id } for subscription_id in self.subscription_ids]
+
+        if path.endswith('/resourceGroups') and path[:-len('/resourceGroups')] in self.resource_group_ids:
+            return 200, [{ 'id': resource_group_id } for resource_group_id in self.resource_group_ids[path[:-len('/resourceGroups')]]]
+
+        if path.endswith('/resources') and path[:-len('/resources')] in self.resource_ids:
+            return 200, [{ 'id': resource_id } for resource_id in self.resource_ids[path[:-len('/resources')]]]
+
+        return 404, { 'error': { 'code': 'NotImplemented', 'message': f"The path '{path}' is not implemented by the stand-in." } }
+
+    def query_resource_graph(self, body):
+        """
+            Returns the rows of an Azure Resource Graph query, which is expected to list the role definition Id of role assignments.
+            Without 'managementGroups', only the accessible subscriptions and the management groups above them are covered.
+
+        """
+        covered_scope_ids = set(self.parents) if body.get('managementGroups') else set(
+            scope_id for subscription_id in self.subscription_ids for scope_id in [subscription_id] + self.get_scopes_above(subscription_id) + self.get_scopes_below(subscription_id)
+        )
+        return [
+            { 'roleDefinitionId': f"/providers/Microsoft.Authorization/roleDefinitions/{role_guid}" }
+            for scope_id, role_guids in self.assignments['roleAssignments'].items() if scope_id in covered_scope_ids
+            for role_guid in role_guids
+        ]
+
+    def get_graph_body(self, path, query):
+        """
+            Returns the status code and body of an individual MS Graph request.
+
+        """
+        if path == '/roleManagement/directory/roleDefinitions':
+            is_built_in = 'isBuiltIn eq true' in query.get('$filter', '')
+            return 200, { 'value': [] if is_built_in else self.entra_role_definitions }
+
+        if path.startswith('/servicePrincipals'):
+            return 200, { 'appRoles': [{ 'id': str(uuid.uuid5(SYNTHETIC_ID_NAMESPACE, f"app-role-{position}")), 'value': f"Synthetic.Permission{position}" } for position in range(50)] }
+
+        return 404, { 'error': { 'code': 'NotImplemented' } }
+
+
+class MockAzureRequestHandler(http.server.BaseHTTPRequestHandler):
+    """
+        Serves the synthetic tenant of its server (see MockAzureServer). Listings are paged with a '$skiptoken' in their 'nextLink'.
+
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        # Requests are counted by the server rather than logged
+        pass
+
+    def send_json(self, status_code, body, headers = None):
+        content = json.dumps(body).encode()
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+
+        self.end_headers()
+        self.wfile.write(content)
+
+    def read_json(self):
+        content_length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(content_length) or b'{}')
+
+    def get_arm_response(self, url):
+        """
+            Returns the status code and body of an ARM GET request, paging listings.
+
+        """
+        url_parts = urllib.parse.urlsplit(url)
+        path = url_parts.path.removeprefix('/arm').rstrip('/')
+        query = dict(urllib.parse.parse_qsl(url_parts.query))
+        status_code, items = self.server.tenant.get_arm_items(path, query)
+
+        if status_code != 200 or not isinstance(items, list):
+            return status_code, items
+
+        page_size = self.server.page_size
+        position = int(query.get('$skiptoken', 0))
+        body = { 'value': items[position:position + page_size] }
+
+        if position + page_size < len(items):
+            next_query = urllib.parse.urlencode(dict(query, **{ '$skiptoken': position + page_size }))
+            body['nextLink'] = f"{self.server.base_uri}/arm{path}?{next_query}"
+
+        return 200, body
+
+    def handle_arm_batch(self, body):
+        """
+            Answers an ARM batch with the response of each individual request.
+
+        """
+        responses = []
+
+        for request in body.get('requests', []):
+            status_code, content = self.get_arm_response(request['url'])
+            responses.append({ 'name': request.get('name'), 'httpStatusCode': status_code, 'headers': {}, 'content': content })
+
+        return 200, { 'responses': responses }, {}
+
+    def handle_resource_graph(self, body):
+        """
+            Answers an Azure Resource Graph query, paging its rows with a '$skipToken'.
+
+        """
+        rows = self.server.tenant.query_resource_graph(body)
+        options = body.get('options') or {}
+        page_size = int(options.get('$top', self.server.page_size))
+        position = int(options.get('$skipToken', 0))
+        page = { 'data': rows[position:position + page_size], 'totalRecords': len(rows) }
+
+        if position + page_size < len(rows):
+            page['$skipToken'] = str(position + page_size)
+
+        return page
+
+    def handle_graph_batch(self, body):
+        """
+            Answers an MS Graph JSON batch with the response of each individual request.
+
+        """
+        responses = []
+
+        for request in body.get('requests', []):
+            url_parts = urllib.parse.urlsplit(request['url'])
+            status_code, response_body = self.server.tenant.get_graph_body(url_parts.path, dict(urllib.parse.parse_qsl(url_parts.query)))
+            responses.append({ 'id': request['id'], 'status': status_code, 'body': response_body })
+
+        return { 'responses': responses }
+
+    def do_GET(self):
+        self.server.count_request()
+
+        if self.path.startswith('/arm/'):
+            status_code, body = self.get_arm_response(self.path)
+            self.send_json(status_code, body)
+        else:
+            self.send_json(404, { 'error': { 'code': 'NotImplemented' } })
+
+    def do_POST(self):
+        self.server.count_request()
+        path = urllib.parse.urlsplit(self.path).path
+        body = self.read_json()
+
+        if path == '/arm/batch':
+            status_code, response_body, headers = self.handle_arm_batch(body)
+            self.send_json(status_code, response_body, headers)
+        elif path == '/arm/providers/Microsoft.ResourceGraph/resources':
+            self.send_json(200, self.handle_resource_graph(body))
+        elif path == '/graph/v1.0/$batch':
+            self.send_json(200, self.handle_graph_batch(body))
+        else:
+            self.send_json(404, { 'error': { 'code': 'NotImplemented' } })
+
+
+class FaultInjectingRequestHandler(MockAzureRequestHandler):
+    """
+        Serves the synthetic tenant like MockAzureRequestHandler, while injecting the faults of the fault profile of its server 
+        into the ARM '/batch' endpoint. The results of a batch are kept by the server until their last page has been served from 
+        '/arm/batchresults/<id>', which is the 'Location' of asynchronous batches and the 'nextLink' of paged batch results.
+
+    """
+    def draw(self, ratio):
+        """
+            Returns whether a fault occurring with the passed ratio is injected.
+
+        """
+        with self.server.randomizer_lock:
+            return self.server.randomizer.random() < ratio
+
+    def wait_for_latency(self):
+        with self.server.randomizer_lock:
+            latency_seconds = self.server.randomizer.uniform(*self.server.fault_profile['latencySeconds'])
+
+        time.sleep(latency_seconds)
+
+    def get_batch_results_page(self, batch_id, position):
+        """
+            Returns the status code, body and headers of the page of the passed batch results starting at the passed position.
+
+        """
+        fault_profile = self.server.fault_profile
+
+        with self.server.batch_results_lock:
+            batch_results = self.server.batch_results.get(batch_id)
+
+            if batch_results is None:
+                return 404, { 'error': { 'code': 'BatchResultsNotFound' } }, {}
+
+            if batch_results['remainingPolls'] > 0:
+                batch_results['remainingPolls'] -= 1
+                location = f"{self.server.base_uri}/arm/batchresults/{batch_id}?api-version=2021-04-01"
+                return 202, {}, { 'Location': location, 'Retry-After': str(fault_profile['pollRetryAfterSeconds']) }
+
+            page_size = fault_profile['batchPageSize']
+            body = { 'responses': batch_results['responses'][position:position + page_size] }
+
+            if position + page_size < len(batch_results['responses']):
+                body['nextLink'] = f"{self.server.base_uri}/arm/batchresults/{batch_id}?api-version=2021-04-01&$skiptoken={position + page_size}"
+            else:
+                del self.server.batch_results[batch_id]
+
+        return 200, body, {}
+
+    def handle_arm_batch(self, body):
+        """
+            Answers an ARM batch with the response of each individual request, after injecting the faults of the fault profile.
+
+        """
+        fault_profile = self.server.fault_profile
+        self.wait_for_latency()
+
+        if self.draw(fault_profile['batchThrottleRatio']):
+            return 429, { 'error': { 'code': 'TooManyRequests' } }, { 'Retry-After': str(fault_profile['retryAfterSeconds']) }
+
+        responses = []
+
+        for request in body.get('requests', []):
+            if self.draw(fault_profile['throttleRatio']):
+                headers = { 'Retry-After': str(fault_profile['retryAfterSeconds']) }
+                responses.append({ 'name': request.get('name'), 'httpStatusCode': 429, 'headers': headers, 'content': { 'error': { 'code': 'TooManyRequests' } } })
+            else:
+                status_code, content = self.get_arm_response(request['url'])
+                responses.append({ 'name': request.get('name'), 'httpStatusCode': status_code, 'headers': {}, 'content': content })
+
+        # Asynchronous batches are answered with a 202 until they have been polled enough times
+        batch_id = str(uuid.uuid4())
+        remaining_polls = fault_profile['asyncPollCount'] if self.draw(fault_profile['asyncRatio']) else 0
+
+        with self.server.batch_results_lock:
+            self.server.batch_results[batch_id] = { 'responses': responses, 'remainingPolls': remaining_polls }
+
+        return self.get_batch_results_page(batch_id, 0)
+
+    def do_GET(self):
+        url_parts = urllib.parse.urlsplit(self.path)
+
+        if not url_parts.path.startswith('/arm/batchresults/'):
+            return super().do_GET()
+
+        self.server.count_request()
+        self.wait_for_latency()
+        query = dict(urllib.parse.parse_qsl(url_parts.query))
+        status_code, body, headers = self.get_batch_results_page(url_parts.path.split('/')[-1], int(query.get('$skiptoken', 0)))
+        self.send_json(status_code, body, headers)
+
+
+class MockAzureServer(http.server.ThreadingHTTPServer):
+    """
+        HTTP server of the stand-in, serving the passed synthetic tenant in a background thread once started.
+
+    """
+    daemon_threads = True
+
+    def __init__(self, tenant, port = 0, page_size = DEFAULT_PAGE_SIZE, handler_class = MockAzureRequestHandler, fault_profile = None, seed = 0):
+        """
+            Args:
+                tenant(SyntheticTenant): the tenant to serve
+                port(int): the local port to listen on (defaults to any free port)
+                page_size(int): number of items per page of the listings
+                handler_class(class): the request handler serving the tenant (FaultInjectingRequestHandler to inject faults)
+                fault_profile(dict): the faults injected into the ARM '/batch' endpoint, overriding DEFAULT_FAULT_PROFILE
+                seed(int): seed of the generator drawing the injected faults
+
+        """
+        super().__init__(('127.0.0.1', port), handler_class)
+        self.tenant = tenant
+        self.page_size = page_size
+        self.base_uri = f"http://127.0.0.1:{self.server_address[1]}"
+        self.request_count = 0
+        self.request_count_lock = threading.Lock()
+        self.fault_profile = dict(DEFAULT_FAULT_PROFILE, **(fault_profile or {}))
+        self.randomizer = random.Random(seed)
+        self.randomizer_lock = threading.Lock()
+        self.batch_results = {}
+        self.batch_results_lock = threading.Lock()
+
+    def count_request(self):
+        with self.request_count_lock:
+            self.request_count += 1
+
+    def start(self):
+        """
+            Serves requests in a background thread, and returns the environment variables pointing the scripts at the server.
+
+        """
+        threading.Thread(target = self.serve_forever, daemon = True).start()
+
+        return {
+            'ARM_ENDPOINT': f"{self.base_uri}/arm",
+            'MSGRAPH_ENDPOINT': f"{self.base_uri}/graph",
+            'ARM_ACCESS_TOKEN': self.tenant.get_access_token(),
+            'MSGRAPH_ACCESS_TOKEN': self.tenant.get_access_token()
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = 'Serves a synthetic tenant through a local stand-in for ARM and MS Graph.')
+    parser.add_argument('--scopes', type = int, default = 1000, help = 'approximate number of scopes of the synthetic tenant')
+    parser.add_argument('--port', type = int, default = 8080, help = 'local port to listen on')
+    parser.add_argument('--page-size', type = int, default = DEFAULT_PAGE_SIZE, help = 'number of items per page of the listings')
+    parser.add_argument('--seed', type = int, default = 0, help = 'seed of the random distribution of assignments and faults')
+    parser.add_argument('--faults', type = json.loads, default = None, help = 'JSON fault profile injected into the ARM batch endpoint (see DEFAULT_FAULT_PROFILE)')
+    arguments = parser.parse_args()
+
+    tenant = SyntheticTenant(arguments.scopes, arguments.seed)
+    handler_class = FaultInjectingRequestHandler if arguments.faults else MockAzureRequestHandler
+    server = MockAzureServer(tenant, arguments.port, arguments.page_size, handler_class, arguments.faults, arguments.seed)
+    environment = server.start()
+    print (f"Serving a synthetic tenant of {server.tenant.get_scope_count()} scopes. Point the scripts at it with:")
+
+    for name, value in environment.items():
+        print (f"    export {name}='{value}'")
+
+    threading.Event().wait()
@@ -0,0 +1,150 @@
+"""
+    Name:
+        watcher_scan
+
+    Author:
+        Emilien Socchi
+
+    Description:
+        Measures full runs of AzTierWatcher against synthetic tenants of 1k, 10k and 100k scopes served by the local stand-in for
+        ARM and MS Graph (see mock_azure), and reports the wall time, the number of requests and the peak memory of each run.
+        Each run happens in a temporary copy of the files used by AzTierWatcher, so that the repository is left untouched, and
+        in its own process, so that its peak resident set size (RSS) is measured separately from the stand-in.
+
+    Usage:
+        python3 -m benchmarks.watcher_scan [--scopes 1000,10000,100000] [--modes scopes,subscriptions,resourcegraph]
+
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.mock_azure import MockAzureServer, SyntheticTenant
+
+
+# Root of the repository, from which the files used by AzTierWatcher are copied
+REPOSITORY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Files and directories used by AzTierWatcher, relative to the root of the repository
+WATCHER_FILES = [
+    'config.json',
+    'Azure roles',
+    'Entra roles',
+    os.path.join('.github', 'actions', 'detect-untiered', 'scripts'),
+    os.path.join('.github', 'actions', 'shared')
+]
+
+
+def create_sandbox(azure_discovery_mode):
+    """
+        Copies the files used by AzTierWatcher to a temporary directory, configured with the passed discovery mode.
+
+        Args:
+            azure_discovery_mode(str): how role assignments are discovered (see 'azureDiscoveryMode' in config.json)
+
+        Returns:
+            str: path to the temporary directory
+
+    """
+    sandbox_dir = tempfile.mkdtemp(prefix = 'aztier-benchmark-')
+
+    for watcher_file in WATCHER_FILES:
+        source = os.path.join(REPOSITORY_DIR, watcher_file)
+        destination = os.path.join(sandbox_dir, watcher_file)
+
+        if os.path.isdir(source):
+            shutil.copytree(source, destination, ignore = shutil.ignore_patterns('__pycache__'))
+        else:
+            shutil.copyfile(source, destination)
+
+    config_file = os.path.join(sandbox_dir, 'config.json')
+
+    with open(config_file, 'r', encoding = 'utf-8') as file:
+        project_config = json.load(file)
+
+    project_config['azureDiscoveryMode'] = azure_discovery_mode
+
+    with open(config_file, 'w', encoding = 'utf-8') as file:
+        file.write(json.dumps(project_config, indent = 4))
+
+    return sandbox_dir
+
+
+def measure_watcher_scan(server, azure_discovery_mode):
+    """
+        Runs AzTierWatcher once against the passed stand-in, in a new sandbox.
+
+        Args:
+            server(MockAzureServer): the running stand-in serving the synthetic tenant
+            azure_discovery_mode(str): how role assignments are discovered
+
+        Returns:
+            dict: the exit status, wall time (s), peak RSS (MB) and run metrics of the run, and the number of requests received by the stand-in
+
+    """
+    sandbox_dir = create_sandbox(azure_discovery_mode)
+    environment = dict(os.environ, **server.environment)
+    environment.pop('GITHUB_STEP_SUMMARY', None)
+    script = os.path.join(sandbox_dir, '.github', 'actions', 'detect-untiered', 'scripts', 'azTierWatcher.py')
+    request_count = server.request_count
+
+    try:
+        started = time.perf_counter()
+        process = subprocess.Popen([sys.executable, script], cwd = sandbox_dir, env = environment, stdout = subprocess.DEVNULL, stderr = subprocess.PIPE)
+        stderr = process.stderr.read()
+        _, status, usage = os.wait4(process.pid, 0)
+        wall_seconds = time.perf_counter() - started
+        process.returncode = os.waitstatus_to_exitcode(status)
+
+        try:
+            with open(os.path.join(sandbox_dir, '.cache', 'metrics', 'azTierWatcher.json'), 'r', encoding = 'utf-8') as file:
+                run_metrics = json.load(file)
+        except Exception:
+            run_metrics = None
+
+        return {
+            'exitCode': process.returncode,
+            'stderr': stderr.decode(errors = 'replace'),
+            'wallSeconds': wall_seconds,
+            # ru_maxrss is reported in kilobytes on Linux
+            'peakRssMegabytes': usage.ru_maxrss / 1024,
+            'serverRequests': server.request_count - request_count,
+            'runMetrics': run_metrics
+        }
+    finally:
+        shutil.rmtree(sandbox_dir, ignore_errors = True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = 'Benchmarks full AzTierWatcher runs against synthetic tenants served locally.')
+    parser.add_argument('--scopes', default = '1000,10000,100000', help = 'comma-separated approximate numbers of scopes of the synthetic tenants')
+    parser.add_argument('--modes', default = 'scopes,subscriptions,resourcegraph', help = 'comma-separated discovery modes to run (see azureDiscoveryMode)')
+    parser.add_argument('--seed', type = int, default = 0, help = 'seed of the random distribution of assignments')
+    arguments = parser.parse_args()
+
+    print ('| Scopes | Discovery mode | Wall time (s) | Requests | Sub-requests | Downloaded (MB) | Slept (s) | Peak RSS (MB) |')
+    print ('|---|---|---|---|---|---|---|---|')
+
+    for scope_count in [int(scope_count) for scope_count in arguments.scopes.split(',')]:
+        tenant = SyntheticTenant(scope_count, arguments.seed)
+        server = MockAzureServer(tenant)
+        server.environment = server.start()
+
+        try:
+            for azure_discovery_mode in arguments.modes.split(','):
+                result = measure_watcher_scan(server, azure_discovery_mode)
+
+                if result['exitCode'] != 0 or result['runMetrics'] is None:
+                    print (f"FATAL ERROR - AzTierWatcher failed on {tenant.get_scope_count()} scopes in '{azure_discovery_mode}' mode:\n{result['stderr']}")
+                    sys.exit(1)
+
+                total = result['runMetrics']['total']
+                print (f"| {tenant.get_scope_count()} | {azure_discovery_mode} | {result['wallSeconds']:.1f} | {total['requests']} | {total['subRequests']} | {total['bytes'] / 1024 / 1024:.1f} | {total['sleptSeconds']:.1f} | {result['peakRssMegabytes']:.0f} |")
+        finally:
+            server.shutdown()
+            server.server_close()
@@ -0,0 +1,74 @@
+"""
+    Name:
+        test_azTierSyncer
+
+    Author:
+        Emilien Socchi
+
+    Description:
+        Tests deciding whether the local tier files of AzTierSyncer are still in sync with the AAT project since the last sync.
+
+    Usage:
+        python3 -m unittest discover tests
+
+"""
+import importlib.util
+import os
+import unittest
+
+
+# AzTierSyncer is loaded from its script, as done by AzTierPipeline
+SYNCER_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.github', 'actions', 'sync-from-upstream', 'scripts', 'azTierSyncer.py')
+spec = importlib.util.spec_from_file_location('azTierSyncer', SYNCER_SCRIPT)
+azTierSyncer = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(azTierSyncer)
+
+
+class IsInSyncWithAatTests(unittest.TestCase):
+    def setUp(self):
+        self.tiered_builtin_roles_from_aat = [
+            { 'tier': '0', 'id': '00000000-0000-0000-0000-000000000001', 'assetName': 'Owner', 'worstCaseScenario': 'Upstream scenario' }
+        ]
+        # The local tier file overrides the tier of the upstream role
+        self.tiered_roles_from_local = [
+            { 'tier': '1', 'id': '00000000-0000-0000-0000-000000000001', 'assetName': 'Owner', 'worstCaseScenario': 'Upstream scenario', 'assetType': 'Built-in' }
+        ]
+
+    def get_cached_file(self, keep_local_changes):
+        return {
+            'etag': '"etag"',
+            'content': self.tiered_builtin_roles_from_aat,
+            'localHash': azTierSyncer.get_assets_hash(self.tiered_roles_from_local),
+            'keepLocalChanges': keep_local_changes
+        }
+
+    def test_unchanged_sync_is_skipped(self):
+        cached_file = self.get_cached_file(True)
+        self.assertTrue(azTierSyncer.is_in_sync_with_aat(cached_file, False, self.tiered_roles_from_local, True))
+
+    def test_upstream_changes_are_synced(self):
+        cached_file = self.get_cached_file(True)
+        self.assertFalse(azTierSyncer.is_in_sync_with_aat(cached_file, True, self.tiered_roles_from_local, True))
+
+    def test_local_changes_are_synced(self):
+        cached_file = self.get_cached_file(True)
+        modified_roles_from_local = [dict(self.tiered_roles_from_local[0], tier = '2')]
+        self.assertFalse(azTierSyncer.is_in_sync_with_aat(cached_file, False, modified_roles_from_local, True))
+
+    def test_cache_without_keep_local_changes_is_synced(self):
+        cached_file = self.get_cached_file(True)
+        del cached_file['keepLocalChanges']
+        self.assertFalse(azTierSyncer.is_in_sync_with_aat(cached_file, False, self.tiered_roles_from_local, True))
+
+    def test_disabling_keep_local_changes_overrides_local_changes(self):
+        # The last sync has kept the local override, and nothing has changed upstream or locally since then
+        cached_file = self.get_cached_file(True)
+        self.assertFalse(azTierSyncer.is_in_sync_with_aat(cached_file, False, self.tiered_roles_from_local, False))
+
+        updated_tiered_roles, has_been_updated = azTierSyncer.sync_tiered_assets_with_aat(False, 'azure', self.tiered_roles_from_local, cached_file['content'])
+        self.assertTrue(has_been_updated)
+        self.assertEqual(updated_tiered_roles[0]['tier'], '0')
+
+
+if __name__ == "__main__":
+    unittest.main()